@@ -0,0 +1,73 @@
+import sys
+
+# avoid having the cwd in the path
+# see https://docs.python.org/3/tutorial/modules.html#the-module-search-path
+if '' in sys.path:
+    sys.path.remove('')
+
+import argparse
+from pathlib import Path
+from traceback import print_tb
+from typing import List
+
+from pbuild.process import perform
+
+
+def main(argv: List[str] = sys.argv[1:]):
+
+    parser = argparse.ArgumentParser(prog='pbuild')
+
+    parser.add_argument(
+        '-c',
+        dest='config',
+        metavar='config',
+        default=None,
+        help='config file describing the stages (defaults to pdistx.toml or pdistx.json)',
+    )
+
+    parser.add_argument(
+        '-j',
+        dest='jobs',
+        metavar='jobs',
+        type=int,
+        default=None,
+        help='number of stages run in parallel (defaults to the number of cores)',
+    )
+
+    parser.add_argument(
+        '-r',
+        dest='rebuild',
+        action='store_true',
+        help='rebuild all stages, even if their config and inputs did not change',
+    )
+
+    parser.add_argument(
+        'stages',
+        nargs='*',
+        help='stages to be run including the ones they depend on (defaults to all stages)',
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.config:
+        config = Path(args.config)
+    else:
+        config = Path('pdistx.toml') if Path('pdistx.toml').is_file() else Path('pdistx.json')
+
+    try:
+        perform(
+            config,
+            args.stages,
+            args.jobs,
+            args.rebuild,
+        )
+    except Exception as ex:
+        print(f'ERROR: {ex}')
+        print_tb(ex.__traceback__)
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+import hashlib
+import json
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from os import cpu_count, makedirs, walk
+from pathlib import Path, PurePosixPath
+from subprocess import check_call
+from tempfile import mkdtemp
+from typing import Dict, List, Optional, Tuple
+
+from pdistx import api
+from pdistx.utils.git import git_digests, git_source_files
+from pdistx.utils.path import fnmatch_any, rmpath, rmpath_background, staging_folder, swap_paths
+
+try:
+    import tomllib
+except ImportError:  # python < 3.11
+    tomllib = None
+
+# options of each tool, which can be given for a stage (in addition to the common ones)
+_OPTIONS = {
+    'variant': ['root', 'definitions', 'prune', 'entries', 'verbatim', 'layout', 'python', 'platform', 'blender'],
+    'pack': [
+        'root', 'target', 'resources', 'main', 'layout', 'profile', 'definitions', 'python', 'platform', 'blender'
+    ],
+    'vendor': ['requirements', 'pip', 'wheels', 'verbatim', 'layout', 'lazy'],
+}
+
+_COMMON = ['tool', 'input', 'output', 'base', 'filter', 'after', 'git']
+
+# file caching the input hashes of each stage, next to the config file
+_CACHE = '.pdistx-cache.json'
+
+
+def load_config(path: Path) -> Dict[str, dict]:
+    # toml requires python 3.11 or newer, json is supported in any case
+    if path.suffix == '.toml':
+        if tomllib is None:
+            raise RuntimeError('toml config files require python 3.11 or newer, use a json config file instead')
+        config = tomllib.loads(path.read_text(encoding='utf-8'))
+    else:
+        config = json.loads(path.read_text(encoding='utf-8'))
+
+    stages = config.get('stages')
+    if not isinstance(stages, dict) or not stages:
+        raise ValueError(f'{path} is expected to define stages')
+
+    for name, stage in stages.items():
+        if not isinstance(stage, dict) or stage.get('tool') not in _OPTIONS:
+            raise ValueError(f'stage {name} is expected to use one of the tools {", ".join(_OPTIONS)}')
+
+        unknown = [key for key in stage if key not in _COMMON + _OPTIONS[stage['tool']]]
+        if unknown:
+            raise ValueError(f'stage {name} has unknown options {", ".join(unknown)}')
+
+        if 'input' not in stage and stage['tool'] != 'vendor':
+            raise ValueError(f'stage {name} is expected to have an input')
+
+        for dependency in _dependencies(stages, stage):
+            if dependency not in stages:
+                raise ValueError(f'stage {name} depends on unknown stage {dependency}')
+
+    return stages
+
+
+def _dependencies(stages: Dict[str, dict], stage: dict) -> List[str]:
+    # an input naming another stage uses its files (in memory)
+    dependencies = list(stage.get('after', []))
+    if stage.get('input') in stages:
+        dependencies.append(stage['input'])
+    return dependencies
+
+
+def _order(stages: Dict[str, dict], selected: List[str]) -> List[str]:
+    # selected stages including their dependencies in topological order
+    order: List[str] = []
+    visiting: List[str] = []
+
+    def _visit(name: str):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f'stages {" -> ".join(visiting + [name])} depend on each other')
+
+        visiting.append(name)
+        for dependency in _dependencies(stages, stages[name]):
+            _visit(dependency)
+        visiting.pop()
+
+        order.append(name)
+
+    for name in selected:
+        if name not in stages:
+            raise ValueError(f'stage {name} does not exist')
+        _visit(name)
+
+    return order
+
+
+def _read(path: Path, base: Optional[str], git: bool = False) -> api.Files:
+    if path.suffix in ['.zip', '.whl']:
+        return api.read_zip(path.read_bytes(), base or '')
+
+    # files listed by git (instead of walking the folder)
+    if git:
+        return {file.as_posix(): path.joinpath(*file.parts).read_bytes() for file in git_source_files(path, [])}
+
+    files: api.Files = {}
+    for folder, folders, names in walk(path, followlinks=True):
+        folders[:] = [folder for folder in folders if not fnmatch_any(folder, ['__pycache__', '.git'])]
+        for name in names:
+            file = Path(folder).joinpath(name)
+            files[file.relative_to(path).as_posix()] = file.read_bytes()
+    return files
+
+
+def _write(files: api.Files, path: Path, base: Optional[str]):
+    # outputs are written to a staging folder and moved into place (instead of purging them first)
+    staging = staging_folder(path.parent)
+
+    try:
+        if path.suffix == '.zip':
+            previous = path.read_bytes() if path.is_file() else None
+            staging.joinpath(path.name).write_bytes(api.write_zip(files, base or '', previous))
+        else:
+            for name, data in files.items():
+                file = staging.joinpath(path.name, *PurePosixPath(name).parts)
+                makedirs(file.parent, exist_ok=True)
+                file.write_bytes(data)
+
+        swap_paths(staging, [path])
+
+    finally:
+        rmpath_background(staging)
+
+
+def _filtered(files: api.Files, patterns: List[str]) -> api.Files:
+    # a pattern matching a folder removes all of its files
+    def _keep(name: str):
+        parts = PurePosixPath(name).parts
+        return not any(fnmatch_any('/'.join(parts[0:i]), patterns) for i in range(1, len(parts) + 1))
+
+    return {name: data for name, data in files.items() if _keep(name)} if patterns else files
+
+
+def _digest(files: api.Files) -> str:
+    digest = hashlib.sha256()
+    for name, data in sorted(files.items()):
+        digest.update(name.encode('utf-8') + b'\0' + hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+
+def _git_digest(path: Path) -> str:
+    # same as _digest, but based on the object ids of git, so files, which did not change, do not need to be read
+    digest = hashlib.sha256()
+    for name, object_id in sorted(git_digests(path).items()):
+        digest.update(name.as_posix().encode('utf-8') + b'\0' + object_id.encode('ascii'))
+    return digest.hexdigest()
+
+
+def _install(requirements: Path, pip: str) -> api.Files:
+    # packages get installed into a temporary folder, which is read into memory
+    folder = Path(mkdtemp())
+    try:
+        check_call(
+            [pip, 'install', '--upgrade', '--no-dependencies', '--requirement', requirements, '--target', folder])
+        return _read(folder, None)
+    finally:
+        rmpath(folder)
+
+
+def _run(name: str, stage: dict, root: Path, package: str, files: Optional[api.Files],
+         upstream: Optional[Tuple[Path, Optional[str]]]) -> api.Files:
+    # runs a stage in a worker process, which reads the input and installs requirements as well (only the files of
+    # other stages are passed in memory, by pickling them)
+    tool = stage['tool']
+
+    def _path(key: str) -> Optional[Path]:
+        return root.joinpath(stage[key]) if stage.get(key) else None
+
+    def _progress(message: str):
+        print(f'[{name}] {message}', flush=True)
+
+    # input of the stage, read back from the output of a skipped stage or read from disk
+    if files is None and upstream is not None:
+        files = _read(*upstream)
+    elif files is None and stage.get('input'):
+        files = _read(_path('input'), None, git=bool(stage.get('git')) and _path('input').is_dir())
+    elif files is None:
+        files = {}
+
+    # packages installed from requirements (packages of the input take precedence)
+    if stage.get('requirements'):
+        _progress(f'Installing {stage["requirements"]}...')
+        files = {**_install(_path('requirements'), stage.get('pip', 'pip')), **files}
+
+    files = _filtered(files, stage.get('filter', []))
+    flags = ['prune', 'entries', 'verbatim', 'layout', 'resources', 'main', 'lazy']
+    options = {key: stage[key] for key in flags if key in stage}
+
+    # checks for the target interpreter are folded as definitions
+    checks = api.target_definitions(stage.get('python'), stage.get('platform'), stage.get('blender'))
+    definitions = {**checks, **stage.get('definitions', {})}
+
+    if tool == 'variant':
+        files = api.variant(files, package, definitions, **options, progress=_progress)
+    elif tool == 'pack':
+        target = stage.get('target', package + '.py')
+        profile = _path('profile').read_text(encoding='utf-8') if stage.get('profile') else None
+        files = api.pack(files,
+                         package,
+                         target,
+                         **options,
+                         profile=profile,
+                         definitions=definitions,
+                         progress=_progress)
+    else:
+        wheels = [root.joinpath(wheel).read_bytes() for wheel in stage.get('wheels', [])]
+        files = api.vendor(files, wheels, **options, progress=_progress)
+
+    output = _path('output')
+    if output:
+        _progress(f'Writing {output}...')
+        _write(files, output, stage.get('base'))
+
+    return files
+
+
+def perform(config: Path, selected: List[str], jobs: Optional[int], rebuild: bool):
+    # ensure pre-conditions
+    assert config.is_file(), 'config is expected to be a file'
+
+    stages = load_config(config)
+    order = _order(stages, selected or list(stages))
+    root = config.parent
+
+    def _path(stage: dict, key: str) -> Optional[Path]:
+        return root.joinpath(stage[key]) if stage.get(key) else None
+
+    # digests of the input files of all stages, which are read from disk (files of other stages are passed in memory)
+    digests: Dict[str, str] = {}
+
+    for name in order:
+        stage = stages[name]
+        if stage.get('input') and stage['input'] not in stages:
+            path = _path(stage, 'input')
+
+            # changes of git work trees are detected via the index, so files, which did not change, are not read
+            if stage.get('git') and path.is_dir():
+                digests[name] = _git_digest(path)
+            else:
+                digests[name] = _digest(_read(path, None))
+
+    # stages, whose config and inputs did not change, are skipped (if their output still exists)
+    cache_path = root.joinpath(_CACHE)
+    cache = json.loads(cache_path.read_text(encoding='utf-8')) if cache_path.is_file() and not rebuild else {}
+
+    keys: Dict[str, str] = {}
+    skipped: List[str] = []
+
+    for name in order:
+        stage = stages[name]
+        digest = hashlib.sha256(json.dumps(stage, sort_keys=True).encode('utf-8'))
+        for dependency in _dependencies(stages, stage):
+            digest.update(keys[dependency].encode('utf-8'))
+        digest.update(digests.get(name, _digest({})).encode('utf-8'))
+
+        # wheels, requirements and profiles are only read when running the stage, so their files are hashed instead
+        for wheel in stage.get('wheels', []):
+            digest.update(hashlib.sha256(root.joinpath(wheel).read_bytes()).digest())
+
+        for key in ['requirements', 'profile']:
+            if stage.get(key):
+                digest.update(_path(stage, key).read_bytes())
+
+        keys[name] = digest.hexdigest()
+
+        output = _path(stage, 'output')
+        if cache.get(name) == keys[name] and output and output.exists():
+            # a stage depending on a rebuilt stage is rebuilt as well, as its key changes
+            skipped.append(name)
+
+    # stages without output are skipped, if they did not change and all stages depending on them are skipped
+    for name in reversed(order):
+        dependents = [other for other in order if name in _dependencies(stages, stages[other])]
+        if cache.get(name) == keys[name] and dependents and all(dependent in skipped for dependent in dependents):
+            if name not in skipped:
+                skipped.append(name)
+
+    # files of all stages run (skipped stages are read back from their output, if required)
+    results: Dict[str, api.Files] = {}
+
+    def _root(name: str) -> str:
+        # the root package name defaults to the one of the input
+        stage = stages[name]
+        if 'root' in stage:
+            return stage['root']
+        if stage.get('input') in stages:
+            return _root(stage['input'])
+        return Path(stage.get('input', name)).stem
+
+    def _arguments(name: str) -> tuple:
+        # files of another stage are passed in memory, unless the stage was skipped and needs to be read back
+        upstream = stages[name].get('input')
+        if upstream in results:
+            return name, stages[name], root, _root(name), results[upstream], None
+
+        if upstream in stages:
+            output = _path(stages[upstream], 'output')
+            if output is None:
+                raise RuntimeError(f'stage {upstream} was skipped and has no output, which {name} could read')
+            return name, stages[name], root, _root(name), None, (output, stages[upstream].get('base'))
+
+        return name, stages[name], root, _root(name), None, None
+
+    # run all stages, as soon as their dependencies are done, in parallel (by processes, as the tools are cpu bound)
+    pending = list(order)
+    done: List[str] = []
+
+    try:
+        with ProcessPoolExecutor(jobs or cpu_count()) as executor:
+            running = {}
+
+            while pending or running:
+                for name in list(pending):
+                    if all(dependency in done for dependency in _dependencies(stages, stages[name])):
+                        pending.remove(name)
+
+                        if name in skipped:
+                            print(f'Skipping {name}, which is up to date...', flush=True)
+                            done.append(name)
+                        else:
+                            print(f'Running {name}...', flush=True)
+                            running[executor.submit(_run, *_arguments(name))] = name
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    done.append(name)
+
+    finally:
+        # remember the keys of all stages done (even if another stage failed)
+        cache.update({name: keys[name] for name in done})
+        cache_path.write_text(json.dumps(cache, indent=2, sort_keys=True) + '\n', encoding='utf-8')
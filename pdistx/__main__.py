@@ -7,9 +7,11 @@ if '' in sys.path:
 
 from typing import List
 
+from pbuild.__main__ import main as main_build
 from ppack.__main__ import main as main_pack
 from pvariant.__main__ import main as main_variant
 from pvendor.__main__ import main as main_vendor
+from pverify.__main__ import main as main_verify
 
 
 def main(argv: List[str] = sys.argv[1:]):
@@ -17,14 +19,18 @@ def main(argv: List[str] = sys.argv[1:]):
     tool = argv[0] if len(argv) > 0 else None
     argv = argv[1:]
 
-    if tool == 'pack':
+    if tool == 'build':
+        main_build(argv)
+    elif tool == 'pack':
         main_pack(argv)
     elif tool == 'variant':
         main_variant(argv)
     elif tool == 'vendor':
         main_vendor(argv)
+    elif tool == 'verify':
+        main_verify(argv)
     else:
-        print('Usage: pdistx pack|variant|vendor --help')
+        print('Usage: pdistx build|pack|variant|vendor|verify --help')
         sys.exit(1)
 
 
@@ -0,0 +1,191 @@
+import io
+from pathlib import PurePosixPath
+from typing import Callable, Dict, List, Optional
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from ppack.process import pack_code, pack_module
+from ppack.profile import read_profile
+from pvariant.process import variant_tree
+from pvariant.target import target_definitions  # pylint: disable=unused-import
+from pvendor.process import vendor_code, vendor_init_code
+from pvendor.wheel import wheel_members
+
+from .utils.member import top_level_name
+from .utils.path import fnmatch_any
+from .utils.prefilter import has_identifier, identifier_pattern
+from .utils.source import format_source
+from .utils.zip import write_members
+
+# in-memory api for embedding the tools, e.g. in build servers
+# file trees are dictionaries of relative posix paths to file contents, progress is reported to an optional callback
+# NOTE: no global state is used, so all functions can be called concurrently from multiple threads
+
+Files = Dict[str, bytes]
+Progress = Optional[Callable[[str], None]]
+
+
+def _log(progress: Progress) -> Callable[[str], None]:
+    return progress if progress is not None else lambda message: None
+
+
+def _tree(files: Files) -> Dict[PurePosixPath, bytes]:
+    tree: Dict[PurePosixPath, bytes] = {}
+
+    for name, data in files.items():
+        path = PurePosixPath(name)
+
+        if path.is_absolute() or '..' in path.parts or not path.parts:
+            raise ValueError(f'{name} is expected to be a relative path within the file tree')
+
+        if not isinstance(data, bytes):
+            raise ValueError(f'{name} is expected to be given as bytes')
+
+        # same entries are ignored as by the command line tools
+        if fnmatch_any(path.name, ['*.pyc']) or any(fnmatch_any(part, ['__pycache__', '.git']) for part in path.parts):
+            continue
+
+        tree[path] = data
+
+    return tree
+
+
+def _encode(code: str, layout: bool) -> bytes:
+    return format_source(code, sanitize=False, layout=layout).encode('utf-8')
+
+
+def read_zip(data: bytes, base: str = '') -> Files:
+    # all files of a zip file (within the base path)
+    prefix = PurePosixPath(base).as_posix() + '/' if base else ''
+
+    with ZipFile(io.BytesIO(data)) as handle:
+        return {
+            info.filename[len(prefix):]: handle.read(info)
+            for info in handle.infolist()
+            if not info.is_dir() and info.filename.startswith(prefix)
+        }
+
+
+def write_zip(files: Files, base: str = '', previous: Optional[bytes] = None) -> bytes:
+    # entries are sorted and timestamps are fixed, so the same files result in the same zip file
+    # unchanged members of a previous zip file are copied without recompressing them
+    buffer = io.BytesIO()
+    members = [(PurePosixPath(base, name).as_posix(), data) for name, data in files.items()]
+
+    with ZipFile(buffer, 'w', ZIP_DEFLATED) as handle:
+        if previous is None:
+            write_members(handle, members, None)
+        else:
+            with ZipFile(io.BytesIO(previous)) as previous_handle:
+                write_members(handle, members, previous_handle)
+
+    return buffer.getvalue()
+
+
+def variant(
+    files: Files,
+    root: str,
+    definitions: dict,
+    prune: bool = False,
+    entries: Optional[List[str]] = None,
+    verbatim: bool = False,
+    layout: bool = False,
+    progress: Progress = None,
+) -> Files:
+    # same as pvariant for a source folder named root
+    tree = _tree(files)
+    sources = {path: data for path, data in tree.items() if path.suffix == '.py'}
+
+    paths, codes = variant_tree(list(tree), sources, root, definitions, prune, entries or [], verbatim, layout,
+                                _log(progress))
+
+    return {path.as_posix(): tree[path] if codes.get(path) is None else _encode(codes[path], layout) for path in paths}
+
+
+def pack(
+    files: Files,
+    root: str,
+    target: str,
+    resources: bool = False,
+    main: bool = False,
+    layout: bool = False,
+    profile: Optional[str] = None,
+    definitions: Optional[dict] = None,
+    progress: Progress = None,
+) -> Files:
+    # same as ppack for a source package named root, the result contains the packed file and resources at target
+    # the profile is the content of an import trace, definitions are folded (e.g. the ones of target_definitions)
+    log = _log(progress)
+    target_path = PurePosixPath(target)
+    modules = {}
+    result: Files = {}
+
+    for path, data in _tree(files).items():
+        if path.suffix == '.py':
+            name, code, is_package = pack_module(path, data, root, resources, layout, definitions)
+            modules[name] = (code, is_package)
+        elif resources:
+            result[target_path.parent.joinpath(target_path.stem + '_resources', path).as_posix()] = data
+
+    startup = read_profile(profile, [root, target_path.stem]) if profile is not None else None
+
+    log(f'Packing {len(modules)} modules into {target}...')
+    result[target_path.as_posix()] = pack_code(modules, root, main, startup).encode('utf-8')
+
+    return result
+
+
+def vendor(
+    files: Files,
+    wheels: Optional[List[bytes]] = None,
+    verbatim: bool = False,
+    layout: bool = False,
+    lazy: Optional[List[str]] = None,
+    progress: Progress = None,
+) -> Files:
+    # same as pvendor for installed packages (a library folder) and wheels, the result is the vendor package
+    log = _log(progress)
+    members: Dict[PurePosixPath, bytes] = {}
+    modules: Dict[str, str] = {}
+
+    def _add(path: PurePosixPath, data: bytes, origin: str):
+        name = top_level_name(path)
+
+        if modules.setdefault(name, origin) != origin:
+            log(f'Warning: multiple copies of {name} detected, skipping redundant one!')
+            return
+
+        members[path] = data
+
+    # top-level packages and modules of the library folder
+    for path, data in _tree(files).items():
+        if len(path.parts) > 1 and fnmatch_any(path.parts[0], ['*.dist-info', '*.egg-info', 'bin']):
+            continue
+        if len(path.parts) == 1 and path.suffix != '.py':
+            continue
+        _add(path, data, 'files')
+
+    # wheels are read directly without installing them first
+    for i, wheel in enumerate(wheels or []):
+        with ZipFile(io.BytesIO(wheel)) as handle:
+            for path, info in wheel_members(handle):
+                _add(path, handle.read(info), f'wheel {i}')
+
+    # files not referencing any vendored module are not transformed at all
+    pattern = identifier_pattern(modules.keys())
+    result: Files = {}
+
+    for path, data in sorted(members.items()):
+        if path.suffix != '.py':
+            result[path.as_posix()] = data
+            continue
+
+        level = len(path.parts) - 1
+        code = vendor_code(data, level, list(modules.keys()), has_identifier(pattern, data), verbatim, layout)
+        result[path.as_posix()] = data if code is None else _encode(code, layout)
+
+    log(f'Vendored {len(modules)} modules')
+
+    # init file of the vendor package (empty, unless modules are imported lazily)
+    result['__init__.py'] = format_source(vendor_init_code(list(modules.keys()), lazy or [])).encode('utf-8')
+
+    return result
@@ -0,0 +1,182 @@
+import bz2
+import gzip
+import lzma
+import tarfile
+from contextlib import ExitStack
+from fnmatch import fnmatch
+from glob import glob
+from os.path import join
+from pathlib import Path, PurePosixPath
+from shutil import copyfileobj
+from tempfile import TemporaryFile
+from threading import Lock
+from typing import Collection, Dict, List, Optional, Tuple, Union
+from zipfile import ZipFile
+
+from .member import TarMember, ZipMember
+from .path import fnmatch_any, keep_source_file
+
+# archives, which can be used as source (release zip files, wheels and source distributions)
+_ZIPS = ['.zip', '.whl']
+# decompressors of tar files (uncompressed tar files are read directly)
+_TARS = {'.tar': None, '.tar.gz': gzip.open, '.tgz': gzip.open, '.tar.bz2': bz2.open, '.tar.xz': lzma.open}
+
+# top-level folders of wheels and source distributions, which are not part of a package
+_METADATA = ['*.dist-info', '*.data', '*.egg-info']
+
+
+def _suffix(path: Path) -> Optional[str]:
+    for suffix in _ZIPS + list(_TARS.keys()):
+        if path.name.lower().endswith(suffix):
+            return suffix
+    return None
+
+
+def split_archive(path: Path) -> Optional[Tuple[Path, PurePosixPath]]:
+    # archive file and the folder within it (e.g. dist/addon.zip/addon), if the path points into an archive
+    for i in range(1, len(path.parts) + 1):
+        archive = Path(*path.parts[0:i])
+
+        if archive.is_file():
+            return (archive, PurePosixPath(*path.parts[i:])) if _suffix(archive) else None
+
+        if not archive.is_dir():
+            return None
+
+    return None
+
+
+def is_source_archive(path: Path) -> bool:
+    return split_archive(path) is not None
+
+
+def _package_base(archive: Path, paths: List[PurePosixPath]) -> PurePosixPath:
+    # archives are expected to contain a single top-level folder (besides metadata), e.g. release zip files of addons
+    folders = {path.parts[0] for path in paths if len(path.parts) > 1 and not fnmatch_any(path.parts[0], _METADATA)}
+
+    if len(folders) != 1:
+        raise ValueError(f'{archive} is expected to contain a single top-level folder, otherwise append the folder '
+                         f'to the archive path, e.g. {archive.joinpath("package")}')
+
+    return PurePosixPath(folders.pop())
+
+
+def _match(parts: Tuple[str, ...], pattern: Tuple[str, ...]) -> bool:
+    # same as glob with recursive=True, ** matches any number of folders
+    if not pattern:
+        return not parts
+
+    if pattern[0] == '**':
+        return any(_match(parts[i:], pattern[1:]) for i in range(len(parts) + 1))
+
+    return len(parts) > 0 and fnmatch(parts[0], pattern[0]) and _match(parts[1:], pattern[1:])
+
+
+class SourceArchive:
+    # files of an archive (zip file, wheel or tar file) are read as members, without extracting them
+    # NOTE: compressed tar files are decompressed into a temporary file first, so members can be read in any order
+    #       (uncompressed tar files are read directly)
+
+    def __init__(self, source: Path, package: bool):
+        split = split_archive(source)
+        if split is None:
+            raise ValueError(f'{source} is expected to be an archive or a folder within an archive')
+
+        self.source = source
+        self._lock = Lock()
+        self._stack = ExitStack()
+        self._handle: Union[ZipFile, tarfile.TarFile, None] = None
+
+        archive, base = split
+
+        try:
+            members = self._open(archive)
+
+            # packages default to the single top-level folder of the archive
+            if package and not base.parts:
+                base = _package_base(archive, list(members.keys()))
+
+            self.name = base.name if base.parts else archive.name
+
+            self._members = {
+                PurePosixPath(*path.parts[len(base.parts):]): info
+                for path, info in members.items()
+                if path.parts[0:len(base.parts)] == base.parts and len(path.parts) > len(base.parts)
+            }
+
+            if base.parts and not self._members:
+                raise ValueError(f'{source} is expected to be a folder within the archive')
+
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self, archive: Path) -> Dict[PurePosixPath, object]:
+        suffix = _suffix(archive)
+
+        if suffix in _ZIPS:
+            self._handle = self._stack.enter_context(ZipFile(archive))
+            infos = [(info.filename, info) for info in self._handle.infolist() if not info.is_dir()]
+
+        else:
+            if _TARS[suffix] is None:
+                self._handle = self._stack.enter_context(tarfile.open(archive))
+            else:
+                spool = self._stack.enter_context(TemporaryFile())
+                with _TARS[suffix](archive, 'rb') as handle:
+                    copyfileobj(handle, spool)
+                spool.seek(0)
+
+                self._handle = self._stack.enter_context(tarfile.open(str(archive), fileobj=spool))
+
+            infos = [(info.name, info) for info in self._handle.getmembers() if info.isfile()]
+
+        # members outside of the archive root are skipped
+        members = {}
+        for name, info in infos:
+            path = PurePosixPath(name)
+            if path.parts and not path.is_absolute() and '..' not in path.parts:
+                members[path] = info
+
+        return members
+
+    def files(self, filters: Collection[Path]) -> List[PurePosixPath]:
+        # files in order of the archive, filters are paths within the source (same as for source folders)
+        filtered = set(filters)
+        return [path for path in self._members if keep_source_file(self.source, path, filtered)]
+
+    def glob(self, pattern: str) -> List[Path]:
+        # files and folders matching the glob pattern (as paths within the source)
+        parts = PurePosixPath(pattern).parts
+        candidates = {path.parts[0:i] for path in self._members for i in range(1, len(path.parts) + 1)}
+        return [self.source.joinpath(*candidate) for candidate in sorted(candidates) if _match(candidate, parts)]
+
+    def member(self, path: PurePosixPath, name: Optional[PurePosixPath] = None) -> Union[ZipMember, TarMember]:
+        # member of the file at the path, optionally named differently
+        info = self._members[path]
+        name = path if name is None else name
+
+        if isinstance(self._handle, ZipFile):
+            return ZipMember(name, self._handle, info)
+        return TarMember(name, self._handle, info, self._lock)
+
+    def read(self, path: PurePosixPath) -> bytes:
+        return self.member(path).read()
+
+    def close(self):
+        self._stack.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def glob_source(source: Path, patterns: List[str]) -> List[Path]:
+    # files and folders matching the glob patterns within a source folder or a source archive
+    if not patterns or not is_source_archive(source):
+        return [Path(path) for pattern in patterns for path in glob(join(source, pattern), recursive=True)]
+
+    with SourceArchive(source, True) as archive:
+        return [path for pattern in patterns for path in archive.glob(pattern)]
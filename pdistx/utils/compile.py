@@ -0,0 +1,55 @@
+from os import walk
+from pathlib import Path
+from subprocess import check_call
+from typing import List, Optional
+
+
+def compile_bytecode(path: Path,
+                     pythons: List[str],
+                     optimizations: List[int],
+                     sourceless: bool,
+                     zipped: bool,
+                     destination: Optional[Path] = None):
+
+    # check pre-conditions
+    if sourceless:
+        assert len(pythons) == 1 and len(optimizations) == 1, \
+            'sourceless compilation supports a single interpreter and optimization level only'
+
+    # zipimport does not read __pycache__ folders, only .pyc files next to the source files
+    if zipped:
+        assert len(pythons) == 1 and len(optimizations) == 1, \
+            'compilation for zip files supports a single interpreter and optimization level only'
+
+    # compile using each target interpreter (in parallel using all cores)
+    for python in pythons:
+        for optimization in optimizations:
+            print(f'Compiling {path} using {python} (optimization level {optimization})...')
+
+            command = [python] + (['-' + 'O' * optimization] if optimization > 0 else [])
+            command += ['-m', 'compileall', '-q', '-j', '0']
+
+            # the modification time is lost in zip files, so check the source hash instead
+            if zipped:
+                command += ['--invalidation-mode', 'checked-hash']
+
+            # file names within the bytecode (e.g. used in tracebacks) refer to the final location (within the zip
+            # file), not a staging one
+            if destination:
+                command += ['-d', str(destination if path.is_dir() else destination.parent)]
+
+            # write .pyc files next to the source files
+            if sourceless or zipped:
+                command += ['-b']
+
+            check_call(command + [str(path)])
+
+    # remove all python files which have been compiled
+    if sourceless:
+        files = [path] if path.is_file() else [
+            Path(folder).joinpath(file) for folder, _, files in walk(path) for file in files
+        ]
+
+        for file in files:
+            if file.suffix == '.py' and file.with_suffix('.pyc').is_file():
+                file.unlink()
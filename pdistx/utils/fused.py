@@ -0,0 +1,87 @@
+import ast
+from typing import Callable, Dict, List, Tuple
+
+
+class FusedRule:
+    # mixin for transformers and visitors, which can be run together with others within a single traversal
+    # NOTE: rules handle a node after its children (by calling generic_visit first), when being fused the children have
+    # already been handled by all rules, so generic_visit must not traverse them again
+    fused = False
+
+    def generic_visit(self, node):
+        if self.fused:
+            return node
+        return super().generic_visit(node)
+
+
+class FusedTransform(ast.NodeTransformer):
+
+    def __init__(self, rules: list):
+        self._rules = rules
+        self._dispatch: Dict[type, List[Tuple[int, Callable, bool]]] = {}
+        super().__init__()
+
+    def _handlers(self, node_type: type):
+        handlers = self._dispatch.get(node_type)
+
+        if handlers is None:
+            handlers = []
+
+            for index, rule in enumerate(self._rules):
+                # same lookup as ast.NodeVisitor.visit, but generic_visit is only called if it does something
+                handler = getattr(rule, 'visit_' + node_type.__name__, None)
+                if handler is None and type(rule).generic_visit is not FusedRule.generic_visit:
+                    handler = rule.generic_visit
+
+                if handler is not None:
+                    handlers.append((index, handler, isinstance(rule, ast.NodeTransformer)))
+
+            self._dispatch[node_type] = handlers
+
+        return handlers
+
+    def _apply(self, node, start: int):
+        for index, handler, transforms in self._handlers(type(node)):
+            if index < start:
+                continue
+
+            # results of visitors are ignored
+            result = handler(node)
+            if not transforms or result is node:
+                continue
+
+            # the following rules handle replaced nodes, but not their children (which might be new nodes as well)
+            if isinstance(result, list):
+                nodes = []
+                for item in result:
+                    item = self._apply(item, index + 1)
+                    if isinstance(item, list):
+                        nodes += item
+                    elif item is not None:
+                        nodes.append(item)
+                return nodes
+
+            if not isinstance(result, ast.AST):
+                return result
+
+            return self._apply(result, index + 1)
+
+        return node
+
+    def visit(self, node):
+        # children first, then all rules in order
+        node = super().generic_visit(node)
+        return self._apply(node, 0)
+
+
+def fused_transform(tree, rules: list):
+    # run all rules (transformers and visitors) within a single traversal using per node type dispatch tables
+    for rule in rules:
+        assert isinstance(rule, FusedRule), 'rules are expected to be fused rules'
+        rule.fused = True
+
+    try:
+        return FusedTransform(rules).visit(tree)
+    finally:
+        for rule in rules:
+            rule.fused = False
@@ -0,0 +1,75 @@
+import hashlib
+from pathlib import Path, PurePosixPath
+from subprocess import PIPE, run
+from typing import Dict, List, Set, Tuple
+
+from .path import keep_source_file
+
+# mode of submodules within the index
+_GITLINK = b'160000'
+
+
+def _git(folder: Path, args: List[str]) -> bytes:
+    try:
+        result = run(['git', '-C', str(folder)] + args, stdout=PIPE, stderr=PIPE, check=False)
+    except FileNotFoundError as ex:
+        raise RuntimeError('git is required to list the files of a git work tree') from ex
+
+    if result.returncode != 0:
+        lines = result.stderr.decode('utf-8', errors='replace').splitlines()
+        reason = lines[-1] if lines else 'git failed'
+        raise RuntimeError(f'{folder} is expected to be within a git work tree ({reason})')
+
+    return result.stdout
+
+
+def _paths(output: bytes) -> Set[PurePosixPath]:
+    # paths are relative to the folder git is run in
+    return {PurePosixPath(path.decode('utf-8', errors='surrogateescape')) for path in output.split(b'\0') if path}
+
+
+def _index(folder: Path) -> Dict[PurePosixPath, Tuple[bytes, str]]:
+    # mode and object id of all files within the index
+    index: Dict[PurePosixPath, Tuple[bytes, str]] = {}
+
+    for entry in _git(folder, ['ls-files', '-z', '--stage']).split(b'\0'):
+        if not entry:
+            continue
+
+        info, path = entry.split(b'\t', 1)
+        mode, object_id, _ = info.split(b' ')
+        index[PurePosixPath(path.decode('utf-8', errors='surrogateescape'))] = (mode, object_id.decode('ascii'))
+
+    return index
+
+
+def git_files(folder: Path) -> List[PurePosixPath]:
+    # files of the work tree within the folder, tracked and untracked ones (except for ignored ones, see .gitignore)
+    # NOTE: this avoids walking the whole folder and matching all ignored files and folders
+    files = _paths(_git(folder, ['ls-files', '-z', '--cached', '--others', '--exclude-standard']))
+    deleted = _paths(_git(folder, ['ls-files', '-z', '--deleted']))
+    submodules = {path for path, (mode, _) in _index(folder).items() if mode == _GITLINK}
+
+    return sorted(files - deleted - submodules)
+
+
+def git_digests(folder: Path) -> Dict[PurePosixPath, str]:
+    # content ids of all files of the work tree within the folder, ids of files, which did not change compared to the
+    # index, are taken from the index (according to the stat data of the index, so they do not need to be read at all)
+    index = _index(folder)
+    modified = _paths(_git(folder, ['diff-files', '-z', '--name-only', '--relative']))
+    digests: Dict[PurePosixPath, str] = {}
+
+    for path in git_files(folder):
+        if path in index and path not in modified:
+            digests[path] = index[path][1]
+        else:
+            digests[path] = hashlib.sha256(folder.joinpath(*path.parts).read_bytes()).hexdigest()
+
+    return digests
+
+
+def git_source_files(source: Path, filters: List[Path]) -> List[PurePosixPath]:
+    # same files and folders are filtered out as when walking the source folder
+    filtered = set(filters)
+    return [path for path in git_files(source) if keep_source_file(source, path, filtered)]
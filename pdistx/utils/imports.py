@@ -0,0 +1,76 @@
+import ast
+from typing import List, Optional, Set, Tuple
+
+from .source import ast_parse
+
+
+def resolve_relative(package: List[str], level: int, module: Optional[str]) -> Optional[List[str]]:
+    if level == 0:
+        return module.split('.') if module else []
+
+    # relative import beyond the top-level package
+    if level - 1 > len(package):
+        return None
+
+    base = package[:len(package) - (level - 1)]
+    return base + (module.split('.') if module else [])
+
+
+class _ImportCollector(ast.NodeVisitor):
+
+    def __init__(self, package: List[str]):
+        self._package = package
+        self.imports: Set[str] = set()
+        self.has_dynamic_import = False
+        super().__init__()
+
+    def _add(self, parts: Optional[List[str]]):
+        if parts:
+            self.imports.add('.'.join(parts))
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Import(self, node: ast.Import):
+        self.generic_visit(node)
+
+        for name in node.names:
+            self._add(name.name.split('.'))
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        self.generic_visit(node)
+
+        base = resolve_relative(self._package, node.level, node.module)
+        if base is None:
+            return
+
+        # imported names might be submodules as well
+        self._add(base)
+        for name in node.names:
+            if name.name != '*':
+                self._add(base + [name.name])
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Call(self, node: ast.Call):
+        self.generic_visit(node)
+
+        # besides the forms rewritten by the import transform, importlib.import_module is detected as well
+        func = node.func.id if isinstance(node.func, ast.Name) else None
+        func = node.func.attr if isinstance(node.func, ast.Attribute) else func
+
+        if func in ['__import__', 'import_module']:
+            name = node.args[0] if len(node.args) > 0 else None
+            name = {x.arg: x.value for x in node.keywords}.get('name', name)
+
+            if isinstance(name, ast.Constant) and isinstance(name.value, str):
+                # import_module supports relative names, based on the package argument
+                level = len(name.value) - len(name.value.lstrip('.'))
+                self._add(resolve_relative(self._package, level, name.value[level:]))
+            else:
+                self.has_dynamic_import = True
+
+
+def collect_imports(code, package: List[str]) -> Tuple[Set[str], bool]:
+    # accepts source code or an already parsed tree
+    visitor = _ImportCollector(package)
+    visitor.visit(ast_parse(code) if isinstance(code, str) else code)
+    return visitor.imports, visitor.has_dynamic_import
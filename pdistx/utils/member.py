@@ -0,0 +1,102 @@
+from os import makedirs
+from pathlib import Path, PurePosixPath
+from shutil import copy, copyfileobj
+from tarfile import TarFile, TarInfo
+from threading import Lock
+from typing import Callable, Dict, Tuple
+from zipfile import ZipFile, ZipInfo
+
+
+def top_level_name(path: PurePosixPath) -> str:
+    # name of the top-level module or package a file of a library belongs to
+    return path.parts[0] if len(path.parts) > 1 else path.stem
+
+
+def filter_members(members: list, keep: Callable, action: str) -> list:
+    # members to be kept, the removed files and bytes are reported per top-level module
+    kept = []
+    removed: Dict[str, Tuple[int, int]] = {}
+
+    for member in members:
+        if keep(member):
+            kept.append(member)
+        else:
+            count, size = removed.get(top_level_name(member.path), (0, 0))
+            removed[top_level_name(member.path)] = (count + 1, size + member.size)
+
+    # print report
+    for name, (count, size) in sorted(removed.items()):
+        print(f'{action} removed {count} files ({size} bytes) from {name}')
+
+    total_count = sum(count for count, _ in removed.values())
+    total_size = sum(size for _, size in removed.values())
+    print(f'{action} removed {total_count} files ({total_size} bytes) in total')
+
+    return kept
+
+
+def copy_member(member, target_file: Path):
+    # copies the member of a source folder or archive, creating its folder first
+    makedirs(target_file.parent, exist_ok=True)
+    member.copy(target_file)
+
+
+class FileMember:
+
+    def __init__(self, path: PurePosixPath, source: Path):
+        self.path = path
+        self.source = source
+
+    @property
+    def size(self):
+        return self.source.stat().st_size
+
+    def read(self):
+        with open(self.source, 'rb') as file:
+            return file.read()
+
+    def copy(self, target: Path):
+        copy(self.source, target, follow_symlinks=True)
+
+
+class ZipMember:
+
+    def __init__(self, path: PurePosixPath, handle: ZipFile, info: ZipInfo):
+        self.path = path
+        self.source = f'{handle.filename}/{info.filename}'
+        self._handle = handle
+        self._info = info
+
+    @property
+    def size(self):
+        return self._info.file_size
+
+    def read(self):
+        return self._handle.read(self._info)
+
+    def copy(self, target: Path):
+        with self._handle.open(self._info) as source_handle, open(target, 'wb') as target_handle:
+            copyfileobj(source_handle, target_handle)
+
+
+class TarMember:
+    # members of a tar file share its file handle, so they are read one at a time
+
+    def __init__(self, path: PurePosixPath, handle: TarFile, info: TarInfo, lock: Lock):
+        self.path = path
+        self.source = f'{handle.name}/{info.name}'
+        self._handle = handle
+        self._info = info
+        self._lock = lock
+
+    @property
+    def size(self):
+        return self._info.size
+
+    def read(self):
+        with self._lock, self._handle.extractfile(self._info) as source_handle:
+            return source_handle.read()
+
+    def copy(self, target: Path):
+        with self._lock, self._handle.extractfile(self._info) as source_handle, open(target, 'wb') as target_handle:
+            copyfileobj(source_handle, target_handle)
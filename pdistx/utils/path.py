@@ -1,7 +1,10 @@
 from fnmatch import fnmatch
-from pathlib import Path
+from os import listdir, makedirs, rename, replace
+from pathlib import Path, PurePosixPath
 from shutil import rmtree
-from typing import List
+from tempfile import mkdtemp
+from threading import Thread
+from typing import Collection, List
 
 
 def fnmatch_any(name: str, patterns: List[str]):
@@ -11,9 +14,65 @@ def fnmatch_any(name: str, patterns: List[str]):
     return False
 
 
+def keep_source_file(source: Path, path: PurePosixPath, filters: Collection[Path]) -> bool:
+    # same files and folders are filtered out as when walking a source folder (path is relative to the source)
+    for i in range(1, len(path.parts)):
+        if fnmatch_any(path.parts[i - 1], ['__pycache__', '.git']) or source.joinpath(*path.parts[0:i]) in filters:
+            return False
+    return not fnmatch_any(path.name, ['*.pyc']) and source.joinpath(*path.parts) not in filters
+
+
 def rmpath(path: Path):
     if path.exists():
         if path.is_dir():
             rmtree(path)
         else:
             path.unlink()
+
+
+def staging_folder(path: Path) -> Path:
+    # outputs are written to a hidden folder within the folder of the target first, so they can be moved into place
+    makedirs(path, exist_ok=True)
+
+    # staging folders, whose removal got interrupted by exiting, are removed lazily
+    for name in listdir(path):
+        if fnmatch(name, '.pdistx-removed-*'):
+            rmtree(path.joinpath(name), ignore_errors=True)
+
+    return Path(mkdtemp(prefix='.pdistx-', dir=path))
+
+
+def swap_paths(staging: Path, paths: List[Path]):
+    # move all outputs of the staging folder into place and the given paths to be replaced out of the way
+    # NOTE: files are replaced atomically, folders are moved out of the way right before (into the staging folder), as
+    # a folder cannot be replaced by renaming, previous outputs are moved back if the outputs cannot be moved into place
+    names = listdir(staging)
+    previous = staging.joinpath('.previous')
+    moved: List[Path] = []
+
+    try:
+        for path in paths + [staging.parent.joinpath(name) for name in names]:
+            output = staging.joinpath(path.name)
+            replaceable = path.is_file() and output.is_file()
+
+            if path.exists() and not replaceable and not previous.joinpath(path.name).exists():
+                makedirs(previous, exist_ok=True)
+                rename(path, previous.joinpath(path.name))
+                moved.append(path)
+
+        for name in names:
+            replace(staging.joinpath(name), staging.parent.joinpath(name))
+
+    except BaseException:
+        for path in moved:
+            if not path.exists():
+                rename(previous.joinpath(path.name), path)
+        raise
+
+
+def rmpath_background(path: Path):
+    # remove the staging folder including previous outputs without waiting for it, the folder is renamed first, so it
+    # gets removed by the next run, if the removal did not finish before exiting
+    removed = path.with_name(path.name.replace('.pdistx-', '.pdistx-removed-', 1))
+    rename(path, removed)
+    Thread(target=rmtree, args=(removed,), kwargs={'ignore_errors': True}, daemon=True).start()
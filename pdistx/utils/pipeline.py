@@ -0,0 +1,96 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+# reading and writing files is done by threads, while the transformation is done in the calling thread, so blocking
+# file operations (e.g. on network file systems) overlap with the cpu bound work
+# NOTE: the number of pending reads and writes is bounded, so memory usage does not grow with the size of the tree
+WORKERS = 4
+PENDING = 64
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def prefetch(items: Iterable[T],
+             read: Callable[[T], R],
+             workers: int = WORKERS,
+             pending: int = PENDING) -> Iterator[Tuple[T, R]]:
+    # results of reading all items in order, reads are done ahead by a pool of threads
+    with ThreadPoolExecutor(workers) as executor:
+        futures: Deque[Tuple[T, Future]] = deque()
+
+        try:
+            for item in items:
+                futures.append((item, executor.submit(read, item)))
+
+                if len(futures) >= pending:
+                    item, future = futures.popleft()
+                    yield item, future.result()
+
+            while futures:
+                item, future = futures.popleft()
+                yield item, future.result()
+
+        finally:
+            # reads, which are still pending (e.g. on errors), are not needed anymore
+            for _, future in futures:
+                future.cancel()
+
+
+class Writer:
+    # writes files by a pool of threads, the first error gets raised when leaving the context
+    # NOTE: submitting blocks, as long as the maximum number of writes is pending
+
+    def __init__(self, workers: int = WORKERS, pending: int = PENDING):
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limit = pending
+        self._pending = 0
+        self._condition = Condition()
+        self._errors: List[BaseException] = []
+
+    def submit(self, write: Callable, *args, **kwargs):
+        with self._condition:
+            self._raise()
+            self._condition.wait_for(lambda: self._pending < self._limit)
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(write, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+
+        future.add_done_callback(self._done)
+
+    def _done(self, future: Future):
+        error = future.exception() if not future.cancelled() else None
+        self._release(error)
+
+    def _release(self, error: Optional[BaseException] = None):
+        with self._condition:
+            if error is not None:
+                self._errors.append(error)
+            self._pending -= 1
+            self._condition.notify()
+
+    def _raise(self):
+        with self._condition:
+            error: Optional[BaseException] = self._errors[0] if self._errors else None
+        if error is not None:
+            raise error
+
+    def __enter__(self):
+        self._executor = ThreadPoolExecutor(self._workers)
+        return self
+
+    def __exit__(self, *args):
+        # on errors of the block, pending writes are cancelled, but running ones are waited for (so they do not write
+        # into folders, which get removed afterwards)
+        self._executor.shutdown(wait=True, cancel_futures=args[0] is not None)
+
+        # errors of the block take precedence
+        if args[0] is None:
+            self._raise()
@@ -0,0 +1,14 @@
+import re
+from typing import Iterable, Optional, Pattern
+
+
+def identifier_pattern(names: Iterable[str]) -> Optional[Pattern[bytes]]:
+    names = sorted(set(names))
+    if not names:
+        return None
+    return re.compile(rb'\b(?:' + b'|'.join(re.escape(name.encode('utf-8')) for name in names) + rb')\b')
+
+
+def has_identifier(pattern: Optional[Pattern[bytes]], data: bytes):
+    # cheap check on the raw source, whether a file might need to be transformed at all
+    return pattern is not None and pattern.search(data) is not None
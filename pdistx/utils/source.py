@@ -1,6 +1,7 @@
 import ast
 import re
 from pathlib import Path
+from typing import List
 
 
 def ast_parse(code: str):
@@ -15,13 +16,17 @@ def ast_unparse(node):
 
 
 def detect_source_encoding(path: Path):
-    # according to PEP 0263
-    # https://www.python.org/dev/peps/pep-0263/
-
     # read first two lines
     with open(path, 'rb') as file:
         lines = [file.readline(), file.readline()]
 
+    return _detect_encoding(lines)
+
+
+def _detect_encoding(lines: List[bytes]):
+    # according to PEP 0263
+    # https://www.python.org/dev/peps/pep-0263/
+
     # check if first line starts with a bom
     if lines[0].startswith(b'\xef\xbb\xbf'):
         return 'utf-8'
@@ -49,18 +54,42 @@ def read_source(path: Path):
     return ast_unparse(ast_parse(code))
 
 
-def write_source(path: Path, code: str):
+def decode_source(data: bytes, sanitize: bool = True):
+    # detect encoding from the first two lines
+    encoding = _detect_encoding(data.split(b'\n', 2)[0:2] + [b''])
+
+    # decode code with proper encoding (a bom is not part of the code)
+    code = data.decode('utf-8-sig' if encoding.lower() in ['utf-8', 'utf8'] else encoding)
 
     # remove all comments including encoding marker and shebang
     # NOTE: purposely done on read and write to cover all cases of pack/vendor/variant
-    code = ast_unparse(ast_parse(code))
+    if sanitize:
+        code = ast_unparse(ast_parse(code))
 
-    # prepend utf-8 encoding and final newline
-    code = '# coding: utf-8\n' + code
+    return code
+
+
+def format_source(code: str, sanitize: bool = True, layout: bool = False):
+
+    # remove all comments including encoding marker and shebang
+    # NOTE: purposely done on read and write to cover all cases of pack/vendor/variant
+    if sanitize:
+        code = ast_unparse(ast_parse(code))
+
+    # prepend utf-8 encoding (an empty first line is reused and required to keep the layout) and final newline
+    if code.startswith('\n'):
+        code = '# coding: utf-8' + code
+    elif not layout:
+        code = '# coding: utf-8\n' + code
 
     if not code.endswith('\n'):
         code += '\n'
 
+    return code
+
+
+def write_source(path: Path, code: str, sanitize: bool = True, layout: bool = False):
+
     # write code as utf-8
     with open(path, 'w', encoding='utf-8') as file:
-        file.write(code)
+        file.write(format_source(code, sanitize, layout))
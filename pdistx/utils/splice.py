@@ -0,0 +1,448 @@
+import ast
+import io
+import tokenize
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Set, Tuple
+
+from .source import ast_parse, ast_unparse
+
+# statement blocks, which are rewritten one by one, if only parts of them changed
+_BLOCKS = ['body', 'handlers', 'orelse', 'finalbody']
+
+# expressions, which never need to be parenthesized when replacing another expression
+_ATOMS = (ast.Name, ast.List, ast.Tuple, ast.Dict, ast.Set, ast.Call, ast.Attribute, ast.Subscript, ast.JoinedStr)
+
+
+def _is_simple(node) -> bool:
+    return not any(hasattr(node, name) for name in _BLOCKS + ['cases'])
+
+
+def _is_atom(node, parent) -> bool:
+    if isinstance(node, ast.Constant):
+        # numbers cannot be followed by an attribute (e.g. "1.real") and might be negative
+        if isinstance(node.value, (int, float, complex)) and not isinstance(node.value, bool):
+            return not isinstance(parent, ast.Attribute) and not isinstance(node.value, complex) and node.value >= 0
+        return True
+
+    return isinstance(node, _ATOMS)
+
+
+def _line_offsets(data: bytes) -> List[int]:
+    offsets = [0]
+    for line in data.split(b'\n'):
+        offsets.append(offsets[-1] + len(line) + 1)
+    return offsets
+
+
+def _strings(nodes) -> list:
+    # string literals including f-strings (nodes within f-strings are covered by the f-string itself)
+    return [
+        node for node in nodes
+        if isinstance(node, ast.JoinedStr) or (isinstance(node, ast.Constant) and isinstance(node.value, (str, bytes)))
+    ]
+
+
+def _walk(tree):
+    # faster than ast.walk, the order does not matter here
+    pending = [tree]
+
+    while pending:
+        node = pending.pop()
+        yield node
+
+        for name in node._fields:
+            value = getattr(node, name, None)
+            if isinstance(value, list):
+                pending += [item for item in value if isinstance(item, ast.AST)]
+            elif isinstance(value, ast.AST):
+                pending.append(value)
+
+
+def _strip(data: bytes, offsets: List[int], nodes) -> bytes:
+    # a hash sign outside of any string literal starts a comment, all other code stays at the very same position
+    spans = sorted((offsets[node.lineno - 1] + node.col_offset, offsets[node.end_lineno - 1] + node.end_col_offset)
+                   for node in _strings(nodes))
+    starts = [start for start, _ in spans]
+    ends = list(accumulate((end for _, end in spans), max))
+
+    lines = data.split(b'\n')
+
+    for row, line in enumerate(lines):
+        position = line.find(b'#')
+
+        while position >= 0:
+            i = bisect_right(starts, offsets[row] + position) - 1
+            if i < 0 or offsets[row] + position >= ends[i]:
+                lines[row] = line[:position].rstrip()
+                break
+            position = line.find(b'#', position + 1)
+
+    return b'\n'.join(lines)
+
+
+def _encode(code: str) -> bytes:
+    # columns of the ast are utf-8 byte offsets within lines
+    return code.replace('\r\n', '\n').replace('\r', '\n').encode('utf-8')
+
+
+def strip_comments(code: str) -> str:
+    # remove all comments, but keep the layout of the code as is (in contrast to sanitizing it)
+    data = _encode(code)
+    return _strip(data, _line_offsets(data), _walk(ast_parse(code))).decode('utf-8')
+
+
+def _string_lines(code: str) -> Set[int]:
+    # lines starting within a multi-line string must not be re-indented (only docstrings are unparsed that way)
+    rows: Set[int] = set()
+
+    if '"""' not in code and "'''" not in code:
+        return rows
+
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        if token.type == tokenize.STRING:
+            rows |= set(range(token.start[0] + 1, token.end[0] + 1))
+
+    return rows
+
+
+def snapshot(tree) -> Dict[int, tuple]:
+    # transformers modify nodes in place, so the fields of all nodes are recorded before transforming
+    # NOTE: the nodes are referenced as well, so their ids cannot be reused by new nodes
+    nodes: Dict[int, tuple] = {}
+    pending = [tree]
+
+    while pending:
+        node = pending.pop()
+        fields = {}
+
+        for name in node._fields:
+            value = getattr(node, name, None)
+            if isinstance(value, list):
+                value = list(value)
+                pending += [item for item in value if isinstance(item, ast.AST)]
+            elif isinstance(value, ast.AST):
+                pending.append(value)
+            fields[name] = value
+
+        nodes[id(node)] = (node, fields)
+
+    return nodes
+
+
+def _normalized(node):
+    # negative numbers are folded to constants, but parsed as negated constants
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+        value = node.operand.value
+        if isinstance(value, (int, float, complex)) and not isinstance(value, bool):
+            return ast.Constant(-value)
+
+    # complex numbers are parsed as a sum of a real and an imaginary number
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub)):
+        left, right = _normalized(node.left), _normalized(node.right)
+        if isinstance(left, ast.Constant) and isinstance(right, ast.Constant) and isinstance(right.value, complex):
+            if isinstance(left.value, (int, float)) and not isinstance(left.value, bool):
+                value = left.value + right.value if isinstance(node.op, ast.Add) else left.value - right.value
+                return ast.Constant(value)
+
+    # relative imports of a package itself might have an empty module name instead of none
+    if isinstance(node, ast.ImportFrom) and node.module == '':
+        return ast.ImportFrom(None, node.names, node.level)
+
+    return node
+
+
+def _equivalent(a, b) -> bool:
+    if isinstance(a, ast.AST) and isinstance(b, ast.AST):
+        a, b = _normalized(a), _normalized(b)
+        return type(a) is type(b) and all(
+            _equivalent(getattr(a, name, None), getattr(b, name, None))
+            for name in a._fields
+            if name not in ['ctx', 'type_comment'])
+
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_equivalent(x, y) for x, y in zip(a, b))
+
+    # NOTE: nan is not equal to itself
+    return type(a) is type(b) and (a == b or (a != a and b != b))  # pylint: disable=comparison-with-itself
+
+
+class _Splicer:
+
+    def __init__(self, code: str, snapshot_: Dict[int, tuple]):
+        # comments are removed first, which changes the offsets of lines, but not the columns within them
+        data = _encode(code)
+        self._data = _strip(data, _line_offsets(data), (node for node, _ in snapshot_.values()))
+        self._offsets = _line_offsets(self._data)
+
+        self._snapshot = snapshot_
+        self._unchanged_cache: Dict[int, bool] = {}
+
+        # lines starting within a multi-line string must not be re-indented
+        self._string_rows: Set[int] = set()
+        for node in _strings(node for node, _ in snapshot_.values()):
+            self._string_rows |= set(range(node.lineno + 1, node.end_lineno + 1))
+
+        self.output: List[str] = []
+        self.moved = False
+        self._join: Optional[Tuple[int, str]] = None
+
+    def _offset(self, lineno: int, col_offset: int) -> int:
+        # columns of the ast are utf-8 byte offsets
+        # NOTE: spans of nodes with type comments (e.g. "x = 1  # type: int") include the stripped comment
+        start = self._offsets[lineno - 1]
+        return start + min(col_offset, self._offsets[lineno] - start - 1)
+
+    def _start(self, node) -> int:
+        # decorators are part of the definition
+        lineno = min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])])
+        return self._offset(lineno, node.col_offset)
+
+    def _end(self, node) -> int:
+        return self._offset(node.end_lineno, node.end_col_offset)
+
+    def _row(self, offset: int) -> int:
+        return bisect_right(self._offsets, offset)
+
+    def _indentation(self, offset: int) -> str:
+        line = self._data[self._offsets[self._row(offset) - 1]:offset].decode('utf-8')
+        return line[:len(line) - len(line.lstrip())]
+
+    def _original(self, node, name):
+        return self._snapshot[id(node)][1][name]
+
+    def _known(self, node) -> bool:
+        entry = self._snapshot.get(id(node))
+        return entry is not None and entry[0] is node
+
+    def _unchanged(self, node) -> bool:
+        key = id(node)
+
+        if key not in self._unchanged_cache:
+            self._unchanged_cache[key] = self._known(node) and all(
+                self._same(getattr(node, name, None), old) for name, old in self._snapshot[key][1].items())
+
+        return self._unchanged_cache[key]
+
+    def _same(self, new, old) -> bool:
+        if isinstance(old, list):
+            return isinstance(new, list) and len(new) == len(old) and all(self._same(n, o) for n, o in zip(new, old))
+
+        if isinstance(old, ast.AST):
+            return new is old and self._unchanged(new)
+
+        # e.g. 1 == True, but both are different constants
+        return type(new) is type(old) and new == old
+
+    def _collect(self, node, names: List[str], edits: list) -> bool:
+        # collect replacements of changed expressions within the given fields of a node
+        collected = []
+
+        for name in names:
+            new, old = getattr(node, name, None), self._original(node, name)
+
+            news = new if isinstance(new, list) else [new]
+            olds = old if isinstance(old, list) else [old]
+
+            if len(news) != len(olds):
+                return False
+
+            for n, o in zip(news, olds):
+                if not isinstance(n, ast.AST) and not isinstance(o, ast.AST):
+                    if type(n) is not type(o) or n != o:
+                        return False
+                elif n is o and self._unchanged(n):
+                    continue
+                elif n is o and not isinstance(n, (ast.stmt, ast.JoinedStr)) and self._collect(n, n._fields, collected):
+                    continue
+                elif not self._replace(o, n, node, collected):
+                    return False
+
+        edits += collected
+        return True
+
+    def _replace(self, old, new, parent, edits: list) -> bool:
+        # only expressions being read can be replaced by other expressions
+        if not isinstance(old, ast.expr) or not isinstance(new, ast.expr) or isinstance(old, (ast.Slice, ast.Starred)):
+            return False
+
+        if isinstance(getattr(old, 'ctx', None), (ast.Store, ast.Del)):
+            return False
+
+        code = ast_unparse(new)
+
+        if not _is_atom(new, parent):
+            code = f'({code})'
+
+        edits.append((self._start(old), self._end(old), code))
+        return True
+
+    def _lines(self, start: int, end: int, edits: list) -> List[Tuple[str, bool]]:
+        # source lines of the given span including replacements, along with a flag for lines within strings
+        lines = [['', False]]
+
+        def _append(text: str, row: int):
+            parts = text.split('\n')
+            lines[-1][0] += parts[0]
+            for i, part in enumerate(parts[1:], 1):
+                lines.append([part, row + i in self._string_rows])
+
+        position = start
+        for edit_start, edit_end, code in sorted(edits):
+            _append(self._data[position:edit_start].decode('utf-8'), self._row(position))
+            lines[-1][0] += code
+            position = edit_end
+
+        _append(self._data[position:end].decode('utf-8'), self._row(position))
+
+        return [tuple(line) for line in lines]
+
+    def _place(self, lineno: Optional[int], lines: List[Tuple[str, bool]], indent: str, original: Optional[str],
+               simple: bool):
+        # source code moved to another indentation needs to be verified afterwards
+        if original is not None and original != indent and len(lines) > 1:
+            self.moved = True
+
+        original = original or ''
+
+        # re-indent following lines, which are not part of a multi-line string
+        texts = [indent + lines[0][0]]
+
+        for text, verbatim in lines[1:]:
+            if verbatim:
+                texts.append(text)
+            elif text.startswith(original):
+                texts.append(indent + text[len(original):])
+            else:
+                # continuation lines within brackets
+                texts.append(indent + text.lstrip() if text.strip() else '')
+
+        # simple statements originally sharing a line are joined again
+        if simple and self._join is not None and self._join == (lineno, indent) and len(texts) == 1:
+            self.output[-1] += '; ' + texts[0].lstrip()
+            return
+
+        # pad with empty lines to keep the original line numbers
+        if lineno is not None:
+            while len(self.output) < lineno - 1:
+                self.output.append('')
+
+        self.output += texts
+
+    def _unparsed(self, node) -> List[Tuple[str, bool]]:
+        code = ast_unparse(node)
+        rows = _string_lines(code)
+        return [(text, i + 1 in rows) for i, text in enumerate(code.split('\n'))]
+
+    def statements(self, nodes: list, indent: str):
+        for node in nodes:
+            self.statement(node, indent)
+
+    def statement(self, node, indent: str, elif_: bool = False):
+        # new statements are placed right after the previous ones (locations of new nodes are guessed only)
+        lineno: Optional[int] = None
+        simple = _is_simple(node)
+
+        if self._known(node) and not isinstance(node, ast.Module):
+            start, end = self._start(node), self._end(node)
+            lineno = self._row(start)
+            original = self._indentation(start)
+
+            # an "elif" not following its original "if" anymore becomes an "if"
+            if not elif_ and isinstance(node, ast.If) and self._data[start:start + 4] == b'elif':
+                start += 2
+
+            # unchanged statements are copied, changed simple statements get their expressions replaced
+            edits: list = []
+            if self._unchanged(node) or (simple and self._collect(node, node._fields, edits)):
+                self._place(lineno, self._lines(start, end, edits), indent, original, simple)
+                self._join = (node.end_lineno, indent) if simple else None
+                return
+
+            # changed compound statements keep their header and get their blocks rewritten
+            if not simple and self._compound(node, indent, start, original):
+                self._join = None
+                return
+
+        # an "elif" not being kept has to become a nested "if"
+        if elif_:
+            self._place(None, [('else:', False)], indent, None, False)
+            indent += '    '
+
+        self._place(lineno, self._unparsed(node), indent, None, simple)
+
+        # new statements following each other are joined (e.g. an import replaced by several ones)
+        self._join = (node.end_lineno if lineno is not None else None, indent) if simple else None
+
+    def _compound(self, node, indent: str, start: int, original: str) -> bool:
+        blocks = [name for name in _BLOCKS if hasattr(node, name)]
+        header = [name for name in node._fields if name not in blocks]
+
+        # the header ends with the first statement of the original body (e.g. match statements are not supported)
+        body = self._original(node, blocks[0]) if blocks else None
+        if not body:
+            return False
+
+        edits: list = []
+        if not self._collect(node, header, edits):
+            return False
+
+        end = start + len(self._data[start:self._start(body[0])].rstrip())
+        self._place(self._row(start), self._lines(start, end, edits), indent, original, False)
+
+        # indentation of the blocks follows the original one
+        inner = self._indentation(self._start(body[0]))
+        if self._row(self._start(body[0])) != self._row(end) and inner.startswith(original) and inner != original:
+            inner = indent + inner[len(original):]
+        else:
+            inner = indent + '    '
+
+        self._join = None
+        self.statements(getattr(node, blocks[0]), inner)
+
+        for name in blocks[1:]:
+            nodes = getattr(node, name)
+
+            if not nodes:
+                continue
+
+            if name == 'handlers':
+                for handler in nodes:
+                    self._join = None
+                    self.statement(handler, indent)
+                continue
+
+            # keep "elif" chains
+            previous = self._original(node, name)
+            if isinstance(node, ast.If) and len(nodes) == 1 and previous and nodes[0] is previous[0] and \
+                    self._data[self._start(nodes[0]):self._start(nodes[0]) + 4] == b'elif':
+                self._join = None
+                self.statement(nodes[0], indent, elif_=True)
+                continue
+
+            self._place(None, [('finally:' if name == 'finalbody' else 'else:', False)], indent, None, False)
+            self._join = None
+            self.statements(nodes, inner)
+
+        return True
+
+
+def splice_source(code: str, tree, snapshot_: Dict[int, tuple]) -> str:
+    # splice changed statements and expressions of the transformed tree into the code the tree has been parsed from,
+    # unchanged code is copied as is (without comments), so line numbers are kept
+    splicer = _Splicer(code, snapshot_)
+    splicer.statements(tree.body, '')
+
+    result = '\n'.join(splicer.output).rstrip() + '\n'
+
+    if not splicer.moved:
+        return result
+
+    # fall back to unparsing the whole tree, if moved code could not be re-indented (e.g. due to unusual indentation)
+    try:
+        if _equivalent(ast_parse(result), tree):
+            return result
+    except SyntaxError:
+        pass
+
+    return ast_unparse(tree)
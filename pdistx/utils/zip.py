@@ -1,24 +1,132 @@
+import struct
+from contextlib import ExitStack
 from os import walk
 from os.path import join, relpath
 from pathlib import Path
-from zipfile import ZIP_DEFLATED, ZipFile
+from typing import List, Optional, Tuple
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo, is_zipfile
+from zlib import crc32
 
+# fixed timestamp of all members, so the same files result in the same zip file
+_DATE_TIME = (1980, 1, 1, 0, 0, 0)
 
-def zipit(source_path: Path, zip_path: Path, base_path: Path):
+# local file header, see https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT (4.3.7)
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_LOCAL_SIGNATURE = b'PK\003\004'
+
+
+def _read_raw(handle: ZipFile, info: ZipInfo) -> Optional[bytes]:
+    # compressed data of a member, as stored in the zip file
+    handle.fp.seek(info.header_offset)
+    header = handle.fp.read(_LOCAL_HEADER.size)
+
+    if len(header) != _LOCAL_HEADER.size:
+        return None
+
+    fields = _LOCAL_HEADER.unpack(header)
+    if fields[0] != _LOCAL_SIGNATURE:
+        return None
+
+    handle.fp.seek(info.header_offset + _LOCAL_HEADER.size + fields[9] + fields[10])
+    data = handle.fp.read(info.compress_size)
+
+    return data if len(data) == info.compress_size else None
+
+
+def _write_raw(handle: ZipFile, info: ZipInfo, data: bytes):
+    # NOTE: zipfile does not support writing compressed data as is, so the member gets appended the same way as by
+    # ZipFile.writestr (without a data descriptor, as the sizes are known upfront)
+    info.header_offset = handle.fp.tell()
+    handle.fp.write(info.FileHeader())
+    handle.fp.write(data)
+    handle.start_dir = handle.fp.tell()
+    handle.filelist.append(info)
+    handle.NameToInfo[info.filename] = info
+
+
+def write_member(handle: ZipFile, name: str, data: bytes, previous: Optional[ZipFile]) -> bool:
+    # members, which did not change compared to the previous zip file (same size and crc), are copied without
+    # recompressing them, otherwise they get deflated
+    info = ZipInfo(name, _DATE_TIME)
+    info.compress_type = ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+
+    if previous is not None and name in previous.NameToInfo:
+        old = previous.getinfo(name)
+
+        # encrypted members or ones using data descriptors get recompressed
+        if old.compress_type == ZIP_DEFLATED and old.flag_bits & 0x9 == 0 and old.file_size == len(data) and \
+                old.CRC == crc32(data):
+            raw = _read_raw(previous, old)
+
+            if raw is not None:
+                info.CRC = old.CRC
+                info.file_size = old.file_size
+                info.compress_size = old.compress_size
+                _write_raw(handle, info, raw)
+                return True
+
+    handle.writestr(info, data)
+    return False
+
+
+def write_members(handle: ZipFile, members: List[Tuple[str, bytes]], previous: Optional[ZipFile]) -> int:
+    # members are written in sorted order, returns the number of members copied from the previous zip file
+    return sum(write_member(handle, name, data, previous) for name, data in sorted(members, key=lambda i: i[0]))
+
+
+class ZipWriter:
+    # writes members into a zip file in the order given, unchanged members of the previous zip file are copied without
+    # recompressing them
+
+    def __init__(self, zip_path: Path, previous: Optional[Path] = None):
+        self.reused = 0
+        self._stack = ExitStack()
+        self._previous: Optional[ZipFile] = None
+
+        try:
+            if previous is not None and is_zipfile(previous):
+                self._previous = self._stack.enter_context(ZipFile(previous))
+            self._handle = self._stack.enter_context(ZipFile(zip_path, 'w', ZIP_DEFLATED))
+        except BaseException:
+            self._stack.close()
+            raise
+
+    def write(self, name: str, data: bytes):
+        self.reused += write_member(self._handle, name, data, self._previous)
+
+    def close(self):
+        self._stack.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def zipit(source_path: Path, zip_path: Path, base_path: Path, previous: Optional[Path] = None) -> int:
 
     # check pre-conditions
     assert not base_path.is_absolute(), 'zip base path is expected to be relative'
 
-    # create zip file
-    with ZipFile(zip_path, 'w', ZIP_DEFLATED) as handle:
+    # collect files
+    files: List[Tuple[str, str]] = []
+
+    # zip directory
+    if source_path.is_dir():
+        for root, _, names in walk(source_path):
+            for name in names:
+                path = join(root, name)
+                files.append((Path(base_path, relpath(path, source_path)).as_posix(), path))
+
+    # zip individual file
+    else:
+        files.append((base_path.as_posix(), str(source_path)))
 
-        # zip directory
-        if source_path.is_dir():
-            for root, _, files in walk(source_path):
-                for file in files:
-                    path = join(root, file)
-                    handle.write(path, join(base_path, relpath(path, source_path)))
+    # create zip file, returns the number of members copied from the previous zip file
+    with ZipWriter(zip_path, previous) as writer:
+        for name, path in sorted(files):
+            writer.write(name, Path(path).read_bytes())
 
-        # zip individual file
-        else:
-            handle.write(str(source_path), str(base_path))
+    return writer.reused
@@ -6,13 +6,13 @@ if '' in sys.path:
     sys.path.remove('')
 
 import argparse
-from glob import glob
-from os.path import join
 from pathlib import Path
 from traceback import print_tb
 from typing import List
 
+from pdistx.utils.archive import glob_source
 from ppack.process import perform
+from pvariant.target import target_definitions
 
 
 def main(argv: List[str] = sys.argv[1:]):
@@ -50,9 +50,58 @@ def main(argv: List[str] = sys.argv[1:]):
         help='zip file path (target becomes relative path within zip file)',
     )
 
+    parser.add_argument(
+        '-l',
+        dest='layout',
+        action='store_true',
+        help='keep the layout (line numbers) of python files, only changed code gets rewritten and comments removed',
+    )
+
+    parser.add_argument(
+        '-p',
+        dest='profile',
+        metavar='profile',
+        action='append',
+        default=[],
+        help='import trace (written by a packed file run with PPACK_TRACE=<file> or by python -X importtime), traced '
+        'modules are stored first, all others compressed',
+    )
+
+    parser.add_argument(
+        '-V',
+        dest='target_python',
+        metavar='version',
+        default=None,
+        help='fold checks of sys.version_info for the given target python version, e.g. -V 3.10',
+    )
+
+    parser.add_argument(
+        '-P',
+        dest='target_platform',
+        metavar='platform',
+        default=None,
+        help='fold checks of sys.platform and os.name for the given target platform (linux, win32 or darwin)',
+    )
+
+    parser.add_argument(
+        '-B',
+        dest='target_blender',
+        metavar='version',
+        default=None,
+        help='fold checks of bpy.app.version for the given target blender version, e.g. -B 4.1',
+    )
+
+    parser.add_argument(
+        '-g',
+        dest='git',
+        action='store_true',
+        help='list the files of the source folder via git (tracked and untracked files, except for ignored ones)',
+    )
+
     parser.add_argument(
         'source',
-        help='source package path',
+        help='source package path (folder or archive, a folder within an archive can be appended, e.g. '
+        'addon.zip/addon)',
     )
 
     parser.add_argument(
@@ -66,10 +115,14 @@ def main(argv: List[str] = sys.argv[1:]):
         perform(
             Path(args.source),
             Path(args.target),
-            [Path(path) for pattern in args.filter for path in glob(join(args.source, pattern), recursive=True)],
+            glob_source(Path(args.source), args.filter),
             args.resources,
             args.main,
             Path(args.zip) if args.zip else None,
+            args.layout,
+            [Path(path) for path in args.profile],
+            target_definitions(args.target_python, args.target_platform, args.target_blender),
+            args.git,
         )
     except Exception as ex:
         print(f'ERROR: {ex}')
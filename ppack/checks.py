@@ -1,9 +1,10 @@
 import ast
 
+from pdistx.utils.fused import FusedRule
 from pdistx.utils.source import ast_parse
 
 
-class _HasAbsoluteImportOfModuleCheck(ast.NodeVisitor):
+class HasAbsoluteImportOfModuleCheck(FusedRule, ast.NodeVisitor):
 
     def __init__(self, module):
         self._module = module
@@ -28,12 +29,12 @@ class _HasAbsoluteImportOfModuleCheck(ast.NodeVisitor):
 
 
 def has_absolute_import_of_module(source, module):
-    visitor = _HasAbsoluteImportOfModuleCheck(module)
+    visitor = HasAbsoluteImportOfModuleCheck(module)
     visitor.visit(ast_parse(source))
     return visitor.has_absolute_import_of_module
 
 
-class _HasRelativeImportCheck(ast.NodeVisitor):
+class HasRelativeImportCheck(FusedRule, ast.NodeVisitor):
 
     def __init__(self):
         self.has_relative_import = False
@@ -48,6 +49,6 @@ class _HasRelativeImportCheck(ast.NodeVisitor):
 
 
 def has_relative_import(source):
-    visitor = _HasRelativeImportCheck()
+    visitor = HasRelativeImportCheck()
     visitor.visit(ast_parse(source))
     return visitor.has_relative_import
@@ -1,16 +1,22 @@
+import io
+import zlib
+from binascii import b2a_base64
 from collections import OrderedDict
-from os import makedirs, walk
-from pathlib import Path
-from shutil import copy
-from tempfile import mkdtemp
-from typing import Dict, List
-
-from pdistx.utils.path import fnmatch_any, rmpath
-from pdistx.utils.source import read_source, write_source
+from os import walk
+from pathlib import Path, PurePosixPath
+from tempfile import TemporaryFile, mkdtemp
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+
+from pdistx.utils.archive import SourceArchive, is_source_archive
+from pdistx.utils.git import git_source_files
+from pdistx.utils.member import FileMember, copy_member
+from pdistx.utils.path import fnmatch_any, rmpath, rmpath_background, staging_folder, swap_paths
+from pdistx.utils.pipeline import Writer, prefetch
+from pdistx.utils.source import decode_source, read_source
 from pdistx.utils.zip import zipit
 
-from .checks import has_absolute_import_of_module, has_relative_import
-from .transform import file_to_resource_transform
+from .profile import read_profile
+from .transform import pack_transform_code
 
 
 def perform(
@@ -20,33 +26,45 @@ def perform(
     resources: bool,
     main: bool,
     zip_: Path,
+    layout: bool,
+    profiles: List[Path],
+    definitions: dict,
+    git: bool,
 ):
     # ensure pre-conditions
-    assert source.is_dir(), 'source is expected to be a directory'
+    assert source.is_dir() or is_source_archive(source), 'source is expected to be a directory or an archive'
 
     if zip_:
         assert not target.is_absolute(), 'target path is expected to be relative'
 
     # list of temporary files and folders
     tmps: List[Path] = []
+    staging = None
+
+    # archives are read without extracting them
+    archive = None
 
     # temporary paths get cleaned automatically at the end of this block
     try:
+        if not source.is_dir():
+            archive = SourceArchive(source, True)
+
+        root = archive.name if archive else source.name
 
-        # purging target or zip
+        # outputs are written to a staging folder and moved into place at the end (instead of purging them first)
         if zip_:
-            print(f'Purging {zip_}...')
-            rmpath(zip_)
+            staging = staging_folder(zip_.parent)
+            outputs = [zip_]
         else:
-            print(f'Purging {target}...')
-            rmpath(target)
+            staging = staging_folder(target.parent)
+            outputs = [target] + ([target.parent.joinpath(target.stem + '_resources')] if resources else [])
 
         # determine base directory and relative target path
         if zip_:
             intermediate = Path(mkdtemp())
             tmps.append(intermediate)
         else:
-            intermediate = target.parent
+            intermediate = staging
             target = Path(target.name)
 
         # prepare output paths
@@ -54,126 +72,257 @@ def perform(
 
         if resources:
             resources_root = intermediate.joinpath(target.parent, target.stem + '_resources')
-            print(f'Purging {resources_root}...')
-            rmpath(resources_root)
 
-        # process all files
-        modules: Dict[str, (str, bool)] = {}
+        # collect all files (from the git index, which is faster than walking all folders)
+        paths: List[PurePosixPath] = []
 
-        for source_folder, folders, files in walk(source, followlinks=True):
+        if archive:
+            paths = archive.files(filters)
 
-            # prepare folders
-            source_folder = Path(source_folder)
-            package_folder = source_folder.relative_to(source)
+        elif git:
+            paths = git_source_files(source, filters)
 
-            if resources:
-                resource_folder = resources_root.joinpath(package_folder)
+        else:
+            for source_folder, folders, files in walk(source, followlinks=True):
 
-            # filter entries to be ignored (folders need to be modified in-place to take effect for os.walk)
-            def _folder_filter(folder: Path):
-                return not fnmatch_any(folder.name, ['__pycache__', '.git']) and folder not in filters
+                # prepare folders
+                source_folder = Path(source_folder)
+                package_folder = source_folder.relative_to(source)
 
-            def _file_filter(file: Path):
-                return not fnmatch_any(file.name, ['*.pyc']) and file not in filters
+                # filter entries to be ignored (folders need to be modified in-place to take effect for os.walk)
+                def _folder_filter(folder: Path):
+                    return not fnmatch_any(folder.name, ['__pycache__', '.git']) and folder not in filters
 
-            folders[:] = [folder for folder in folders if _folder_filter(source_folder.joinpath(folder))]
-            files = [file for file in files if _file_filter(source_folder.joinpath(file))]
+                def _file_filter(file: Path):
+                    return not fnmatch_any(file.name, ['*.pyc']) and file not in filters
 
-            # read or copy file
-            for file in files:
-                source_file = source_folder.joinpath(file)
+                folders[:] = [folder for folder in folders if _folder_filter(source_folder.joinpath(folder))]
+                files = [file for file in files if _file_filter(source_folder.joinpath(file))]
 
-                # read module codes
-                if file.endswith('.py'):
-                    # determine module name
-                    is_package = file == '__init__.py'
+                paths += [PurePosixPath(*package_folder.parts, file) for file in files]
 
-                    name = list(package_folder.parts)
-                    name += [file.split('.')[0]] if not is_package else []
+        # modules imported on startup (according to the traces) get stored first, all others compressed
+        startup = None
+        if profiles:
+            startup = []
+            for profile in profiles:
+                print(f'Reading profile {profile}...')
+                names = read_profile(profile.read_text(encoding='utf-8'), [root, target.stem])
+                startup += [name for name in names if name not in startup]
 
-                    name = '.'.join(name)
+        # process all files, modules are read ahead and resources copied by threads
+        # NOTE: module codes are spooled to a temporary file, so only a single module is held in memory at a time
+        modules: Dict[str, bool] = {}
+        offsets: Dict[str, Tuple[int, int]] = {}
 
-                    # load module code
-                    code = read_source(source_file)
+        # files of archives are read as members
+        def _member(path: PurePosixPath):
+            return archive.member(path) if archive else FileMember(path, source.joinpath(*path.parts))
 
-                    if resources:
-                        code = file_to_resource_transform(code)
+        def _read(path: PurePosixPath) -> Optional[bytes]:
+            return _member(path).read() if path.suffix == '.py' else None
 
-                    # check code for invalid imports
-                    if name == '__main__' and has_relative_import(code):
-                        raise ValueError(f'{source_file} contains a relative import, which is forbidden')
+        with TemporaryFile() as spool:
+            with Writer() as writer:
+                for path, data in prefetch(paths, _read):
 
-                    if name != '__main__' and has_absolute_import_of_module(code, source.name):
-                        raise ValueError(
-                            f'{source_file} contains an absolute import of {source.name}, which is forbidden')
+                    # read module codes
+                    if path.suffix == '.py':
+                        name, code, is_package = pack_module(path, data, root, resources, layout, definitions)
 
-                    # assign to module dictionay
-                    modules[name] = (code, is_package)
+                        # assign to module dictionay
+                        data = code.encode('utf-8')
+                        offsets[name] = (spool.tell(), len(data))
+                        spool.write(data)
+                        modules[name] = is_package
 
-                # copy resource files
-                else:
-                    if resources:
-                        makedirs(resource_folder, exist_ok=True)
-                        copy(source_file, resource_folder.joinpath(file), follow_symlinks=True)
+                    # copy resource files
+                    elif resources:
+                        writer.submit(copy_member, _member(path), resources_root.joinpath(*path.parts))
 
-        if len(modules) == 0:
-            raise ValueError('no modules found')
+            def _module_code(name: str) -> str:
+                offset, size = offsets[name]
+                spool.seek(offset)
+                return spool.read(size).decode('utf-8')
 
-        # create all missing intermediate packages
-        for name in list(modules.keys()):
-            parts = name.split('.')
-            for i in range(0, len(parts)):
-                package = '.'.join(parts[0:i])
-                if package not in modules:
-                    modules[package] = ('', True)
+            print(f'Writing {packed}...')
+            with open(packed, 'w', encoding='utf-8') as handle:
+                write_pack(handle, modules, _module_code, root, main, startup)
 
-        # ensure stable ordering
-        modules = OrderedDict(sorted(modules.items(), key=lambda i: i[0]))
+        # zip intermediate path to zip path
+        if zip_:
+            print(f'Packing {zip_}...')
+            # unchanged members of the previous zip file are copied without recompressing them
+            reused = zipit(intermediate, staging.joinpath(zip_.name), Path(''), zip_)
+            if reused:
+                print(f'Reused {reused} unchanged members of {zip_}')
 
-        # determine bootstrap module
-        if main:
-            mode = 'main'
-            bootstrap, _ = modules.get('__main__', (None, None))
-        else:
-            mode = 'package'
-            bootstrap, _ = modules.get('', (None, None))
+        # replace previous outputs
+        for path in outputs:
+            print(f'Replacing {path}...')
+        swap_paths(staging, outputs)
 
-        if bootstrap is None:
-            raise RuntimeError('bootstrap module is missing')
+    finally:
+        # close archive
+        if archive:
+            archive.close()
 
-        # create packed file
-        code = read_source(Path(__file__).parent.joinpath('template.py')).split('\n')
+        # clean up temporary folders
+        for path in tmps:
+            print(f'Purging {path}...')
+            rmpath(path)
 
-        injected_mode = 0
-        injected_name = 0
-        injected_modules = 0
+        # the staging folder contains the previous outputs or partial ones
+        if staging:
+            rmpath_background(staging)
 
-        for i in range(len(code)):
-            if '    pack_mode = \'\'' == code[i]:
-                code[i] = '    pack_mode = ' + repr(mode)
-                injected_mode += 1
-            elif '    pack_name = \'\'' == code[i]:
-                code[i] = '    pack_name = ' + repr(source.name)
-                injected_name += 1
-            elif '    pack_modules = OrderedDict()' == code[i]:
-                code[i] = '    pack_modules = ' + repr(modules)
-                injected_modules += 1
 
-        if injected_mode != 1 or injected_name != 1 or injected_modules != 1:
-            raise RuntimeError('inconsistent code template')
+def pack_module(
+    path: PurePosixPath,
+    data: bytes,
+    package: str,
+    resources: bool,
+    layout: bool,
+    definitions: Optional[dict] = None,
+) -> Tuple[str, str, bool]:
+    # determine module name
+    is_package = path.name == '__init__.py'
 
-        code = '\n'.join(code) + '\n\n' + bootstrap
+    name = list(path.parts[:-1])
+    name += [path.name.split('.')[0]] if not is_package else []
 
-        print(f'Writing {packed}...')
-        write_source(packed, code)
+    name = '.'.join(name)
 
-        # zip intermediate path to zip path
-        if zip_:
-            print(f'Packing {zip_}...')
-            zipit(intermediate, zip_, Path(''))
+    # load module code (comments are removed on unparsing or splicing)
+    code = decode_source(data, sanitize=False)
 
-    finally:
-        # clean up temporary folders
-        for path in tmps:
-            print(f'Purging {path}...')
-            rmpath(path)
+    # transform and check code in a single pass
+    code, absolute_import, relative_import = pack_transform_code(code, package, resources, layout, definitions)
+
+    # check code for invalid imports
+    if name == '__main__' and relative_import:
+        raise ValueError(f'{package}/{path} contains a relative import, which is forbidden')
+
+    if name != '__main__' and absolute_import:
+        raise ValueError(f'{package}/{path} contains an absolute import of {package}, which is forbidden')
+
+    return name, code, is_package
+
+
+def _pack_layout(
+    modules: Dict[str, bool],
+    main: bool,
+    startup: Optional[List[str]],
+) -> Tuple[str, str, List[Tuple[str, bool, bool]]]:
+    # mode, bootstrap module and all modules (name, is package, compressed) in the order of the packed file
+    if len(modules) == 0:
+        raise ValueError('no modules found')
+
+    # create all missing intermediate packages
+    modules = dict(modules)
+    for name in list(modules.keys()):
+        parts = name.split('.')
+        for i in range(0, len(parts)):
+            parent = '.'.join(parts[0:i])
+            if parent not in modules:
+                modules[parent] = True
+
+    # ensure stable ordering
+    names = sorted(modules.keys())
+
+    # determine bootstrap module
+    if main:
+        mode = 'main'
+        bootstrap = '__main__'
+    else:
+        mode = 'package'
+        bootstrap = ''
+
+    if bootstrap not in modules:
+        raise RuntimeError('bootstrap module is missing')
+
+    # profile guided layout, startup modules come first (in import order), cold ones are compressed and only get
+    # decompressed when being imported
+    if startup is None:
+        return mode, bootstrap, [(name, modules[name], False) for name in names]
+
+    # the bootstrap module is run in any case
+    hot = list(OrderedDict.fromkeys([bootstrap] + [name for name in startup if name in modules]))
+    cold = [name for name in names if name not in hot]
+
+    return mode, bootstrap, [(name, modules[name], name not in hot) for name in hot + cold]
+
+
+def _pack_template(mode: str, package: str) -> Tuple[str, str]:
+    # code of the template before and after the modules
+    code = read_source(Path(__file__).parent.joinpath('template.py')).split('\n')
+
+    injected_mode = 0
+    injected_name = 0
+    injected_modules = []
+
+    for i in range(len(code)):
+        if '    pack_mode = \'\'' == code[i]:
+            code[i] = '    pack_mode = ' + repr(mode)
+            injected_mode += 1
+        elif '    pack_name = \'\'' == code[i]:
+            code[i] = '    pack_name = ' + repr(package)
+            injected_name += 1
+        elif '    pack_modules = OrderedDict()' == code[i]:
+            injected_modules.append(i)
+
+    if injected_mode != 1 or injected_name != 1 or len(injected_modules) != 1:
+        raise RuntimeError('inconsistent code template')
+
+    i = injected_modules[0]
+    return '\n'.join(code[0:i]) + '\n    pack_modules = OrderedDict([', '])\n' + '\n'.join(code[i + 1:])
+
+
+def write_pack(
+    handle: TextIO,
+    modules: Dict[str, bool],
+    read: Callable[[str], str],
+    package: str,
+    main: bool,
+    startup: Optional[List[str]] = None,
+):
+    # the packed file is written module by module, modules are read on demand (given their name) and are expected to
+    # be sanitized already, so only a single module is held in memory at a time
+    mode, bootstrap, layout = _pack_layout(modules, main, startup)
+    head, tail = _pack_template(mode, package)
+
+    handle.write('# coding: utf-8\n')
+    handle.write(head)
+
+    for i, (name, is_package, compressed) in enumerate(layout):
+        code = read(name) if name in modules else ''
+        code = _compress(code) if compressed else code
+        handle.write((', ' if i > 0 else '') + repr((name, (code, is_package))))
+
+    # bootstrap code is run by the packed file itself
+    code = read(bootstrap) if bootstrap in modules else ''
+
+    handle.write(tail)
+    handle.write('\n')
+    handle.write(code)
+    handle.write('' if ('\n' + code).endswith('\n') else '\n')
+
+
+def pack_code(
+    modules: Dict[str, Tuple[str, bool]],
+    package: str,
+    main: bool,
+    startup: Optional[List[str]] = None,
+) -> str:
+    # code of the packed file (including the encoding)
+    handle = io.StringIO()
+    packages = {name: is_package for name, (_, is_package) in modules.items()}
+    write_pack(handle, packages, lambda name: modules[name][0], package, main, startup)
+    return handle.getvalue()
+
+
+def _compress(code: str):
+    # empty modules are not worth it
+    if not code:
+        return code
+    return b2a_base64(zlib.compress(code.encode('utf-8'), 9), newline=False)
@@ -0,0 +1,37 @@
+import re
+from typing import List
+
+# line of python -X importtime, e.g. "import time:       520 |       1040 |   package.module"
+_IMPORTTIME = re.compile(r'^import time:\s*\d+\s*\|\s*\d+\s*\|\s*(\S+)\s*$')
+
+
+def read_profile(text: str, roots: List[str]) -> List[str]:
+    # module names (relative to the packed package) in order of the trace, traces are either written by packed files
+    # (one module name per line) or by python -X importtime, modules outside of the packed package are ignored
+    names: List[str] = []
+
+    for line in text.splitlines():
+        line = line.strip()
+
+        if line.startswith('import time:'):
+            match = _IMPORTTIME.match(line)
+            if match is None:
+                continue
+            line = match.group(1)
+
+        if not line or line.startswith('#'):
+            continue
+
+        for root in roots:
+            if line == root:
+                name = ''
+            elif line.startswith(root + '.'):
+                name = line[len(root) + 1:]
+            else:
+                continue
+
+            if name not in names:
+                names.append(name)
+            break
+
+    return names
@@ -5,6 +5,8 @@ def __pack_loader__():
     import imp
     import os.path
     import sys
+    import zlib
+    from binascii import a2b_base64
     from collections import OrderedDict
 
     # pack data will be injected here
@@ -24,6 +26,27 @@ def __pack_loader__():
         globals()['__path__'] = []
         globals()['__package__'] = __name__
 
+    # record imported modules into a trace file, which can be used as profile for packing
+    trace_path = os.environ.get('PPACK_TRACE')
+
+    # sources of modules are released after loading them, unless they are kept for tools calling get_source later
+    keep_sources = bool(os.environ.get('PPACK_KEEP_SOURCES'))
+
+    def set_keep_sources(keep=True):
+        nonlocal keep_sources
+        keep_sources = keep
+
+    # util: memory held by the sources of all modules, which have not been released
+    def get_payload_size():
+        return sum(sys.getsizeof(source) for source, _ in pack_modules.values() if source is not None)
+
+    globals()['__pack_keep_sources__'] = set_keep_sources
+    globals()['__pack_payload_size__'] = get_payload_size
+
+    # the package module is run by this file itself, so its source is not needed at all
+    if pack_mode == 'package' and not keep_sources:
+        pack_modules[''] = (None, pack_modules[''][1])
+
     # set resource path
     resource_root = os.path.join(
         os.path.dirname(__file__),
@@ -99,16 +122,30 @@ def __pack_loader__():
         def get_source(self, fullname):
             name = unqualify_name(fullname)
             assert_name(name)
-            return pack_modules[name][0]
+            source = pack_modules[name][0]
+
+            # cold modules are compressed, released ones have no source anymore
+            if isinstance(source, bytes):
+                source = zlib.decompress(a2b_base64(source)).decode('utf-8')
+
+            return source
 
         def get_code(self, fullname):
+            source = self.get_source(fullname)
+            if source is None:
+                raise ImportError('source of {} has been released, see __pack_keep_sources__'.format(fullname))
+
             return compile(
-                self.get_source(fullname),
+                source,
                 get_dunder_file(fullname),
                 'exec',
             )
 
         def load_module(self, fullname):
+            if trace_path:
+                with open(trace_path, 'a', encoding='utf-8') as trace:
+                    trace.write(fullname + '\n')
+
             code = self.get_code(fullname)
             module = sys.modules.setdefault(fullname, imp.new_module(fullname))
             module.__file__ = get_dunder_file(fullname)
@@ -120,6 +157,12 @@ def __pack_loader__():
             else:
                 module.__package__ = fullname.rpartition('.')[0]
             exec(code, module.__dict__)
+
+            # release the source after loading the module successfully
+            if not keep_sources:
+                name = unqualify_name(fullname)
+                pack_modules[name] = (None, pack_modules[name][1])
+
             return module
 
     sys.meta_path.insert(0, PackImporter())
@@ -1,9 +1,16 @@
 import ast
+from typing import Optional
 
+from pdistx.utils.fused import FusedRule, fused_transform
 from pdistx.utils.source import ast_parse, ast_unparse
+from pdistx.utils.splice import snapshot, splice_source
+from pvariant.fold import count_bindings
+from pvariant.transform import NameCount, VariantTransform, remove_unused_imports
 
+from .checks import HasAbsoluteImportOfModuleCheck, HasRelativeImportCheck
 
-class FileToResourceTransform(ast.NodeTransformer):
+
+class FileToResourceTransform(FusedRule, ast.NodeTransformer):
 
     # pylint: disable=pylint(invalid-name)
     def visit_Name(self, node: ast.Name):
@@ -15,8 +22,39 @@ class FileToResourceTransform(ast.NodeTransformer):
         return node
 
 
-def file_to_resource_transform(source: str):
+def file_to_resource_transform(source: str, layout: bool = False):
     tree = ast_parse(source)
+    original = snapshot(tree) if layout else None
     tree = FileToResourceTransform().visit(tree)
     tree = ast.fix_missing_locations(tree)
-    return ast_unparse(tree)
+    return splice_source(source, tree, original) if layout else ast_unparse(tree)
+
+
+def pack_transform_code(source: str,
+                        module: str,
+                        resources: bool,
+                        layout: bool = False,
+                        definitions: Optional[dict] = None):
+    # transform and check the imports of a module within a single traversal of a single parse
+    tree = ast_parse(source)
+    original = snapshot(tree) if layout else None
+
+    absolute_import = HasAbsoluteImportOfModuleCheck(module)
+    relative_import = HasRelativeImportCheck()
+
+    rules = [FileToResourceTransform()] if resources else []
+
+    # checks for the target interpreter get folded (names are counted before, as the first rule)
+    if definitions:
+        count = NameCount()
+        rules = [count, VariantTransform(definitions, count_bindings(tree))] + rules
+
+    tree = fused_transform(tree, rules + [absolute_import, relative_import])
+
+    if definitions:
+        tree = remove_unused_imports(tree, count.names)
+
+    tree = ast.fix_missing_locations(tree)
+
+    code = splice_source(source, tree, original) if layout else ast_unparse(tree)
+    return code, absolute_import.has_absolute_import_of_module, relative_import.has_relative_import
@@ -6,13 +6,14 @@ if '' in sys.path:
     sys.path.remove('')
 
 import argparse
-from glob import glob
-from os.path import join
+import json
 from pathlib import Path
 from traceback import print_tb
 from typing import List
 
+from pdistx.utils.archive import glob_source
 from pvariant.process import perform
+from pvariant.target import target_definitions
 
 
 def main(argv: List[str] = sys.argv[1:]):
@@ -25,7 +26,8 @@ def main(argv: List[str] = sys.argv[1:]):
         metavar='name[:type]=value',
         action='append',
         default=[],
-        help='define variables to be replaced, e.g. -d __VARIANT__=PRO -d __LICENSE_CHECK__:bool=True',
+        help='define variables to be replaced, e.g. -d __VARIANT__=PRO -d __LICENSE_CHECK__:bool=True '
+        '(types: str, int, float, bool, none, json)',
     )
 
     parser.add_argument(
@@ -45,9 +47,96 @@ def main(argv: List[str] = sys.argv[1:]):
         help='zip file path (target becomes relative path within zip file)',
     )
 
+    parser.add_argument(
+        '-c',
+        dest='compile',
+        metavar='python',
+        action='append',
+        default=[],
+        help='compile python files to bytecode using the given interpreter, e.g. -c python3.10 (can be repeated)',
+    )
+
+    parser.add_argument(
+        '-O',
+        dest='optimize',
+        metavar='level',
+        action='append',
+        type=int,
+        default=[],
+        help='optimization level used for compiling to bytecode (defaults to 0, can be repeated)',
+    )
+
+    parser.add_argument(
+        '-b',
+        dest='sourceless',
+        action='store_true',
+        help='replace python files with compiled .pyc files instead of using __pycache__ folders',
+    )
+
+    parser.add_argument(
+        '-a',
+        dest='prune',
+        action='store_true',
+        help='remove modules and resources, which are unreachable from the entry modules after the transformation',
+    )
+
+    parser.add_argument(
+        '-e',
+        dest='entry',
+        metavar='module',
+        action='append',
+        default=[],
+        help='entry module for -a (defaults to the package itself and its __main__ module)',
+    )
+
+    parser.add_argument(
+        '-n',
+        dest='verbatim',
+        action='store_true',
+        help='copy python files, which need no transformation, verbatim instead of removing comments',
+    )
+
+    parser.add_argument(
+        '-l',
+        dest='layout',
+        action='store_true',
+        help='keep the layout (line numbers) of python files, only changed code gets rewritten and comments removed',
+    )
+
+    parser.add_argument(
+        '-V',
+        dest='target_python',
+        metavar='version',
+        default=None,
+        help='fold checks of sys.version_info for the given target python version, e.g. -V 3.10',
+    )
+
+    parser.add_argument(
+        '-P',
+        dest='target_platform',
+        metavar='platform',
+        default=None,
+        help='fold checks of sys.platform and os.name for the given target platform (linux, win32 or darwin)',
+    )
+
+    parser.add_argument(
+        '-B',
+        dest='target_blender',
+        metavar='version',
+        default=None,
+        help='fold checks of bpy.app.version for the given target blender version, e.g. -B 4.1',
+    )
+
+    parser.add_argument(
+        '-g',
+        dest='git',
+        action='store_true',
+        help='list the files of the source folder via git (tracked and untracked files, except for ignored ones)',
+    )
+
     parser.add_argument(
         'source',
-        help='source path',
+        help='source path (folder, file or archive, a folder within an archive can be appended, e.g. addon.zip/addon)',
     )
 
     parser.add_argument(
@@ -67,22 +156,38 @@ def main(argv: List[str] = sys.argv[1:]):
             value = value if value is not None else ''
         elif type_ == 'int':
             value = int(value if value is not None else 0)
+        elif type_ == 'float':
+            value = float(value if value is not None else 0)
         elif type_ == 'bool':
             value = value is not None and value.lower() == 'true'
         elif type_ == 'none':
             value = None
+        elif type_ == 'json':
+            value = json.loads(value if value is not None else 'null')
         else:
             raise ValueError('invalid definition type')
         if name:
             definitions[name] = value
 
     try:
+        # definitions override the ones of the target interpreter
+        merged = target_definitions(args.target_python, args.target_platform, args.target_blender)
+        merged.update(definitions)
+
         perform(
             Path(args.source),
             Path(args.target),
-            definitions,
-            [Path(path) for pattern in args.filter for path in glob(join(args.source, pattern), recursive=True)],
+            merged,
+            glob_source(Path(args.source), args.filter),
             Path(args.zip) if args.zip else None,
+            args.compile,
+            args.optimize if args.optimize else [0],
+            args.sourceless,
+            args.prune,
+            args.entry,
+            args.verbatim,
+            args.layout,
+            args.git,
         )
     except Exception as ex:
         print(f'ERROR: {ex}')
@@ -0,0 +1,407 @@
+import ast
+import math
+import operator
+from typing import Dict, Optional, Set
+
+# marker for expressions, which are not literals
+MISSING = object()
+
+# limit for the size of folded strings, bytes, sequences and numbers (in digits) to avoid bloating the code
+MAX_SIZE = 4096
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.BitAnd: operator.and_,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Invert: operator.invert,
+    ast.Not: operator.not_,
+}
+
+_COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+# pure builtins, which can be evaluated at build time (unless shadowed in the module)
+_BUILTINS = {
+    'len': len,
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'bool': bool,
+    'int': int,
+    'float': float,
+    'str': str,
+}
+
+# pure methods of strings, which can be evaluated at build time, e.g. sys.platform.startswith('win')
+_STR_METHODS = ['startswith', 'endswith', 'lower', 'upper', 'strip', 'lstrip', 'rstrip']
+
+# operators, which can be decided by the known components of a version tuple
+_VERSION_OPERATORS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+
+class VersionPrefix(tuple):
+    # known leading components of a version tuple, which has further unknown components, e.g. sys.version_info of
+    # python 3.10 is (3, 10, micro, releaselevel, serial)
+    pass
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, complex)) and not isinstance(value, bool)
+
+
+def _is_negative(value) -> bool:
+    # numbers, which are written with a leading minus sign (including -0.0 and imaginary numbers like -1j)
+    # NOTE: integers are not converted to floats, which overflows for huge integers
+    if isinstance(value, complex):
+        return value.real == 0 and math.copysign(1.0, value.imag) < 0
+    if isinstance(value, float):
+        return math.copysign(1.0, value) < 0
+    return _is_number(value) and value < 0
+
+
+def is_immutable(value) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def literal_value(node):
+    if isinstance(node, ast.Constant):
+        return node.value
+
+    # negative numbers are unary operations on constants
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)) and \
+            isinstance(node.operand, ast.Constant) and _is_number(node.operand.value):
+        return _UNARY_OPERATORS[type(node.op)](node.operand.value)
+
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        values = [literal_value(elt) for elt in node.elts]
+        if MISSING in values:
+            return MISSING
+        try:
+            return {ast.Tuple: tuple, ast.List: list, ast.Set: set}[type(node)](values)
+        except TypeError:
+            return MISSING
+
+    if isinstance(node, ast.Dict):
+        # a key of None represents **x
+        if None in node.keys:
+            return MISSING
+        keys = [literal_value(key) for key in node.keys]
+        values = [literal_value(value) for value in node.values]
+        if MISSING in keys or MISSING in values:
+            return MISSING
+        try:
+            return dict(zip(keys, values))
+        except TypeError:
+            return MISSING
+
+    return MISSING
+
+
+def _size(value):
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value.bit_length() // 3
+    if isinstance(value, (tuple, list, set)):
+        return len(value) + sum(_size(v) for v in value)
+    if isinstance(value, dict):
+        return len(value) + sum(_size(k) + _size(v) for k, v in value.items())
+    return 1
+
+
+def to_node(value):
+    # only values, which can be expressed as literals, are supported
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+
+    # negative numbers need to be unary operations, otherwise they would bind weaker than e.g. ** or attributes
+    if _is_negative(value):
+        operand = to_node(-value)
+        return ast.UnaryOp(ast.USub(), operand) if operand is not None else None
+
+    # complex numbers are written as sum, so negative zeros and non-finite parts cannot be expressed
+    if isinstance(value, complex):
+        for part in [value.real, value.imag]:
+            if not math.isfinite(part) or (part == 0 and math.copysign(1.0, part) < 0):
+                return None
+
+    if isinstance(value, (str, bytes, bool, int, float, complex, type(None))):
+        return ast.Constant(value)
+
+    if isinstance(value, (tuple, list)) or (isinstance(value, set) and value):
+        elts = [to_node(v) for v in value]
+        if None in elts:
+            return None
+        if isinstance(value, tuple):
+            return ast.Tuple(elts, ast.Load())
+        if isinstance(value, list):
+            return ast.List(elts, ast.Load())
+        return ast.Set(elts)
+
+    if isinstance(value, dict):
+        keys = [to_node(k) for k in value.keys()]
+        values = [to_node(v) for v in value.values()]
+        if None in keys or None in values:
+            return None
+        return ast.Dict(keys, values)
+
+    return None
+
+
+def _folded(node, function, *args):
+    try:
+        value = function(*args)
+    except Exception:  # pylint: disable=broad-except
+        return node
+
+    # huge numbers might not be convertible, e.g. to floats
+    try:
+        if _size(value) > MAX_SIZE:
+            return node
+        return to_node(value) or node
+    except (OverflowError, ValueError, MemoryError):
+        return node
+
+
+def fold_binop(node: ast.BinOp):
+    left = literal_value(node.left)
+    right = literal_value(node.right)
+
+    if left is MISSING or right is MISSING or type(node.op) not in _BINARY_OPERATORS:
+        return node
+
+    # avoid computing huge values (shifting one is not cheap, unlike raising it to a power)
+    if isinstance(node.op, ast.Pow) and isinstance(right, int) and right > 64 and left not in [0, 1]:
+        return node
+    if isinstance(node.op, ast.LShift) and isinstance(right, int) and right > 64 and left != 0:
+        return node
+
+    if isinstance(node.op, ast.Mult):
+        for sequence, count in [(left, right), (right, left)]:
+            if isinstance(count, int) and isinstance(sequence, (str, bytes, tuple, list)):
+                if _size(sequence) * count > MAX_SIZE:
+                    return node
+
+    return _folded(node, _BINARY_OPERATORS[type(node.op)], left, right)
+
+
+def fold_unaryop(node: ast.UnaryOp):
+    operand = literal_value(node.operand)
+
+    if operand is MISSING:
+        return node
+
+    # negative numbers are folded already
+    if isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) and _is_negative(operand):
+        return node
+
+    return _folded(node, _UNARY_OPERATORS[type(node.op)], operand)
+
+
+def fold_compare(node: ast.Compare):
+    values = [literal_value(node.left)] + [literal_value(comparator) for comparator in node.comparators]
+
+    if MISSING in values:
+        return node
+
+    def _compare():
+        # chained comparisons, e.g. a < b < c
+        for i, op in enumerate(node.ops):
+            if not _COMPARE_OPERATORS[type(op)](values[i], values[i + 1]):
+                return False
+        return True
+
+    return _folded(node, _compare)
+
+
+def fold_subscript(node: ast.Subscript):
+    if not isinstance(node.ctx, ast.Load):
+        return node
+
+    value = literal_value(node.value)
+
+    if isinstance(node.slice, ast.Slice):
+        bounds = [node.slice.lower, node.slice.upper, node.slice.step]
+        parts = [literal_value(part) if part else None for part in bounds]
+        index = slice(*parts) if MISSING not in parts else MISSING
+    else:
+        index = literal_value(node.slice)
+
+    if value is MISSING or index is MISSING:
+        return node
+
+    return _folded(node, operator.getitem, value, index)
+
+
+def fold_call(node: ast.Call, bound: Set[str]):
+    if node.keywords:
+        return node
+
+    # methods of string constants
+    if isinstance(node.func, ast.Attribute) and node.func.attr in _STR_METHODS:
+        value = literal_value(node.func.value)
+        args = [literal_value(arg) for arg in node.args]
+
+        if not isinstance(value, str) or MISSING in args:
+            return node
+
+        return _folded(node, getattr(value, node.func.attr), *args)
+
+    if not isinstance(node.func, ast.Name) or node.func.id not in _BUILTINS or node.func.id in bound:
+        return node
+
+    args = [literal_value(arg) for arg in node.args]
+
+    if MISSING in args:
+        return node
+
+    return _folded(node, _BUILTINS[node.func.id], *args)
+
+
+def dotted_name(node) -> Optional[str]:
+    # name of an attribute chain, e.g. sys.version_info
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+
+    if not isinstance(node, ast.Name) or not names:
+        return None
+
+    return '.'.join([node.id] + names[::-1])
+
+
+def version_prefix(node, definitions: dict) -> Optional[VersionPrefix]:
+    value = definitions.get(dotted_name(node)) if isinstance(node, ast.Attribute) else None
+    return value if isinstance(value, VersionPrefix) else None
+
+
+def fold_version_compare(node: ast.Compare, definitions: dict):
+    # e.g. sys.version_info >= (3, 9)
+    if len(node.ops) != 1 or not isinstance(node.ops[0], _VERSION_OPERATORS):
+        return node
+
+    values = []
+
+    for side, other in [(node.left, node.comparators[0]), (node.comparators[0], node.left)]:
+        prefix = version_prefix(side, definitions)
+
+        if prefix is None:
+            values.append(literal_value(side))
+            continue
+
+        # comparisons are decided by the known components, unless they are equal to the leading components of a longer
+        # tuple, if a tuple up to the same length is equal to them, the version is greater (as it is longer), which is
+        # the same for the known components followed by a zero
+        value = literal_value(other)
+        if not isinstance(value, tuple) or not all(isinstance(v, int) for v in value):
+            return node
+
+        if len(value) > len(prefix) and value[0:len(prefix)] == tuple(prefix):
+            return node
+
+        values.append(tuple(prefix) + (0,))
+
+    if MISSING in values:
+        return node
+
+    return _folded(node, _COMPARE_OPERATORS[type(node.ops[0])], *values)
+
+
+def fold_version_subscript(node: ast.Subscript, definitions: dict):
+    # e.g. sys.version_info[0] or sys.version_info[:2]
+    prefix = version_prefix(node.value, definitions)
+
+    if prefix is None or not isinstance(node.ctx, ast.Load):
+        return node
+
+    if isinstance(node.slice, ast.Slice):
+        lower, upper, step = [
+            literal_value(part) if part else None for part in [node.slice.lower, node.slice.upper, node.slice.step]
+        ]
+        if lower not in [None, 0] or step is not None or not isinstance(upper, int) or not 0 <= upper <= len(prefix):
+            return node
+        return _folded(node, operator.getitem, tuple(prefix), slice(upper))
+
+    index = literal_value(node.slice)
+    if not isinstance(index, int) or not 0 <= index < len(prefix):
+        return node
+
+    return _folded(node, operator.getitem, tuple(prefix), index)
+
+
+def fold_joinedstr(node: ast.JoinedStr):
+    parts = []
+
+    for value in node.values:
+        if isinstance(value, ast.Constant):
+            parts.append(value.value)
+            continue
+
+        # formatted value, e.g. f'{x!r:>10}'
+        literal = literal_value(value.value)
+        spec = fold_joinedstr(value.format_spec) if value.format_spec else ast.Constant('')
+
+        if literal is MISSING or not isinstance(spec, ast.Constant):
+            return node
+
+        conversion = {-1: lambda x: x, 115: str, 114: repr, 97: ascii}[value.conversion]
+
+        try:
+            parts.append(format(conversion(literal), spec.value))
+        except Exception:  # pylint: disable=broad-except
+            return node
+
+    return _folded(node, ''.join, parts)
+
+
+def count_bindings(tree) -> Dict[str, int]:
+    # count how often each name gets bound within a module
+    bindings: Dict[str, int] = {}
+
+    def _bind(name):
+        bindings[name] = bindings.get(name, 0) + 1
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            _bind(node.id)
+        elif isinstance(node, ast.arg):
+            _bind(node.arg)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            _bind(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for name in node.names:
+                _bind(name.asname or name.name.split('.')[0])
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            for name in node.names:
+                _bind(name)
+
+    return bindings
@@ -0,0 +1,176 @@
+import ast
+from pathlib import PurePosixPath
+from typing import Any, Callable, Dict, List, Set
+
+from pdistx.utils.imports import collect_imports, resolve_relative
+from pdistx.utils.prefilter import has_identifier, identifier_pattern
+from pdistx.utils.source import ast_parse, ast_unparse, decode_source
+from pdistx.utils.splice import snapshot, splice_source
+
+from .fold import MISSING, count_bindings, is_immutable, literal_value
+from .transform import variant_transform_tree
+
+
+def module_name(path: PurePosixPath) -> str:
+    return '.'.join(list(path.parts[:-1]) + ([] if path.name == '__init__.py' else [path.stem]))
+
+
+def _constant_assignments(tree) -> Dict[str, Any]:
+    bindings = count_bindings(tree)
+    constants: Dict[str, Any] = {}
+
+    # module level names, which are assigned a constant exactly once
+    for statement in tree.body:
+        if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+            target = statement.targets[0]
+            value = literal_value(statement.value)
+
+            # only immutable values can be substituted safely
+            if isinstance(target, ast.Name) and value is not MISSING and is_immutable(value):
+                if bindings.get(target.id) == 1:
+                    constants[target.id] = value
+
+    return constants
+
+
+def exported_constants(tree, original, definitions: dict) -> Dict[str, Any]:
+    # only names, which became constant due to the transformation, are exported (or definitions themselves)
+    # NOTE: plain module state like "cache = None" might be modified from outside of the module
+    plain = _constant_assignments(original)
+    return {
+        name: value for name, value in _constant_assignments(tree).items() if name not in plain or name in definitions
+    }
+
+
+def imported_constants(tree, package: List[str], root: str, exports: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    bindings = count_bindings(tree)
+    constants: Dict[str, Any] = {}
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ImportFrom):
+            continue
+
+        # resolve module relative to the root package
+        module = resolve_relative(package, node.level, node.module)
+        if module is None:
+            continue
+
+        if node.level == 0:
+            if module[0:1] != [root]:
+                continue
+            module = module[1:]
+
+        # names only bound by this import can be replaced by the exported constant
+        exported = exports.get('.'.join(module), {})
+        for name in node.names:
+            if name.name in exported and bindings.get(name.asname or name.name) == 1:
+                constants[name.asname or name.name] = exported[name.name]
+
+    return constants
+
+
+def fold_modules(sources: Dict[PurePosixPath, bytes], root: str, definitions: dict, layout: bool = False):
+    codes: Dict[PurePosixPath, str] = {}
+    snapshots: Dict[PurePosixPath, dict] = {}
+    originals: Dict[PurePosixPath, ast.AST] = {}
+    trees: Dict[PurePosixPath, ast.AST] = {}
+    warnings: Dict[PurePosixPath, List[str]] = {}
+    imported: Dict[PurePosixPath, Dict[str, Any]] = {}
+    exports: Dict[str, Dict[str, Any]] = {}
+
+    # repeat folding until no more constants get propagated (constants only accumulate, so this terminates)
+    changed = True
+
+    while changed:
+        changed = False
+
+        # modules not referencing any definition or propagated constant are not transformed at all
+        pattern = identifier_pattern(list(definitions.keys()) + [name for names in exports.values() for name in names])
+
+        for path, data in sources.items():
+            if path not in originals:
+                if not has_identifier(pattern, data):
+                    continue
+                codes[path] = decode_source(data, sanitize=not layout)
+                originals[path] = ast_parse(codes[path])
+
+            # constants of the module itself and the ones imported from other modules
+            constants = {
+                **exports.get(module_name(path), {}),
+                **imported_constants(originals[path], list(path.parts[:-1]), root, exports),
+            }
+
+            # skip modules, which have already been folded with the same constants
+            if path in trees and imported[path] == constants:
+                continue
+
+            imported[path] = constants
+
+            # definitions always take precedence
+            tree = ast_parse(codes[path])
+            snapshots[path] = snapshot(tree) if layout else None
+            trees[path], warnings[path] = variant_transform_tree(tree, {**constants, **definitions})
+
+            module_exports = exported_constants(trees[path], originals[path], definitions)
+            if exports.get(module_name(path)) != module_exports:
+                exports[module_name(path)] = module_exports
+                changed = True
+
+    # code of the transformed modules
+    codes = {
+        path: splice_source(codes[path], tree, snapshots[path]) if layout else ast_unparse(tree)
+        for path, tree in trees.items()
+    }
+
+    return originals, trees, warnings, codes
+
+
+def reachable_modules(trees: Dict[PurePosixPath, ast.AST],
+                      root: str,
+                      entries: List[str],
+                      log: Callable[[str], None] = print) -> Set[str]:
+    modules = {module_name(path): path for path in trees}
+
+    pending = set(entries)
+    reachable: Set[str] = set()
+
+    while pending:
+        name = pending.pop()
+
+        # importing a module imports all of its parent packages
+        parts = name.split('.') if name else []
+        for i in range(0, len(parts) + 1):
+            parent = '.'.join(parts[0:i])
+
+            if parent in reachable:
+                continue
+
+            reachable.add(parent)
+
+            path = modules.get(parent)
+            if path is None:
+                continue
+
+            names, has_dynamic_import = collect_imports(trees[path], list(path.parts[:-1]))
+
+            # absolute imports of the root package
+            names = {name[len(root) + 1:] if name.startswith(root + '.') else name for name in names}
+
+            # dynamic imports cannot be followed, so all modules of the package are kept
+            if has_dynamic_import:
+                package = '.'.join(path.parts[:-1])
+                log(f'Warning: {path} uses dynamic imports, keeping all modules of {package or root}!')
+                names |= {other for other in modules if not package or other.startswith(package + '.')}
+
+            pending |= names - reachable
+
+    return reachable
+
+
+def string_constants(trees) -> Set[str]:
+    return {
+        node.value
+        for tree in trees
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Constant) and isinstance(node.value, str)
+    }
@@ -1,12 +1,21 @@
-from os import close, makedirs, walk
-from pathlib import Path
+from os import makedirs, walk
+from pathlib import Path, PurePosixPath
 from shutil import copy
-from tempfile import mkdtemp, mkstemp
-from typing import List
-
-from pdistx.utils.path import fnmatch_any, rmpath
+from tempfile import mkdtemp
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pdistx.utils.archive import SourceArchive, is_source_archive
+from pdistx.utils.compile import compile_bytecode
+from pdistx.utils.git import git_source_files
+from pdistx.utils.member import FileMember
+from pdistx.utils.path import fnmatch_any, rmpath, rmpath_background, staging_folder, swap_paths
+from pdistx.utils.pipeline import Writer, prefetch
+from pdistx.utils.prefilter import has_identifier, identifier_pattern
+from pdistx.utils.source import ast_parse, decode_source, write_source
+from pdistx.utils.splice import strip_comments
 from pdistx.utils.zip import zipit
 
+from .modules import fold_modules, module_name, reachable_modules, string_constants
 from .transform import variant_transform
 
 
@@ -16,77 +25,104 @@ def perform(
     definitions: dict,
     filters: List[Path],
     zip_: Path,
+    compile_: List[str],
+    optimizations: List[int],
+    sourceless: bool,
+    prune: bool,
+    entries: List[str],
+    verbatim: bool,
+    layout: bool,
+    git: bool,
 ):
     # ensure pre-conditions
-    assert source.is_file() or source.is_dir(), 'source path is expected to be a file or directory'
+    assert source.is_file() or source.is_dir() or is_source_archive(source), \
+        'source path is expected to be a file, directory or archive'
 
     if zip_:
         assert not target.is_absolute(), 'target path is expected to be relative'
 
     # list of temporary files and folders
     tmps: List[Path] = []
+    staging = None
+
+    # archives are read without extracting them
+    archive = None
 
     # temporary paths get cleaned automatically at the end of this block
     try:
+        if is_source_archive(source):
+            archive = SourceArchive(source, True)
 
-        # purging target or zip
-        if zip_:
-            print(f'Purging {zip_}...')
-            rmpath(zip_)
-        else:
-            print(f'Purging {target}...')
-            rmpath(target)
+        root = archive.name if archive else source.name
+
+        # outputs are written to a staging folder and moved into place at the end (instead of purging them first)
+        output = zip_ if zip_ else target
+        staging = staging_folder(output.parent)
 
         # create target path
         if zip_:
-            # create interim directory or file
-            if source.is_dir():
-                intermediate = Path(mkdtemp())
+            # create interim directory (a file keeps the name of the target, so it gets compiled and zipped as is)
+            zip_root = Path(mkdtemp())
+            zip_base = target
+
+            if archive or source.is_dir():
+                intermediate = zip_root
             else:
-                tmp_fh, intermediate = mkstemp()
-                close(tmp_fh)  # dump handle right away
-                intermediate = Path(intermediate)
+                intermediate = zip_root.joinpath(target.name)
+                zip_base = target.parent
 
             # add to tmp paths for cleanup
-            tmps.append(intermediate)
+            tmps.append(zip_root)
         else:
-            intermediate = target
+            intermediate = staging.joinpath(target.name)
 
         # handle source folder
         print(f'Processing {source}...')
 
-        if source.is_dir():
+        if archive or source.is_dir():
 
             # ensure target directory exists
             makedirs(intermediate, exist_ok=True)
 
-            # process all files
-            for source_folder, folders, files in walk(source, followlinks=True):
+            # collect all files (from the git index, which is faster than walking all folders)
+            paths: List[PurePosixPath] = []
+
+            if archive:
+                paths = archive.files(filters)
+
+            elif git:
+                paths = git_source_files(source, filters)
+
+            else:
+                for source_folder, folders, files in walk(source, followlinks=True):
+                    source_folder = Path(source_folder)
+
+                    # filter entries to be ignored (folders need to be modified in-place to take effect for os.walk)
+                    def _folder_filter(folder: Path):
+                        return not fnmatch_any(folder.name, ['__pycache__', '.git']) and folder not in filters
 
-                # ensure target directory exists
-                source_folder = Path(source_folder)
-                target_folder = intermediate.joinpath(source_folder.relative_to(source))
-                makedirs(target_folder, exist_ok=True)
+                    def _file_filter(file: Path):
+                        return not fnmatch_any(file.name, ['*.pyc']) and file not in filters
 
-                # filter entries to be ignored (folders need to be modified in-place to take effect for os.walk)
-                def _folder_filter(folder: Path):
-                    return not fnmatch_any(folder.name, ['__pycache__', '.git']) and folder not in filters
+                    folders[:] = [folder for folder in folders if _folder_filter(source_folder.joinpath(folder))]
+                    files = [file for file in files if _file_filter(source_folder.joinpath(file))]
 
-                def _file_filter(file: Path):
-                    return not fnmatch_any(file.name, ['*.pyc']) and file not in filters
+                    package_folder = PurePosixPath(*source_folder.relative_to(source).parts)
+                    paths += [package_folder.joinpath(file) for file in files]
 
-                folders[:] = [folder for folder in folders if _folder_filter(source_folder.joinpath(folder))]
-                files = [file for file in files if _file_filter(source_folder.joinpath(file))]
+            # files of archives are read as members
+            def _member(path: PurePosixPath):
+                return archive.member(path) if archive else FileMember(path, source.joinpath(*path.parts))
 
-                # transform or copy file
-                for file in files:
-                    source_file = source_folder.joinpath(file)
-                    target_file = target_folder.joinpath(file)
+            # transform all modules, constants are propagated across modules (modules are read ahead by threads)
+            modules = [path for path in paths if path.suffix == '.py']
+            sources = dict(prefetch(modules, lambda path: _member(path).read()))
+            paths, codes = variant_tree(paths, sources, root, definitions, prune, entries, verbatim, layout)
 
-                    if file.endswith('.py'):
-                        variant_transform(source_file, target_file, definitions)
-                    else:
-                        copy(source_file, target_file, follow_symlinks=True)
+            # write or copy files (by threads)
+            with Writer() as writer:
+                for path in paths:
+                    writer.submit(_write, _member(path), intermediate.joinpath(*path.parts), codes.get(path), layout)
 
         # handle source file
         else:
@@ -94,15 +130,120 @@ def perform(
             # ensure parent target directory exists
             makedirs(intermediate.parent, exist_ok=True)
 
-            # transform file
-            variant_transform(source, intermediate, definitions)
+            # transform file, unless no definition is referenced
+            data = source.read_bytes()
+
+            if has_identifier(identifier_pattern(definitions.keys()), data):
+                variant_transform(source, intermediate, definitions, layout)
+            elif verbatim:
+                copy(source, intermediate, follow_symlinks=True)
+            else:
+                write_source(intermediate, _decode(data, layout), sanitize=False, layout=layout)
+
+        # compile to bytecode
+        if compile_:
+            destination = zip_.joinpath(target) if zip_ else target
+            compile_bytecode(intermediate, compile_, optimizations, sourceless, zip_ is not None, destination)
 
         # zip intermediate path to zip path
         if zip_:
-            zipit(intermediate, zip_, target)
+            # unchanged members of the previous zip file are copied without recompressing them
+            reused = zipit(zip_root, staging.joinpath(zip_.name), zip_base, zip_)
+            if reused:
+                print(f'Reused {reused} unchanged members of {zip_}')
+
+        # replace previous output
+        print(f'Replacing {output}...')
+        swap_paths(staging, [output])
 
     finally:
+        # close archive
+        if archive:
+            archive.close()
+
         # clean up temporary folders
         for path in tmps:
             print(f'Purging {path}...')
             rmpath(path)
+
+        # the staging folder contains the previous output or a partial one
+        if staging:
+            rmpath_background(staging)
+
+
+def _write(member, target_file: Path, code: Optional[str], layout: bool):
+    makedirs(target_file.parent, exist_ok=True)
+
+    if code is None:
+        member.copy(target_file)
+    else:
+        write_source(target_file, code, sanitize=False, layout=layout)
+
+
+def _decode(data: bytes, layout: bool) -> str:
+    # the source gets sanitized while decoding, unless keeping the layout
+    return strip_comments(decode_source(data, sanitize=False)) if layout else decode_source(data)
+
+
+def variant_tree(
+    paths: List[PurePosixPath],
+    sources: Dict[PurePosixPath, bytes],
+    root: str,
+    definitions: dict,
+    prune: bool,
+    entries: List[str],
+    verbatim: bool,
+    layout: bool,
+    log: Callable[[str], None] = print,
+) -> Tuple[List[PurePosixPath], Dict[PurePosixPath, Optional[str]]]:
+    # transform all modules, constants are propagated across modules
+    originals, trees, warnings, codes = fold_modules(sources, root, definitions, layout)
+
+    for path, messages in warnings.items():
+        for message in messages:
+            log(f'{path}: {message}')
+
+    # modules, which do not need to be transformed, take the fast path
+    fast = [path for path in sources if path not in trees]
+    log(f'{len(fast)} of {len(sources)} modules need no transformation')
+
+    # remove all modules and resources, which are unreachable after transformation
+    if prune:
+        for path in fast:
+            originals[path] = trees[path] = ast_parse(decode_source(sources[path]))
+
+        paths = _prune(paths, originals, trees, root, entries, log)
+
+    # modules on the fast path are copied as is (no code) or only get sanitized
+    for path in fast:
+        codes[path] = None if verbatim else _decode(sources[path], layout)
+
+    return paths, codes
+
+
+def _prune(paths: List[PurePosixPath], originals, trees, root: str, entries: List[str], log: Callable[[str], None]):
+    # entry modules default to the package and main module
+    if not entries:
+        entries = [module_name(path) for path in trees if str(path) in ['__init__.py', '__main__.py']]
+
+    reachable = reachable_modules(trees, root, entries, log)
+
+    # resources, which are referenced by name in the source, but not anymore in the reachable modules
+    # NOTE: names are matched against whole path components of strings, e.g. images/pro.bip references pro.bip
+    def _names(strings) -> set:
+        return {name for string in strings for name in string.replace('\\', '/').split('/')}
+
+    referenced = _names(string_constants(originals.values()))
+    remaining = _names(string_constants(tree for path, tree in trees.items() if module_name(path) in reachable))
+
+    def _keep(path: PurePosixPath):
+        if path.suffix == '.py':
+            return module_name(path) in reachable
+
+        return path.name not in referenced or path.name in remaining
+
+    for path in paths:
+        if not _keep(path):
+            log(f'Removing unreachable {path}...')
+
+    return [path for path in paths if _keep(path)]
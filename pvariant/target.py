@@ -0,0 +1,43 @@
+from typing import Optional, Tuple
+
+from .fold import VersionPrefix
+
+# platforms as given by sys.platform
+PLATFORMS = ['linux', 'win32', 'darwin']
+
+
+def parse_version(version: str, maximum: int) -> Tuple[int, ...]:
+    try:
+        parts = tuple(int(part) for part in version.split('.'))
+    except ValueError:
+        parts = ()
+
+    if not 0 < len(parts) <= maximum:
+        raise ValueError(f'{version} is expected to be a version like 3.10')
+
+    return parts
+
+
+def target_definitions(python: Optional[str], platform: Optional[str], blender: Optional[str]) -> dict:
+    # definitions of the checks for the target interpreter, which are folded the same way as other definitions
+    definitions = {}
+
+    if python:
+        # sys.version_info has further components (release level and serial), which are not known
+        version = parse_version(python, 3)
+        definitions['sys.version_info'] = VersionPrefix(version)
+        for i, name in enumerate(['major', 'minor', 'micro'][0:len(version)]):
+            definitions[f'sys.version_info.{name}'] = version[i]
+
+    if platform:
+        if platform not in PLATFORMS:
+            raise ValueError(f'{platform} is expected to be one of the platforms {", ".join(PLATFORMS)}')
+        definitions['sys.platform'] = platform
+        definitions['os.name'] = 'nt' if platform == 'win32' else 'posix'
+
+    if blender:
+        # bpy.app.version consists of major, minor and patch version
+        version = parse_version(blender, 3)
+        definitions['bpy.app.version'] = version if len(version) == 3 else VersionPrefix(version)
+
+    return definitions
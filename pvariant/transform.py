@@ -1,17 +1,50 @@
 import ast
-from functools import reduce
 from pathlib import Path
+from typing import Dict, Set
 
-from pdistx.utils.source import (ast_parse, ast_unparse, read_source, write_source)
+from pdistx.utils.fused import FusedRule, fused_transform
+from pdistx.utils.source import (ast_parse, ast_unparse, decode_source, read_source, write_source)
+from pdistx.utils.splice import snapshot, splice_source
 
+from .fold import (MISSING, VersionPrefix, count_bindings, dotted_name, fold_binop, fold_call, fold_compare,
+                   fold_joinedstr, fold_subscript, fold_unaryop, fold_version_compare, fold_version_subscript,
+                   is_immutable, literal_value, to_node)
 
-class VariantTransform(ast.NodeTransformer):
 
-    def __init__(self, definitions):
+def _fix_empty_body(node):
+    # statements with a body require at least one statement in it
+    if not isinstance(node, ast.Module) and isinstance(getattr(node, 'body', None), list) and not node.body:
+        node.body = [ast.Pass()]
+    return node
+
+
+class VariantTransform(FusedRule, ast.NodeTransformer):
+
+    def __init__(self, definitions, bound=()):
         self.definitions = definitions
-        self._collect_used_definitions = None
+        # builtins shadowed within the module cannot be evaluated
+        self._bound = set(bound)
+        # definitions substituted within (folded) expressions, to warn about ifs, which could not be reduced
+        self._used: Dict[int, tuple] = {}
+        self.warnings = []
         super().__init__()
 
+    def _mark(self, node, names: Set[str]):
+        # the node is kept as well, so its id does not get reused
+        if names:
+            _, marked = self._used.get(id(node), (None, set()))
+            self._used[id(node)] = (node, marked | names)
+        return node
+
+    def _used_in(self, node) -> Set[str]:
+        if not self._used:
+            return set()
+        return {name for n in ast.walk(node) if id(n) in self._used for name in self._used[id(n)][1]}
+
+    def _folded(self, node, result):
+        # folded expressions keep track of the definitions used within
+        return self._mark(result, self._used_in(node)) if result is not node else node
+
     # pylint: disable=pylint(invalid-name)
     def visit_Assign(self, node: ast.Assign):
         node = self.generic_visit(node)
@@ -19,7 +52,10 @@ class VariantTransform(ast.NodeTransformer):
         if len(node.targets):
             target = node.targets[0]
             if isinstance(target, ast.Name) and isinstance(target.ctx, ast.Store) and target.id in self.definitions:
-                return ast.Assign([target], ast.Constant(self.definitions[target.id]))
+                value = to_node(self.definitions[target.id])
+                if value is not None:
+                    node.targets = [target]
+                    node.value = value
 
         return node
 
@@ -27,105 +63,236 @@ class VariantTransform(ast.NodeTransformer):
     def visit_Name(self, node: ast.Name):
         node = self.generic_visit(node)
 
-        if isinstance(node.ctx, ast.Load) and node.id in self.definitions:
-            if self._collect_used_definitions is not None:
-                self._collect_used_definitions.add(node.id)
-            return ast.Constant(self.definitions[node.id])
+        # mutable values are only assigned, as each substitution would create a new object
+        if isinstance(node.ctx, ast.Load) and node.id in self.definitions and is_immutable(self.definitions[node.id]):
+            value = to_node(self.definitions[node.id])
+            if value is not None:
+                return self._mark(value, {node.id})
 
         return node
 
     # pylint: disable=pylint(invalid-name)
-    def visit_BoolOp(self, node: ast.BoolOp):
+    def visit_Attribute(self, node: ast.Attribute):
         node = self.generic_visit(node)
 
-        if reduce(lambda a, b: a and b, map(lambda v: isinstance(v, ast.Constant), node.values), True):
-            values = map(lambda value: value.value, node.values)
-            if isinstance(node.op, ast.And):
-                return ast.Constant(reduce(lambda a, b: a and b, values, True))
-            if isinstance(node.op, ast.Or):
-                return ast.Constant(reduce(lambda a, b: a or b, values, False))
+        # definitions of attributes, e.g. sys.platform
+        name = dotted_name(node)
+        if isinstance(node.ctx, ast.Load) and name in self.definitions:
+            # versions with unknown components are only folded within comparisons and subscripts
+            if isinstance(self.definitions[name], VersionPrefix):
+                return self._mark(node, {name})
+
+            value = to_node(self.definitions[name]) if is_immutable(self.definitions[name]) else None
+            if value is not None:
+                return self._mark(value, {name})
 
         return node
 
     # pylint: disable=pylint(invalid-name)
-    def visit_UnaryOp(self, node: ast.UnaryOp):
+    def visit_BoolOp(self, node: ast.BoolOp):
         node = self.generic_visit(node)
 
-        if isinstance(node.op, ast.Not) and isinstance(node.operand, ast.Constant):
-            return ast.Constant(not node.operand.value)
+        original = node.values
+        values = []
 
-        return node
+        for i, value in enumerate(node.values):
+            literal = literal_value(value)
+            if literal is not MISSING:
+                # a falsy value stops "and", a truthy value stops "or", all following values are unreachable
+                if bool(literal) != isinstance(node.op, ast.And):
+                    values.append(value)
+                    break
+
+                # all other constants are passed through, unless being the last value
+                if i < len(node.values) - 1:
+                    continue
+
+            values.append(value)
+
+        # removed values might have used definitions as well
+        used = set().union(*[self._used_in(value) for value in original]) if len(values) < len(original) else set()
+
+        if len(values) == 1:
+            return self._mark(values[0], used)
+
+        node.values = values
+        return self._mark(node, used)
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_BinOp(self, node: ast.BinOp):
+        node = self.generic_visit(node)
+        return self._folded(node, fold_binop(node))
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_UnaryOp(self, node: ast.UnaryOp):
+        node = self.generic_visit(node)
+        return self._folded(node, fold_unaryop(node))
 
     # pylint: disable=pylint(invalid-name)
     def visit_Compare(self, node: ast.Compare):
         node = self.generic_visit(node)
 
-        if len(node.ops) == 1:
-            op = node.ops[0]
-            left = node.left
-            right = node.comparators[0]
-
-            if isinstance(left, ast.Constant) and isinstance(right, ast.Constant):
-                if isinstance(op, ast.Eq):
-                    return ast.Constant(left.value == right.value)
-                if isinstance(op, ast.NotEq):
-                    return ast.Constant(left.value != right.value)
-                if isinstance(op, ast.Lt):
-                    return ast.Constant(left.value < right.value)
-                if isinstance(op, ast.LtE):
-                    return ast.Constant(left.value <= right.value)
-                if isinstance(op, ast.Gt):
-                    return ast.Constant(left.value > right.value)
-                if isinstance(op, ast.GtE):
-                    return ast.Constant(left.value >= right.value)
-                if isinstance(op, ast.Is):
-                    return ast.Constant(left.value is right.value)
-                if isinstance(op, ast.IsNot):
-                    return ast.Constant(left.value is not right.value)
-
-            if isinstance(left, ast.Constant) and isinstance(right, (ast.List, ast.Tuple)):
-                if reduce(lambda a, b: a and b, [isinstance(child, ast.Constant) for child in right.elts], True):
-                    right_values = [child.value for child in right.elts]
-                    if isinstance(op, ast.In):
-                        return ast.Constant(left.value in right_values)
-                    if isinstance(op, ast.NotIn):
-                        return ast.Constant(left.value not in right_values)
+        result = fold_version_compare(node, self.definitions)
+        if result is not node:
+            return self._folded(node, result)
+
+        return self._folded(node, fold_compare(node))
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Subscript(self, node: ast.Subscript):
+        node = self.generic_visit(node)
+
+        result = fold_version_subscript(node, self.definitions)
+        if result is not node:
+            return self._folded(node, result)
+
+        return self._folded(node, fold_subscript(node))
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Call(self, node: ast.Call):
+        node = self.generic_visit(node)
+        return self._folded(node, fold_call(node, self._bound))
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_JoinedStr(self, node: ast.JoinedStr):
+        node = self.generic_visit(node)
+        return self._folded(node, fold_joinedstr(node))
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_FormattedValue(self, node: ast.FormattedValue):
+        node = self.generic_visit(node)
+
+        # format specs need to stay f-strings, only their values get folded
+        if isinstance(node.format_spec, ast.Constant):
+            node.format_spec = ast.JoinedStr([node.format_spec])
 
         return node
 
     # pylint: disable=pylint(invalid-name)
-    def visit_If(self, node: ast.If):
+    def visit_IfExp(self, node: ast.IfExp):
         node = self.generic_visit(node)
 
-        used_definitions = self._collect_used_definitions = set()
-        self._collect_used_definitions = None
+        test = literal_value(node.test)
+        if test is not MISSING:
+            return self._folded(node, node.body if test else node.orelse)
 
-        if isinstance(node.test, ast.Constant):
-            if node.test.value:
-                body = node.body
-            else:
-                body = node.orelse
-            if len(body) == 0:
-                body = ast.Pass()
-            return body
+        return node
 
+    # pylint: disable=pylint(invalid-name)
+    def visit_If(self, node: ast.If):
+        # empty bodies are fixed after reducing the statement only
+        node = super().generic_visit(node)
+
+        test = literal_value(node.test)
+        if test is not MISSING:
+            return node.body if test else node.orelse
+
+        # definitions used in the test only
+        used_definitions = self._used_in(node.test)
         if len(used_definitions) > 0:
-            print('line {}: {} used in if statement, but code could not be reduced'.format(
-                node.lineno, ', '.join(used_definitions)))
+            self.warnings.append('line {}: {} used in if statement, but code could not be reduced'.format(
+                node.lineno, ', '.join(sorted(used_definitions))))
+
+        return _fix_empty_body(node)
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_While(self, node: ast.While):
+        node = self.generic_visit(node)
+
+        # the loop body of "while False" is never executed, but the else block is
+        test = literal_value(node.test)
+        if test is not MISSING and not test:
+            return node.orelse
 
         return node
 
+    def generic_visit(self, node):
+        node = super().generic_visit(node)
+        return _fix_empty_body(node)
+
+
+class NameCount(FusedRule, ast.NodeVisitor):
+
+    def __init__(self):
+        self.names: Dict[str, int] = {}
+        super().__init__()
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Name(self, node: ast.Name):
+        if not isinstance(node.ctx, ast.Store):
+            self.names[node.id] = self.names.get(node.id, 0) + 1
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Constant(self, node: ast.Constant):
+        if isinstance(node.value, str):
+            self.names[node.value] = self.names.get(node.value, 0) + 1
+
+
+def _count_names(tree):
+    # count all loaded names and strings, which might refer to names as well (e.g. __all__ or annotations)
+    count = NameCount()
+    count.visit(tree)
+    return count.names
+
+
+class _UnusedImportTransform(ast.NodeTransformer):
 
-def variant_transform(source_path: Path, target_path: Path, definitions: dict):
+    def __init__(self, names):
+        self._names = names
+        super().__init__()
+
+    def _filter(self, node, bound_name):
+        node.names = [name for name in node.names if bound_name(name) not in self._names]
+        return node if node.names else None
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Import(self, node: ast.Import):
+        return self._filter(node, lambda name: name.asname or name.name.split('.')[0])
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        return self._filter(node, lambda name: name.asname or name.name)
+
+    def generic_visit(self, node):
+        node = super().generic_visit(node)
+        return _fix_empty_body(node)
+
+
+def remove_unused_imports(tree, names_before):
+    # remove imports, which have been used before, but are not used anymore (e.g. in removed branches)
+    names_after = _count_names(tree)
+    unused = {name for name in names_before if name not in names_after}
+    return _UnusedImportTransform(unused).visit(tree) if unused else tree
+
+
+def variant_transform_tree(tree, definitions: dict):
+    # names are counted before the transformation within the same traversal (as the first rule)
+    count = NameCount()
+    transform = VariantTransform(definitions, count_bindings(tree))
+    tree = fused_transform(tree, [count, transform])
+    tree = remove_unused_imports(tree, count.names)
+    tree = ast.fix_missing_locations(tree)
+    return tree, transform.warnings
+
+
+def variant_transform_code(source: str, definitions: dict, layout: bool = False):
+    tree = ast_parse(source)
+    original = snapshot(tree) if layout else None
+    tree, warnings = variant_transform_tree(tree, definitions)
+
+    for warning in warnings:
+        print(warning)
+
+    return splice_source(source, tree, original) if layout else ast_unparse(tree)
+
+
+def variant_transform(source_path: Path, target_path: Path, definitions: dict, layout: bool = False):
 
     # read file
-    source = read_source(source_path)
+    source = decode_source(source_path.read_bytes(), sanitize=False) if layout else read_source(source_path)
 
     # transform
-    tree = ast_parse(source)
-    tree = VariantTransform(definitions).visit(tree)
-    tree = ast.fix_missing_locations(tree)
-    target = ast_unparse(tree)
+    target = variant_transform_code(source, definitions, layout)
 
     # write file
-    write_source(target_path, target)
+    write_source(target_path, target, sanitize=not layout, layout=layout)
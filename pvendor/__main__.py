@@ -11,6 +11,7 @@ from traceback import print_tb
 from typing import List
 
 from pvendor.process import perform
+from pvendor.slim import slim_patterns
 
 
 def main(argv: List[str] = sys.argv[1:]):
@@ -32,7 +33,17 @@ def main(argv: List[str] = sys.argv[1:]):
         metavar='source',
         action='append',
         default=[],
-        help='copy modules from source folder',
+        help='copy modules from source folder or archive (zip, wheel or tar file, a folder within an archive can be '
+        'appended, e.g. pkg-1.0.tar.gz/pkg-1.0/src)',
+    )
+
+    parser.add_argument(
+        '-w',
+        dest='wheel',
+        metavar='wheel',
+        action='append',
+        default=[],
+        help='install packages from wheel file or wheelhouse folder (without pip)',
     )
 
     parser.add_argument(
@@ -60,6 +71,140 @@ def main(argv: List[str] = sys.argv[1:]):
         help='zip file path (target becomes relative path within zip file)',
     )
 
+    parser.add_argument(
+        '-t',
+        dest='tree_shake',
+        metavar='root',
+        default=None,
+        help='remove vendored modules, which are not imported by the project in the root folder (tree shaking)',
+    )
+
+    parser.add_argument(
+        '-i',
+        dest='tree_shake_keep',
+        metavar='module',
+        action='append',
+        default=[],
+        help='module to be kept including its submodules when tree shaking, e.g. -i numpy.linalg',
+    )
+
+    parser.add_argument(
+        '-c',
+        dest='compile',
+        metavar='python',
+        action='append',
+        default=[],
+        help='compile python files to bytecode using the given interpreter, e.g. -c python3.10 (can be repeated)',
+    )
+
+    parser.add_argument(
+        '-O',
+        dest='optimize',
+        metavar='level',
+        action='append',
+        type=int,
+        default=[],
+        help='optimization level used for compiling to bytecode (defaults to 0, can be repeated)',
+    )
+
+    parser.add_argument(
+        '-b',
+        dest='sourceless',
+        action='store_true',
+        help='replace python files with compiled .pyc files instead of using __pycache__ folders',
+    )
+
+    parser.add_argument(
+        '-m',
+        dest='measure',
+        action='store_true',
+        help='measure the import time of each vendored module in a fresh interpreter after vendoring',
+    )
+
+    parser.add_argument(
+        '-x',
+        dest='budget',
+        metavar='ms',
+        type=float,
+        default=None,
+        help='fail if the import time of a vendored module exceeds the given milliseconds (implies -m)',
+    )
+
+    parser.add_argument(
+        '-n',
+        dest='verbatim',
+        action='store_true',
+        help='copy python files, which need no transformation, verbatim instead of removing comments',
+    )
+
+    parser.add_argument(
+        '-l',
+        dest='layout',
+        action='store_true',
+        help='keep the layout (line numbers) of python files, only changed code gets rewritten and comments removed',
+    )
+
+    parser.add_argument(
+        '-L',
+        dest='lazy',
+        metavar='module',
+        action='append',
+        default=[],
+        help='import a vendored top-level module lazily on first attribute access, e.g. -L numpy (can be repeated)',
+    )
+
+    parser.add_argument(
+        '-g',
+        dest='git',
+        action='store_true',
+        help='list the files of source folders via git (tracked and untracked files, except for ignored ones)',
+    )
+
+    parser.add_argument(
+        '-S',
+        dest='slim',
+        metavar='profile',
+        default='none',
+        help='remove files and folders not needed at runtime from vendored packages using the given profile '
+        '(none, default or strict, defaults to none)',
+    )
+
+    parser.add_argument(
+        '-D',
+        dest='slim_drop',
+        metavar='pattern',
+        action='append',
+        default=[],
+        help='files or folders to be removed from vendored packages in addition to the profile, e.g. -D \'numpy/doc\' '
+        '(glob pattern, can be repeated)',
+    )
+
+    parser.add_argument(
+        '-E',
+        dest='slim_keep',
+        metavar='pattern',
+        action='append',
+        default=[],
+        help='files or folders to be kept, even if removed by slimming, e.g. -E \'numpy/testing\' (glob pattern, '
+        'can be repeated)',
+    )
+
+    parser.add_argument(
+        '-P',
+        dest='target_platform',
+        metavar='platform',
+        default=None,
+        help='remove binaries of other platforms than the given target platform (linux, win32 or darwin)',
+    )
+
+    parser.add_argument(
+        '-V',
+        dest='target_python',
+        metavar='version',
+        default=None,
+        help='remove extension modules of other python versions than the given target python version, e.g. -V 3.11',
+    )
+
     parser.add_argument(
         'target',
         help='target folder (will be cleared, except for the ones to be kept)',
@@ -75,6 +220,22 @@ def main(argv: List[str] = sys.argv[1:]):
             Path(args.target),
             args.keep if args.keep else ['requirements.txt', '.gitignore'],
             Path(args.zip) if args.zip else None,
+            wheels=[Path(whl) for whl in args.wheel],
+            tree_shake=Path(args.tree_shake) if args.tree_shake else None,
+            tree_shake_keep=args.tree_shake_keep,
+            compile_=args.compile,
+            optimizations=args.optimize if args.optimize else [0],
+            sourceless=args.sourceless,
+            measure=args.measure or args.budget is not None,
+            budget=args.budget,
+            verbatim=args.verbatim,
+            layout=args.layout,
+            lazy=args.lazy,
+            git=args.git,
+            slimming=slim_patterns(args.slim, args.slim_drop),
+            slimming_keep=args.slim_keep,
+            platform=args.target_platform,
+            python=args.target_python,
         )
     except Exception as ex:
         print(f'ERROR: {ex}')
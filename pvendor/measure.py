@@ -0,0 +1,80 @@
+import re
+import sys
+from os import walk
+from pathlib import Path, PurePosixPath
+from subprocess import PIPE, run
+from typing import Dict, List, Optional
+from zipfile import ZipFile
+
+
+def _measure_import(path: str, module: str):
+    # import module in a fresh interpreter, without writing bytecode to the vendored folder
+    code = f'import sys; sys.path.insert(0, {path!r}); import {module}'
+    result = run([sys.executable, '-I', '-B', '-X', 'importtime', '-c', code], stderr=PIPE, check=False)
+    lines = result.stderr.decode('utf-8', errors='replace').splitlines()
+
+    if result.returncode != 0:
+        return None, lines[-1] if lines else 'import failed'
+
+    # parse lines like "import time:       123 |        456 | package.module"
+    times: Dict[str, int] = {}
+    for line in lines:
+        m = re.match(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.*)$', line)
+        if m:
+            times[m.group(3).strip()] = int(m.group(2))
+
+    count = len([name for name in times if name == module or name.startswith(module + '.')])
+    return (times.get(module, 0) / 1000, count), None
+
+
+def _measure_size(target: Path, zip_: Optional[Path], name: str):
+    if zip_:
+        prefix = PurePosixPath(*target.parts, name).as_posix()
+        with ZipFile(zip_) as handle:
+            return sum(info.file_size
+                       for info in handle.infolist()
+                       if info.filename.startswith(prefix + '/') or info.filename == prefix + '.py')
+
+    if target.joinpath(name + '.py').is_file():
+        return target.joinpath(name + '.py').stat().st_size
+
+    return sum(
+        Path(folder).joinpath(file).stat().st_size
+        for folder, _, files in walk(target.joinpath(name))
+        for file in files)
+
+
+def measure_imports(target: Path, zip_: Optional[Path], modules: List[str], budget: Optional[float]):
+    # the vendor folder is imported as top-level package
+    if zip_:
+        path = '/'.join([str(zip_)] + list(target.parent.parts))
+    else:
+        path = str(target.parent.resolve())
+
+    results = []
+
+    for name in modules:
+        module = f'{target.name}.{name}'
+        print(f'Measuring import of {module}...')
+
+        measurement, error = _measure_import(path, module)
+        if error:
+            print(f'Warning: {module} could not be imported: {error}')
+            continue
+
+        duration, count = measurement
+        size = _measure_size(target, zip_, name)
+        results.append((name, duration, count, size))
+
+    # print report, slowest first
+    results.sort(key=lambda result: result[1], reverse=True)
+
+    print('Import time of vendored modules:')
+    for name, duration, count, size in results:
+        print(f'  {name:<30} {duration:>10.1f} ms {count:>6} modules {size / 1024:>10.1f} KiB')
+
+    # check budget
+    if budget is not None:
+        exceeded = [name for name, duration, _, _ in results if duration > budget]
+        if exceeded:
+            raise ValueError(f'import time budget of {budget} ms exceeded by {", ".join(exceeded)}')
@@ -1,15 +1,28 @@
+from contextlib import ExitStack
 from os import listdir, makedirs, walk
-from pathlib import Path
-from shutil import copy
+from pathlib import Path, PurePosixPath
+from shutil import copy2, copytree
 from subprocess import check_call
 from tempfile import mkdtemp
-from typing import List
+from typing import Dict, List, Optional
+from zipfile import ZipFile
 
-from pdistx.utils.path import fnmatch_any, rmpath
-from pdistx.utils.source import write_source
-from pdistx.utils.zip import zipit
+from pdistx.utils.archive import SourceArchive, is_source_archive
+from pdistx.utils.compile import compile_bytecode
+from pdistx.utils.git import git_source_files
+from pdistx.utils.member import FileMember, ZipMember, copy_member, top_level_name
+from pdistx.utils.path import fnmatch_any, rmpath, rmpath_background, staging_folder, swap_paths
+from pdistx.utils.pipeline import Writer, prefetch
+from pdistx.utils.prefilter import has_identifier, identifier_pattern
+from pdistx.utils.source import decode_source, format_source, read_source, write_source
+from pdistx.utils.splice import strip_comments
+from pdistx.utils.zip import ZipWriter, zipit
 
-from .transform import import_transform
+from .measure import measure_imports
+from .prune import prune_unreachable
+from .slim import slim_members
+from .transform import import_transform_code
+from .wheel import list_wheels, wheel_members, wheel_modules
 
 
 def perform(
@@ -19,13 +32,36 @@ def perform(
     target: Path,
     keep: List[str],
     zip_: Path,
+    *,
+    wheels: List[Path],
+    tree_shake: Path,
+    tree_shake_keep: List[str],
+    compile_: List[str],
+    optimizations: List[int],
+    sourceless: bool,
+    measure: bool,
+    budget: float,
+    verbatim: bool,
+    layout: bool,
+    lazy: List[str],
+    git: bool,
+    slimming: List[str],
+    slimming_keep: List[str],
+    platform: Optional[str],
+    python: Optional[str],
 ):
     # ensure pre-conditions
     for requirement in requirements:
         assert requirement.is_file(), 'requirements.txt is expected to be a file'
 
     for source in sources:
-        assert source.is_dir(), 'source path is expected to be a directory'
+        assert source.is_dir() or is_source_archive(source), 'source path is expected to be a directory or an archive'
+
+    for wheel in wheels:
+        assert wheel.is_file() or wheel.is_dir(), 'wheel path is expected to be a file or directory'
+
+    if tree_shake:
+        assert tree_shake.is_dir(), 'tree shaking root is expected to be a directory'
 
     if zip_:
         assert not target.is_absolute(), 'target path is expected to be relative'
@@ -33,9 +69,29 @@ def perform(
     # list of temporary files and folders
     tmps: List[Path] = []
 
+    # wheel files and source archives opened for reading (instead of extracting them), which are closed at the end
+    stack = ExitStack()
+    handles: Dict[Path, ZipFile] = {}
+    archives: Dict[Path, SourceArchive] = {}
+
+    # folder the outputs are written to first
+    staging = None
+
     # temporary paths get cleaned automatically at the end of this block
     try:
 
+        # wheels given as source are read the same way as other wheels (including their purelib and platlib files)
+        wheels = wheels + [source for source in sources if source.is_file() and source.suffix == '.whl']
+        sources = [source for source in sources if source not in wheels]
+
+        for source in sources:
+            if not source.is_dir():
+                archives[source] = stack.enter_context(SourceArchive(source, False))
+
+        # files of the source folders listed by git (instead of walking them)
+        listings = {source: git_source_files(source, []) for source in sources if source.is_dir()} if git else {}
+        listings.update({source: archive.files([]) for source, archive in archives.items()})
+
         # detect requirements.txt in target folder
         if not zip_:
             requirement = target.joinpath('requirements.txt')
@@ -56,38 +112,23 @@ def perform(
                 str(install_folder)
             ])
 
-        # clean target folder
-        if zip_:
-            print(f'Purging {zip_}...')
-            rmpath(zip_)
-        else:
-            print(f'Purging {target}...')
-            if target.is_dir():
-                # if target is not a zip, remove all except the entries to be kept
-                if not zip_:
-                    for name in listdir(target):
-                        if not fnmatch_any(name, keep):
-                            path = target.joinpath(name)
-                            rmpath(path)
-
-                # if target is a zip, remove entire folder
-                else:
-                    rmpath(target)
-            else:
-                # remove an existing target file in any case
-                rmpath(target)
-
         # build dictionary of modules
         # pylint: disable=unsubscriptable-object
         modules: dict[str, Path] = {}
+        module_files: Dict[Path, List[PurePosixPath]] = {}
 
         for source in sources:
-            for entry in listdir(source):
+            listing = listings.get(source)
+            entries = listdir(source) if listing is None else sorted({path.parts[0] for path in listing})
+            folders = {path.parts[0] for path in listing if len(path.parts) > 1} if listing is not None else set()
+
+            for entry in entries:
                 # detect module name
                 name = None
                 path = source.joinpath(entry)
+                folder = path.is_dir() or entry in folders
 
-                if path.is_dir():
+                if folder:
                     if fnmatch_any(entry, ['*.dist-info', '*.egg-info', 'bin', '__pycache__', '.git']):
                         continue
                     name = entry
@@ -105,56 +146,235 @@ def perform(
                 # add to dictionary
                 modules[name] = path
 
+                if listing is not None and folder:
+                    module_files[path] = [PurePosixPath(*file.parts[1:]) for file in listing if file.parts[0] == entry]
+
+        # wheels are read directly without installing them first
+        for wheel in [wheel for path in wheels for wheel in list_wheels(path)]:
+            handle = stack.enter_context(ZipFile(wheel))
+            handles[wheel] = handle
+
+            for name in wheel_modules(handle):
+                if name in modules:
+                    print(f'Warning: multiple copies of {name} detected, skipping redundant one!')
+                    continue
+
+                modules[name] = wheel
+
+        # list all files of all modules
+        members = [
+            member for name, source in modules.items()
+            for member in _list_members(name, source, handles, module_files.get(source), archives.get(source.parent))
+        ]
+
+        # drop everything not needed at runtime or on the target platform
+        members = slim_members(members, slimming, slimming_keep, platform, python)
+
+        # drop everything unreachable from the host project
+        if tree_shake:
+            print(f'Tree shaking modules not imported by {tree_shake}...')
+            members = prune_unreachable(members, list(modules.keys()), tree_shake, target, tree_shake_keep)
+
+        # outputs are written to a staging folder and moved into place at the end (instead of purging them first)
+        output = zip_ if zip_ else target
+        staging = staging_folder(output.parent)
+
+        # files are written into the zip file directly, unless they get compiled (which requires them to be written to
+        # a folder first)
+        stream = zip_ is not None and not compile_
+
         # create target path
-        if zip_:
+        if stream:
+            intermediate = None
+        elif zip_:
             intermediate = Path(mkdtemp())
             tmps.append(intermediate)
         else:
-            makedirs(target, exist_ok=True)
-            intermediate = target
-
-        # copy and transform all module files
-        for name, source in modules.items():
-            print(f'Processing {name} from {source}...')
-
-            # handle directory case
-            if source.is_dir():
-                for source_folder, folders, files in walk(source, followlinks=True):
-                    # filter entries to be ignored (folders need to be modified in-place to take effect for os.walk)
-                    folders[:] = [folder for folder in folders if not fnmatch_any(folder, ['__pycache__', '.git'])]
-                    files = [file for file in files if not fnmatch_any(file, ['*.pyc'])]
-
-                    # ensure sub target directory exists
-                    source_folder = Path(source_folder)
-                    package_folder = source_folder.relative_to(source)
-                    target_folder = intermediate.joinpath(name, package_folder)
-                    makedirs(target_folder, exist_ok=True)
-
-                    # transform or copy files
-                    level = len(package_folder.parts) + 1
-
-                    for file in files:
-                        source_file = source_folder.joinpath(file)
-                        target_file = target_folder.joinpath(file)
-
-                        if file.endswith('.py'):
-                            import_transform(source_file, target_file, level, list(modules.keys()))
-                        else:
-                            copy(source_file, target_file, follow_symlinks=True)
-
-            # handle file case
+            intermediate = staging.joinpath(target.name)
+            makedirs(intermediate, exist_ok=True)
+
+        # files not referencing any vendored module are not transformed at all
+        pattern = identifier_pattern(modules.keys())
+        fast = 0
+
+        def _read(member) -> Optional[bytes]:
+            return member.read() if stream or member.path.suffix == '.py' else None
+
+        # init file of the target folder (empty, unless modules are imported lazily)
+        init_code = vendor_init_code(list(modules.keys()), lazy)
+
+        # copy and transform all module files, modules are read ahead and files written by threads
+        with ExitStack() as outputs:
+            if stream:
+                # members are written in sorted order, so the same files result in the same zip file
+                archive = outputs.enter_context(ZipWriter(staging.joinpath(zip_.name), zip_))
+                archive.write(target.joinpath('__init__.py').as_posix(), format_source(init_code).encode('utf-8'))
+                members = sorted(members, key=lambda member: member.path)
             else:
-                import_transform(source, intermediate.joinpath(name + '.py'), 1, list(modules.keys()))
+                writer = outputs.enter_context(Writer())
+                write_source(intermediate.joinpath('__init__.py'), init_code)
+
+            for member, data in prefetch(members, _read):
+                # copy file
+                if member.path.suffix != '.py':
+                    if stream:
+                        archive.write(target.joinpath(*member.path.parts).as_posix(), data)
+                    else:
+                        writer.submit(copy_member, member, intermediate.joinpath(*member.path.parts))
+                    continue
+
+                # transform file
+                level = len(member.path.parts) - 1
+                transform = has_identifier(pattern, data)
+                fast += 0 if transform else 1
+
+                code = vendor_code(data, level, list(modules.keys()), transform, verbatim, layout)
 
-        # create empty init file in target folder
-        write_source(intermediate.joinpath('__init__.py'), '')
+                if stream and code is not None:
+                    data = format_source(code, sanitize=False, layout=layout).encode('utf-8')
 
-        # zip temporary target path to actual target path
+                if stream:
+                    archive.write(target.joinpath(*member.path.parts).as_posix(), data)
+                else:
+                    writer.submit(_write, intermediate.joinpath(*member.path.parts), data, code, layout)
+
+        total = len([member for member in members if member.path.suffix == '.py'])
+        print(f'{fast} of {total} modules need no transformation')
+
+        # compile to bytecode
+        if compile_:
+            destination = zip_.joinpath(target) if zip_ else target
+            compile_bytecode(intermediate, compile_, optimizations, sourceless, zip_ is not None, destination)
+
+        # zip temporary target path to actual target path (unless written into the zip file directly)
         if zip_:
-            zipit(intermediate, zip_, target)
+            # unchanged members of the previous zip file are copied without recompressing them
+            reused = archive.reused if stream else zipit(intermediate, staging.joinpath(zip_.name), target, zip_)
+            if reused:
+                print(f'Reused {reused} unchanged members of {zip_}')
+
+        # entries to be kept are taken over from the previous target folder
+        elif target.is_dir():
+            for name in listdir(target):
+                if fnmatch_any(name, keep) and not intermediate.joinpath(name).exists():
+                    path = target.joinpath(name)
+                    if path.is_dir():
+                        copytree(path, intermediate.joinpath(name), symlinks=True)
+                    else:
+                        copy2(path, intermediate.joinpath(name))
+
+        # replace previous output
+        print(f'Replacing {output}...')
+        swap_paths(staging, [output])
+
+        # measure import time of vendored modules
+        if measure:
+            measure_imports(target, zip_, list(modules.keys()), budget)
 
     finally:
+        # close wheel files and archives
+        stack.close()
+
         # clean up temporary folders
         for path in tmps:
             print(f'Purging {path}...')
             rmpath(path)
+
+        # the staging folder contains the previous output or a partial one
+        if staging:
+            rmpath_background(staging)
+
+
+def vendor_code(data: bytes, level: int, modules: List[str], transform: bool, verbatim: bool,
+                layout: bool) -> Optional[str]:
+    # code of a vendored module, or None if the module is copied as is
+    if transform:
+        code = decode_source(data, sanitize=not layout)
+        return import_transform_code(code, level, modules, layout)
+
+    if verbatim:
+        return None
+
+    return strip_comments(decode_source(data, sanitize=False)) if layout else decode_source(data)
+
+
+def vendor_init_code(modules: List[str], lazy: List[str]) -> str:
+    if not lazy:
+        return ''
+
+    for name in lazy:
+        if name not in modules:
+            raise ValueError(f'{name} is expected to be a vendored top-level module to be imported lazily')
+
+    # create init file
+    code = read_source(Path(__file__).parent.joinpath('template.py')).split('\n')
+
+    injected_lazy = 0
+
+    for i in range(len(code)):
+        if '__lazy__ = []' == code[i]:
+            code[i] = '__lazy__ = ' + repr(sorted(set(lazy)))
+            injected_lazy += 1
+
+    if injected_lazy != 1:
+        raise RuntimeError('inconsistent code template')
+
+    return '\n'.join(code)
+
+
+def _write(target_file: Path, data: bytes, code: Optional[str], layout: bool):
+    makedirs(target_file.parent, exist_ok=True)
+
+    if code is None:
+        with open(target_file, 'wb') as file:
+            file.write(data)
+    else:
+        write_source(target_file, code, sanitize=False, layout=layout)
+
+
+def _list_members(
+    name: str,
+    source: Path,
+    handles: Dict[Path, ZipFile],
+    files: Optional[List[PurePosixPath]],
+    archive: Optional[SourceArchive],
+):
+    print(f'Processing {name} from {source}...')
+
+    # handle archive case (the archive is kept open until all members are processed)
+    if archive is not None:
+        if files is None:
+            yield archive.member(PurePosixPath(source.name), PurePosixPath(name + '.py'))
+        else:
+            for file in files:
+                yield archive.member(PurePosixPath(source.name, *file.parts), PurePosixPath(name, *file.parts))
+
+    # handle directory case, which has been listed by git already
+    elif source.is_dir() and files is not None:
+        for file in files:
+            yield FileMember(PurePosixPath(name, *file.parts), source.joinpath(*file.parts))
+
+    # handle directory case
+    elif source.is_dir():
+        for source_folder, folders, filenames in walk(source, followlinks=True):
+            # filter entries to be ignored (folders need to be modified in-place to take effect for os.walk)
+            folders[:] = [folder for folder in folders if not fnmatch_any(folder, ['__pycache__', '.git'])]
+            filenames = [filename for filename in filenames if not fnmatch_any(filename, ['*.pyc'])]
+
+            source_folder = Path(source_folder)
+            package_folder = PurePosixPath(name, *source_folder.relative_to(source).parts)
+
+            for file in filenames:
+                yield FileMember(package_folder.joinpath(file), source_folder.joinpath(file))
+
+    # handle wheel case (the zip file is kept open by perform until all members are processed)
+    elif source.suffix == '.whl':
+        handle = handles[source]
+        for path, info in wheel_members(handle):
+            # only extract the members of the current module
+            if top_level_name(path) == name:
+                yield ZipMember(path, handle, info)
+
+    # handle file case
+    else:
+        yield FileMember(PurePosixPath(name + '.py'), source)
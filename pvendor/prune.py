@@ -0,0 +1,121 @@
+from os import walk
+from pathlib import Path, PurePosixPath
+from typing import List, Optional, Set
+
+from pdistx.utils.imports import collect_imports
+from pdistx.utils.member import filter_members
+from pdistx.utils.path import fnmatch_any
+from pdistx.utils.source import decode_source, read_source
+
+
+def member_module(path: PurePosixPath) -> Optional[str]:
+    # python modules and packages
+    if path.suffix == '.py':
+        parts = list(path.parts[:-1]) + ([] if path.name == '__init__.py' else [path.stem])
+        return '.'.join(parts)
+
+    # extension modules, e.g. _speedups.cpython-39-x86_64-linux-gnu.so or _speedups.pyd
+    if path.suffix in ['.so', '.pyd']:
+        return '.'.join(list(path.parts[:-1]) + [path.name.split('.')[0]])
+
+    return None
+
+
+def _strip_prefix(name: str, prefix: List[str]) -> Optional[str]:
+    parts = name.split('.')
+    if len(parts) > len(prefix) and parts[:len(prefix)] == prefix:
+        return '.'.join(parts[len(prefix):])
+    return None
+
+
+def host_imports(host: Path, target: Path, modules: List[str]) -> Set[str]:
+    # determine the package path of the vendor folder within the host project
+    try:
+        prefix = list(target.resolve().relative_to(host.resolve()).parts)
+    except ValueError:
+        prefix = list(target.parts)
+
+    imports: Set[str] = set()
+
+    for source_folder, folders, files in walk(host, followlinks=True):
+        source_folder = Path(source_folder)
+
+        # the vendor folder itself is not part of the host code
+        folders[:] = [
+            folder for folder in folders if not fnmatch_any(folder, ['__pycache__', '.git', '.pdistx-*']) and
+            source_folder.joinpath(folder).resolve() != target.resolve()
+        ]
+
+        for file in files:
+            if not file.endswith('.py'):
+                continue
+
+            package = list(source_folder.relative_to(host).parts)
+            names, _ = collect_imports(read_source(source_folder.joinpath(file)), package)
+
+            for name in names:
+                # imports of the vendor package (relative or including the host package name)
+                for candidate in [_strip_prefix(name, prefix), _strip_prefix(name, [host.name] + prefix), name]:
+                    if candidate and candidate.split('.')[0] in modules:
+                        imports.add(candidate)
+
+    return imports
+
+
+def prune_unreachable(members: list, modules: List[str], host: Path, target: Path, keep: List[str]) -> list:
+    # index all modules
+    index = {}
+
+    for member in members:
+        name = member_module(member.path)
+        if name is not None:
+            index[name] = member
+
+    # roots are the imports of the host project and all modules to be kept
+    pending = host_imports(host, target, modules)
+    pending |= {name for name in index for k in keep if name == k or name.startswith(k + '.')}
+
+    # follow the import graph
+    reachable: Set[str] = set()
+
+    while pending:
+        name = pending.pop()
+
+        # importing a module imports all of its parent packages
+        parts = name.split('.')
+        for i in range(1, len(parts) + 1):
+            parent = '.'.join(parts[0:i])
+
+            if parent in reachable or parent.split('.', 1)[0] not in modules:
+                continue
+
+            reachable.add(parent)
+
+            member = index.get(parent)
+            if member is None or member.path.suffix != '.py':
+                continue
+
+            package = parent.split('.') if member.path.name == '__init__.py' else parent.split('.')[:-1]
+            names, has_dynamic_import = collect_imports(decode_source(member.read()), package)
+
+            if has_dynamic_import:
+                print(f'Warning: {parent} uses dynamic imports, consider keeping required submodules explicitly!')
+
+            pending |= {name for name in names if name.split('.')[0] in modules} - reachable
+
+    # folders containing python files belong to the package hierarchy, others are plain data folders
+    packages: Set[PurePosixPath] = {member.path.parent for member in members if member_module(member.path)}
+
+    def _keep(member) -> bool:
+        name = member_module(member.path)
+        if name is not None:
+            return name in reachable
+
+        # data files belong to their closest package
+        folder = member.path.parent
+        while folder not in packages and folder != PurePosixPath('.'):
+            folder = folder.parent
+
+        return '.'.join(folder.parts) in reachable
+
+    return filter_members(members, _keep, 'Tree shaking')
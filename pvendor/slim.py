@@ -0,0 +1,88 @@
+import re
+from pathlib import PurePosixPath
+from typing import List, Optional, Tuple
+
+from pdistx.utils.member import filter_members
+from pdistx.utils.path import fnmatch_any
+from pvariant.target import PLATFORMS, parse_version
+
+# files and folders, which are not needed at runtime (glob patterns matching names of files or folders, patterns
+# containing a slash match paths of files or folders, e.g. numpy/doc)
+_RUNTIME = ['tests', 'test', 'docs', 'doc', 'examples', 'benchmarks', '*.pyi', 'py.typed']
+_SOURCES = ['*.c', '*.cpp', '*.h', '*.hpp', '*.pyx', '*.pxd', '*.pxi']
+
+PROFILES = {
+    'none': [],
+    'default': _RUNTIME,
+    'strict': _RUNTIME + _SOURCES,
+}
+
+# python tag of extension modules, e.g. _speedups.cpython-311-x86_64-linux-gnu.so or _speedups.cp311-win_amd64.pyd
+_PYTHON_TAG = re.compile(r'\.(?:cpython-|cp)(\d)(\d+)')
+
+
+def slim_patterns(profile: str, drop: List[str]) -> List[str]:
+    if profile not in PROFILES:
+        raise ValueError(f'{profile} is expected to be one of the slimming profiles {", ".join(PROFILES)}')
+    return PROFILES[profile] + drop
+
+
+def _matches(path: PurePosixPath, patterns: List[str]) -> bool:
+    names = [pattern for pattern in patterns if '/' not in pattern]
+    paths = [pattern for pattern in patterns if '/' in pattern]
+
+    if fnmatch_any(path.name, names) or any(fnmatch_any(part, names) for part in path.parts[1:-1]):
+        return True
+
+    return any(fnmatch_any(parent.as_posix(), paths) for parent in [path] + list(path.parents)[:-1])
+
+
+def _binary_platforms(name: str) -> Optional[List[str]]:
+    # platforms a binary can be loaded on, shared libraries without platform tag are used by linux and darwin
+    name = name.lower()
+
+    if name.endswith('.pyd') or name.endswith('.dll'):
+        return ['win32']
+
+    if name.endswith('.dylib'):
+        return ['darwin']
+
+    if name.endswith('.so') or '.so.' in name:
+        if 'darwin' in name:
+            return ['darwin']
+        if 'linux' in name:
+            return ['linux']
+        return ['linux', 'darwin']
+
+    return None
+
+
+def _foreign_binary(path: PurePosixPath, platform: Optional[str], python: Optional[Tuple[int, ...]]) -> bool:
+    platforms = _binary_platforms(path.name)
+    if platforms is None:
+        return False
+
+    if platform and platform not in platforms:
+        return True
+
+    tag = _PYTHON_TAG.search(path.name)
+    return python is not None and tag is not None and (int(tag.group(1)), int(tag.group(2)))[0:len(python)] != python
+
+
+def slim_members(members: list, patterns: List[str], keep: List[str], platform: Optional[str],
+                 python: Optional[str]) -> list:
+    # remove files and folders not needed at runtime and binaries of other platforms or python versions
+    if platform and platform not in PLATFORMS:
+        raise ValueError(f'{platform} is expected to be one of the platforms {", ".join(PLATFORMS)}')
+
+    version = parse_version(python, 2) if python else None
+
+    if not patterns and not platform and version is None:
+        return members
+
+    def _keep(member) -> bool:
+        if keep and _matches(member.path, keep):
+            return True
+        return not _matches(member.path, patterns) and not _foreign_binary(member.path, platform, version)
+
+    return filter_members(members, _keep, 'Slimming')
@@ -0,0 +1,32 @@
+import sys as _sys
+from importlib.util import LazyLoader as _LazyLoader
+from importlib.util import find_spec as _find_spec
+from importlib.util import module_from_spec as _module_from_spec
+
+# lazy modules will be injected here
+__lazy__ = []
+
+
+# vendored modules, which are imported lazily, get bound as proxy module on first access of the vendor package attribute
+# (e.g. by "from .vendor import module"), the proxy executes the actual module on first access of one of its attributes
+# see https://peps.python.org/pep-0562/ and https://docs.python.org/3/library/importlib.html#implementing-lazy-imports
+def __getattr__(name):
+    if name not in __lazy__:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+    fullname = __name__ + '.' + name
+    module = _sys.modules.get(fullname)
+
+    if module is None:
+        spec = _find_spec(fullname)
+        spec.loader = _LazyLoader(spec.loader)
+        module = _module_from_spec(spec)
+        _sys.modules[fullname] = module
+        spec.loader.exec_module(module)
+
+    globals()[name] = module
+    return module
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__lazy__))
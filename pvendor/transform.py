@@ -2,7 +2,9 @@ import ast
 from pathlib import Path
 from typing import List
 
+from pdistx.utils.fused import FusedRule
 from pdistx.utils.source import (ast_parse, ast_unparse, read_source, write_source)
+from pdistx.utils.splice import snapshot, splice_source
 
 
 class _ImportNameStringTransform(ast.NodeTransformer):
@@ -30,36 +32,46 @@ class _ImportNameStringTransform(ast.NodeTransformer):
         if isinstance(node.value, str):
             if node.value.split('.')[0] in self._modules:
                 self.string_rewrite_applied = True
+
+                # "__package__.split('.')" or "__package__.split('.')[:-level]"
+                package = ast.Call(
+                    func=ast.Attribute(
+                        value=ast.Name(id='__package__', ctx=ast.Load()),
+                        attr='split',
+                        ctx=ast.Load(),
+                    ),
+                    args=[ast.Constant(value='.')],
+                    keywords=[],
+                )
+
+                if self._level > 0:
+                    package = ast.Subscript(
+                        value=package,
+                        slice=ast.Slice(upper=ast.UnaryOp(
+                            op=ast.USub(),
+                            operand=ast.Constant(value=self._level),
+                        )),
+                        ctx=ast.Load(),
+                    )
+
                 return ast.Call(
                     func=ast.Attribute(value=ast.Constant(value='.'), attr='join', ctx=ast.Load()),
-                    args=[
-                        ast.BinOp(
-                            left=ast.Subscript(
-                                value=ast.Call(
-                                    func=ast.Attribute(
-                                        value=ast.Name(id='__package__', ctx=ast.Load()),
-                                        attr='split',
-                                        ctx=ast.Load(),
-                                    ),
-                                    args=[ast.Constant(value='.')],
-                                    keywords=[],
-                                ),
-                                slice=ast.Slice(upper=ast.UnaryOp(
-                                    op=ast.USub(),
-                                    operand=ast.Constant(value=self._level),
-                                )),
-                                ctx=ast.Load(),
-                            ),
-                            op=ast.Add(),
-                            right=ast.List(elts=[node], ctx=ast.Load()),
-                        )
-                    ],
+                    args=[ast.BinOp(
+                        left=package,
+                        op=ast.Add(),
+                        right=ast.List(elts=[node], ctx=ast.Load()),
+                    )],
                     keywords=[],
                 )
 
         return node
 
 
+def _is_import_name_constant(modules, name):
+    return isinstance(name, ast.Constant) and isinstance(name.value, str) and \
+        not name.value.startswith('.') and name.value.split('.')[0] in modules
+
+
 def _transform_import_name_string(level, modules, name):
     visitor = _ImportNameStringTransform(level, modules)
     name = visitor.visit(name)
@@ -68,7 +80,7 @@ def _transform_import_name_string(level, modules, name):
     return name
 
 
-class ImportTransform(ast.NodeTransformer):
+class ImportTransform(FusedRule, ast.NodeTransformer):
 
     def __init__(self, level, modules):
         self._level = level
@@ -86,59 +98,17 @@ class ImportTransform(ast.NodeTransformer):
                 nodes.append(ast.Import([name]))
                 continue
 
-            # Perform an absolute import with "__import__" to ensure nested imports are solved properly
-            nodes.append(
-                ast.Expr(value=ast.Call(
-                    func=ast.Name(id='__import__', ctx=ast.Load()),
-                    args=[
-                        ast.Call(
-                            func=ast.Attribute(value=ast.Constant(value='.'), attr='join', ctx=ast.Load()),
-                            args=[
-                                ast.BinOp(
-                                    left=ast.Subscript(
-                                        value=ast.Call(
-                                            func=ast.Attribute(
-                                                value=ast.Name(id='__package__', ctx=ast.Load()),
-                                                attr='split',
-                                                ctx=ast.Load(),
-                                            ),
-                                            args=[ast.Constant(value='.')],
-                                            keywords=[],
-                                        ),
-                                        slice=ast.Slice(upper=ast.UnaryOp(
-                                            op=ast.USub(),
-                                            operand=ast.Constant(value=self._level),
-                                        )),
-                                        ctx=ast.Load(),
-                                    ),
-                                    op=ast.Add(),
-                                    right=ast.List(elts=[ast.Constant(value=name.name)], ctx=ast.Load()),
-                                )
-                            ],
-                            keywords=[],
-                        ),
-                        ast.Call(func=ast.Name(id='globals', ctx=ast.Load()), args=[], keywords=[]),
-                        ast.Call(func=ast.Name(id='locals', ctx=ast.Load()), args=[], keywords=[]),
-                        ast.List(elts=[], ctx=ast.Load()),
-                        ast.Constant(value=0),
-                    ],
-                    keywords=[],
-                )))
-
-            # Rewrite "import abc.def" to "from .. import abc"
-            if not name.asname:
+            # Rewrite "import abc" to "from .. import abc"
+            if '.' not in name.name and not name.asname:
                 nodes.append(
                     ast.ImportFrom(
                         module=None,
-                        names=[ast.alias(
-                            name=name.name.split('.')[0],
-                            asname=None,
-                        )],
+                        names=[ast.alias(name=name.name, asname=None)],
                         level=self._level + 1,
                     ))
 
             # Rewrite "import abc.def as xyz" to "from ..abc import def as xyz"
-            else:
+            elif name.asname:
                 nodes.append(
                     ast.ImportFrom(
                         module='.'.join(name.name.split('.')[:-1]),
@@ -149,6 +119,31 @@ class ImportTransform(ast.NodeTransformer):
                         level=self._level + 1,
                     ))
 
+            # Rewrite "import abc.def" to "__import__('abc.def', globals(), locals(), [], 2)" and "from .. import abc"
+            # NOTE: the relative "__import__" ensures nested modules are imported, while the package name is static
+            else:
+                nodes.append(
+                    ast.Expr(value=ast.Call(
+                        func=ast.Name(id='__import__', ctx=ast.Load()),
+                        args=[
+                            ast.Constant(value=name.name),
+                            ast.Call(func=ast.Name(id='globals', ctx=ast.Load()), args=[], keywords=[]),
+                            ast.Call(func=ast.Name(id='locals', ctx=ast.Load()), args=[], keywords=[]),
+                            ast.List(elts=[], ctx=ast.Load()),
+                            ast.Constant(value=self._level + 1),
+                        ],
+                        keywords=[],
+                    )))
+                nodes.append(
+                    ast.ImportFrom(
+                        module=None,
+                        names=[ast.alias(
+                            name=name.name.split('.')[0],
+                            asname=None,
+                        )],
+                        level=self._level + 1,
+                    ))
+
         return nodes
 
     # pylint: disable=pylint(invalid-name)
@@ -198,6 +193,20 @@ class ImportTransform(ast.NodeTransformer):
                     # we support level 0 only
                     if isinstance(arg_level, ast.Constant) and arg_level.value == 0:
 
+                        # rewrite to a relative import of a constant name (globals are used to resolve the package)
+                        if _is_import_name_constant(self._modules, arg_name):
+                            return ast.Call(
+                                func=node.func,
+                                args=[
+                                    arg_name,
+                                    ast.Call(func=ast.Name(id='globals', ctx=ast.Load()), args=[], keywords=[]),
+                                    arg_locals,
+                                    arg_fromlist,
+                                    ast.Constant(value=self._level + 1),
+                                ],
+                                keywords=[],
+                            )
+
                         # transform name argument
                         arg_name = _transform_import_name_string(self._level, self._modules, arg_name)
 
@@ -227,6 +236,17 @@ class ImportTransform(ast.NodeTransformer):
                     arg_name = kwargs['name'] if 'name' in kwargs else arg_name
                     arg_package = kwargs['package'] if 'package' in kwargs else arg_package
 
+                    # rewrite to a relative import of a constant name
+                    if _is_import_name_constant(self._modules, arg_name):
+                        return ast.Call(
+                            func=node.func,
+                            args=[
+                                ast.Constant(value='.' * (self._level + 1) + arg_name.value),
+                                ast.Name(id='__package__', ctx=ast.Load()),
+                            ],
+                            keywords=[],
+                        )
+
                     # transform name argument
                     arg_name = _transform_import_name_string(self._level, self._modules, arg_name)
 
@@ -241,16 +261,21 @@ class ImportTransform(ast.NodeTransformer):
         return node
 
 
+def import_transform_code(source: str, level: int, modules: List[str], layout: bool = False):
+    tree = ast_parse(source)
+    original = snapshot(tree) if layout else None
+    tree = ImportTransform(level, modules).visit(tree)
+    tree = ast.fix_missing_locations(tree)
+    return splice_source(source, tree, original) if layout else ast_unparse(tree)
+
+
 def import_transform(source_path: Path, target_path: Path, level: int, modules: List[str]):
 
     # read file
     source = read_source(source_path)
 
     # transform
-    tree = ast_parse(source)
-    tree = ImportTransform(level, modules).visit(tree)
-    tree = ast.fix_missing_locations(tree)
-    target = ast_unparse(tree)
+    target = import_transform_code(source, level, modules)
 
     # write file
     write_source(target_path, target)
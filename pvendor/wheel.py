@@ -0,0 +1,52 @@
+from pathlib import Path, PurePosixPath
+from typing import Iterator, List, Tuple
+from zipfile import ZipFile, ZipInfo
+
+from pdistx.utils.member import top_level_name
+from pdistx.utils.path import fnmatch_any
+
+
+def list_wheels(path: Path) -> List[Path]:
+    # a wheelhouse folder provides all of its wheel files
+    if path.is_dir():
+        return sorted(path.glob('*.whl'))
+    return [path]
+
+
+def wheel_members(handle: ZipFile) -> Iterator[Tuple[PurePosixPath, ZipInfo]]:
+    for info in handle.infolist():
+        if info.is_dir():
+            continue
+
+        path = PurePosixPath(info.filename)
+
+        # the purelib and platlib schemes are installed into the library root as well
+        # see https://packaging.python.org/en/latest/specifications/binary-distribution-format/
+        if fnmatch_any(path.parts[0], ['*.data']):
+            if len(path.parts) < 3 or path.parts[1] not in ['purelib', 'platlib']:
+                continue
+            path = PurePosixPath(*path.parts[2:])
+
+        # skip metadata, scripts and compiled files
+        if fnmatch_any(path.parts[0], ['*.dist-info', 'bin']):
+            continue
+
+        if fnmatch_any(path.name, ['*.pyc']) or '__pycache__' in path.parts:
+            continue
+
+        # skip non-module files in the library root
+        if len(path.parts) == 1 and path.suffix != '.py':
+            continue
+
+        yield path, info
+
+
+def wheel_modules(handle: ZipFile) -> List[str]:
+    names: List[str] = []
+
+    for path, _ in wheel_members(handle):
+        name = top_level_name(path)
+        if name not in names:
+            names.append(name)
+
+    return names
@@ -0,0 +1,118 @@
+import sys
+
+# avoid having the cwd in the path
+# see https://docs.python.org/3/tutorial/modules.html#the-module-search-path
+if '' in sys.path:
+    sys.path.remove('')
+
+import argparse
+from pathlib import Path
+from traceback import print_tb
+from typing import List
+
+from pverify.process import perform
+
+
+def main(argv: List[str] = sys.argv[1:]):
+
+    parser = argparse.ArgumentParser(prog='pverify')
+
+    parser.add_argument(
+        '-m',
+        dest='module',
+        metavar='module',
+        default=None,
+        help='module to be imported (defaults to the packed file, the package folder or the only top-level module)',
+    )
+
+    parser.add_argument(
+        '-n',
+        dest='runs',
+        metavar='runs',
+        type=int,
+        default=5,
+        help='number of cold and warm imports, each in a fresh interpreter (defaults to 5)',
+    )
+
+    parser.add_argument(
+        '-e',
+        dest='executable',
+        metavar='executable',
+        default=sys.executable,
+        help='python interpreter used for importing (defaults to the current one)',
+    )
+
+    parser.add_argument(
+        '-b',
+        dest='baseline',
+        metavar='baseline',
+        default=None,
+        help='baseline json file to compare with (it gets written, if it does not exist yet)',
+    )
+
+    parser.add_argument(
+        '-u',
+        dest='update',
+        action='store_true',
+        help='update the baseline json file instead of comparing with it',
+    )
+
+    parser.add_argument(
+        '-t',
+        dest='time',
+        metavar='percent',
+        type=float,
+        default=25,
+        help='threshold for cold and warm import time increases (defaults to 25 percent)',
+    )
+
+    parser.add_argument(
+        '-r',
+        dest='rss',
+        metavar='percent',
+        type=float,
+        default=25,
+        help='threshold for peak memory usage increases (defaults to 25 percent)',
+    )
+
+    parser.add_argument(
+        '-s',
+        dest='size',
+        metavar='percent',
+        type=float,
+        default=10,
+        help='threshold for artifact size increases (defaults to 10 percent)',
+    )
+
+    parser.add_argument(
+        'target',
+        help='built output to be verified (folder, zip file or packed python file)',
+    )
+
+    args = parser.parse_args(argv)
+
+    try:
+        perform(
+            Path(args.target),
+            args.module,
+            args.runs,
+            args.executable,
+            Path(args.baseline) if args.baseline else None,
+            args.update,
+            {
+                'cold': args.time,
+                'warm': args.time,
+                'rss': args.rss,
+                'size': args.size,
+            },
+        )
+    except Exception as ex:
+        print(f'ERROR: {ex}')
+        print_tb(ex.__traceback__)
+        sys.exit(1)
+
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
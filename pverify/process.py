@@ -0,0 +1,198 @@
+import json
+from os import listdir, walk
+from pathlib import Path, PurePosixPath
+from shutil import copy2, copytree
+from statistics import median
+from subprocess import PIPE, run
+from tempfile import mkdtemp
+from typing import Dict, List, Optional, Set, Tuple
+from zipfile import ZipFile, is_zipfile
+
+from pdistx.utils.path import rmpath
+
+# import a module and print the import duration (in seconds) and peak memory usage (in bytes) as last line
+_PROBE = '''
+import json, sys, time
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+except ImportError:
+    rss = None
+print()
+print(json.dumps({{'duration': duration, 'rss': rss}}))
+'''
+
+# time differences below this are considered noise (in milliseconds)
+_TIME_NOISE = 1.0
+
+
+def _top_level_modules(names: List[str]) -> Set[str]:
+    modules = set()
+    for name in names:
+        parts = PurePosixPath(name).parts
+        if len(parts) == 1 and parts[0].endswith('.py'):
+            modules.add(parts[0][:-3])
+        elif len(parts) == 2 and parts[1] == '__init__.py':
+            modules.add(parts[0])
+    return modules
+
+
+def _import_path(target: Path, module: Optional[str]) -> Tuple[str, str]:
+    # packed python file
+    if target.is_file() and target.suffix == '.py':
+        return str(target.parent.resolve()), module or target.stem
+
+    # zip file, which is imported via zipimport
+    if target.is_file():
+        assert is_zipfile(target), 'target is expected to be a python file, a zip file or a folder'
+        with ZipFile(target) as handle:
+            names = handle.namelist()
+        path = str(target.resolve())
+
+    # package folder
+    elif target.joinpath('__init__.py').is_file():
+        return str(target.parent.resolve()), module or target.name
+
+    # folder containing packages
+    else:
+        assert target.is_dir(), 'target is expected to be a python file, a zip file or a folder'
+        names = [f'{entry}/__init__.py' if target.joinpath(entry).is_dir() else entry for entry in listdir(target)]
+        path = str(target.resolve())
+
+    if module is None:
+        modules = _top_level_modules(names)
+        if len(modules) != 1:
+            raise ValueError(f'{target} contains {len(modules)} top-level modules, specify the module to be imported')
+        module = modules.pop()
+
+    return path, module
+
+
+def _size(target: Path) -> int:
+    if target.is_file():
+        return target.stat().st_size
+    return sum(Path(folder).joinpath(file).stat().st_size for folder, _, files in walk(target) for file in files)
+
+
+def _copy(target: Path, folder: Path) -> Path:
+    # imports are done on a copy, so written bytecode does not end up in the target
+    copy = folder.joinpath(target.name)
+    if target.is_dir():
+        copytree(target, copy)
+    else:
+        copy2(target, copy)
+    return copy
+
+
+def _measure(executable: str, target: Path, module: Optional[str], write_bytecode: bool) -> dict:
+    # isolated interpreter, bytecode shipped with the target is used in any case
+    path, module = _import_path(target, module)
+    code = _PROBE.format(path=path, module=module)
+    result = run([executable, '-I'] + ([] if write_bytecode else ['-B']) + ['-c', code],
+                 stdout=PIPE,
+                 stderr=PIPE,
+                 check=False)
+
+    if result.returncode != 0:
+        lines = result.stderr.decode('utf-8', errors='replace').splitlines()
+        raise RuntimeError(f'{module} could not be imported: {lines[-1] if lines else "import failed"}')
+
+    return json.loads(result.stdout.decode('utf-8', errors='replace').splitlines()[-1])
+
+
+def _breaches(results: Dict[str, float], baseline: Dict[str, float], thresholds: Dict[str, float]) -> List[str]:
+    breaches = []
+
+    for key, threshold in thresholds.items():
+        value = results.get(key)
+        expected = baseline.get(key)
+
+        # metrics, which are not available on every platform (e.g. peak memory usage on windows)
+        if value is None or expected is None:
+            continue
+
+        limit = expected * (1 + threshold / 100)
+        if key in ['cold', 'warm']:
+            limit = max(limit, expected + _TIME_NOISE)
+
+        if value > limit:
+            breaches.append(f'{key} {value:.1f} exceeds {limit:.1f} (baseline {expected:.1f})')
+
+    return breaches
+
+
+def perform(
+    target: Path,
+    module: Optional[str],
+    runs: int,
+    executable: str,
+    baseline: Optional[Path],
+    update: bool,
+    thresholds: Dict[str, float],
+):
+    # ensure pre-conditions
+    assert target.exists(), 'target does not exist'
+    assert runs > 0, 'runs are expected to be positive'
+
+    _, name = _import_path(target, module)
+
+    # list of temporary folders
+    tmps: List[Path] = []
+
+    # temporary paths get cleaned automatically at the end of this block
+    try:
+
+        # cold imports, no bytecode gets written
+        print(f'Measuring {runs} cold imports of {name}...')
+        tmps.append(Path(mkdtemp()))
+        cold_target = _copy(target, tmps[-1])
+        cold = [_measure(executable, cold_target, module, False) for _ in range(runs)]
+
+        # warm imports, bytecode is written by an initial import
+        print(f'Measuring {runs} warm imports of {name}...')
+        tmps.append(Path(mkdtemp()))
+        warm_target = _copy(target, tmps[-1])
+        _measure(executable, warm_target, module, True)
+        warm = [_measure(executable, warm_target, module, True) for _ in range(runs)]
+
+    finally:
+        # clean up temporary folders
+        for path in tmps:
+            rmpath(path)
+
+    # median of all runs (in milliseconds and bytes)
+    rss = [measurement['rss'] for measurement in cold + warm if measurement['rss'] is not None]
+    results = {
+        'cold': median(measurement['duration'] for measurement in cold) * 1000,
+        'warm': median(measurement['duration'] for measurement in warm) * 1000,
+        'rss': max(rss) if rss else None,
+        'size': _size(target),
+    }
+
+    # print report
+    print(f'Import of {name}:')
+    print(f'  cold {results["cold"]:>10.1f} ms')
+    print(f'  warm {results["warm"]:>10.1f} ms')
+    if results['rss'] is not None:
+        print(f'  rss  {results["rss"] / 1024 / 1024:>10.1f} MiB')
+    print(f'  size {results["size"] / 1024:>10.1f} KiB')
+
+    if baseline is None:
+        return
+
+    # write a new baseline
+    if update or not baseline.exists():
+        print(f'Writing baseline {baseline}...')
+        baseline.write_text(json.dumps({'module': name, **results}, indent=2) + '\n', encoding='utf-8')
+        return
+
+    # compare with baseline
+    print(f'Comparing with baseline {baseline}...')
+    breaches = _breaches(results, json.loads(baseline.read_text(encoding='utf-8')), thresholds)
+
+    if breaches:
+        raise ValueError(f'thresholds exceeded: {", ".join(breaches)}')
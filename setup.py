@@ -23,9 +23,11 @@ setuptools.setup(
     entry_points={
         "console_scripts": [
             "pdistx=pdistx.__main__:main",
+            "pbuild=pbuild.__main__:main",
             "pvendor=pvendor.__main__:main",
             "pvariant=pvariant.__main__:main",
             "ppack=ppack.__main__:main",
+            "pverify=pverify.__main__:main",
         ],
     },
 )
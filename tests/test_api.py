@@ -0,0 +1,72 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pdistx import api
+
+_ROOT = Path(__file__).parent.parent
+
+_PACKAGE = {
+    '__init__.py': b'from .core import VALUE\n',
+    'core.py': b'PRO = False\nif PRO:\n    VALUE = 2\nelse:\n    VALUE = 1\n',
+    'data.txt': b'x',
+    '__pycache__/core.cpython-311.pyc': b'',
+}
+
+_LIBRARY = {
+    'lib/__init__.py': b'import lib.core\nfrom lib.core import VALUE\n',
+    'lib/core.py': b'VALUE = 1\n',
+    'lib-1.0.dist-info/METADATA': b'',
+}
+
+
+def _write(folder: Path, files: api.Files):
+    for name, data in files.items():
+        folder.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+        folder.joinpath(name).write_bytes(data)
+
+
+def _read(folder: Path) -> api.Files:
+    return {path.relative_to(folder).as_posix(): path.read_bytes() for path in folder.rglob('*') if path.is_file()}
+
+
+def _run(cwd: Path, *args: str):
+    subprocess.run([sys.executable, '-m', *args], cwd=cwd, env={'PYTHONPATH': str(_ROOT)}, check=True)
+
+
+def test_variant_and_vendor_match_the_command_line_tools(tmp_path):
+    _write(tmp_path.joinpath('pkg'), _PACKAGE)
+    _write(tmp_path.joinpath('lib'), _LIBRARY)
+
+    _run(tmp_path, 'pvariant', '-d', 'PRO:bool=False', 'pkg', 'variant')
+    _run(tmp_path, 'pvendor', '-s', 'lib', 'vendor')
+
+    assert api.variant(_PACKAGE, 'pkg', {'PRO': False}) == _read(tmp_path.joinpath('variant'))
+    assert api.vendor(_LIBRARY) == _read(tmp_path.joinpath('vendor'))
+
+
+def test_packed_files_can_be_imported(tmp_path):
+    _write(tmp_path, api.pack(_PACKAGE, 'pkg', 'out/pkg.py'))
+
+    code = 'import pkg; print(pkg.VALUE)'
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path.joinpath('out'), check=True, capture_output=True)
+    assert result.stdout.strip() == b'1'
+
+
+def test_zip_files_are_deterministic():
+    files = {'b.py': b'B = 1\n', 'a/__init__.py': b''}
+    data = api.write_zip(files, 'base')
+
+    assert api.write_zip(dict(reversed(files.items())), 'base') == data
+    assert api.read_zip(data, 'base') == files
+
+
+def test_paths_outside_of_the_tree_are_rejected():
+    for name in ['/abs.py', '../up.py', 'a/../../up.py']:
+        with pytest.raises(ValueError):
+            api.variant({name: b''}, 'pkg', {})
+
+    with pytest.raises(ValueError):
+        api.variant({'a.py': 'A = 1\n'}, 'pkg', {})
@@ -0,0 +1,48 @@
+import io
+import tarfile
+import zipfile
+from pathlib import PurePosixPath
+
+import pytest
+
+from pdistx.utils.archive import SourceArchive
+
+_FILES = {'pkg-1.0/pkg/__init__.py': b'VALUE = 1\n', 'pkg-1.0/pkg/data.txt': b'data', 'pkg-1.0/setup.py': b''}
+
+
+def _write(path):
+    # archive containing the files, in any of the supported formats
+    if path.suffix in ['.zip', '.whl']:
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, data in _FILES.items():
+                archive.writestr(name, data)
+    else:
+        mode = 'w' if path.suffix == '.tar' else f'w:{path.suffix[1:]}'
+        with tarfile.open(path, mode) as archive:
+            for name, data in _FILES.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+@pytest.mark.parametrize('name', ['pkg.zip', 'pkg.tar', 'pkg.tar.gz', 'pkg.tar.bz2', 'pkg.tar.xz'])
+def test_members_are_read_from_folders_within_archives(tmp_path, name):
+    archive = _write(tmp_path.joinpath(name))
+
+    with SourceArchive(archive.joinpath('pkg-1.0', 'pkg'), False) as source:
+        assert source.name == 'pkg'
+        assert source.files([]) == [PurePosixPath('__init__.py'), PurePosixPath('data.txt')]
+        assert source.read(PurePosixPath('data.txt')) == b'data'
+
+    with SourceArchive(archive, True) as source:
+        assert source.name == 'pkg-1.0'
+        assert source.read(PurePosixPath('pkg/__init__.py')) == b'VALUE = 1\n'
+
+
+@pytest.mark.parametrize('name', ['pkg.zip', 'pkg.tar'])
+def test_missing_folders_within_archives_are_rejected(tmp_path, name):
+    archive = _write(tmp_path.joinpath(name))
+
+    with pytest.raises(ValueError):
+        SourceArchive(archive.joinpath('pkg-1.0', 'missing'), False)
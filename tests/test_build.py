@@ -0,0 +1,92 @@
+import ast
+import json
+import shutil
+import zipfile
+from pathlib import Path
+
+from pbuild.process import perform
+
+_EXAMPLE = Path(__file__).parent.parent.joinpath('examples', 'blender_addon')
+
+_STAGES = {
+    'pro': {
+        'tool': 'variant',
+        'input': 'blender_addon',
+        'definitions': {
+            '__VARIANT__': 'PRO'
+        },
+        'output': 'dist/pro.zip',
+        'base': 'blender_addon',
+    },
+    'free': {
+        'tool': 'variant',
+        'input': 'blender_addon',
+        'definitions': {
+            '__VARIANT__': 'FREE'
+        },
+        'prune': True
+    },
+    'free_packed': {
+        'tool': 'pack',
+        'input': 'free',
+        'resources': True,
+        'output': 'dist/free'
+    },
+}
+
+
+def test_stages_write_parsable_outputs_and_are_skipped_when_up_to_date(tmp_path, capsys):
+    shutil.copytree(_EXAMPLE, tmp_path.joinpath('blender_addon'))
+    config = tmp_path.joinpath('pdistx.json')
+    config.write_text(json.dumps({'stages': _STAGES}), encoding='utf-8')
+
+    perform(config, [], 2, False)
+
+    with zipfile.ZipFile(tmp_path.joinpath('dist', 'pro.zip')) as archive:
+        sources = [archive.read(name) for name in archive.namelist() if name.endswith('.py')]
+    sources.append(tmp_path.joinpath('dist', 'free', 'blender_addon.py').read_bytes())
+
+    for source in sources:
+        ast.parse(source)
+
+    assert not tmp_path.joinpath('dist', 'free', 'blender_addon_resources', 'images', 'pro.bip').exists()
+
+    capsys.readouterr()
+    perform(config, [], 2, False)
+    assert capsys.readouterr().out.count('which is up to date') == 3
+
+
+def test_skipped_stages_are_read_back_and_wheels_are_read_by_workers(tmp_path, capsys):
+    with zipfile.ZipFile(tmp_path.joinpath('lib-1.0-py3-none-any.whl'), 'w') as wheel:
+        wheel.writestr('lib/__init__.py', 'VALUE = 1\n')
+        wheel.writestr('lib-1.0.dist-info/METADATA', '')
+
+    stages = {
+        'vendor': {
+            'tool': 'vendor',
+            'wheels': ['lib-1.0-py3-none-any.whl'],
+            'output': 'dist/vendor.zip'
+        },
+        'copy': {
+            'tool': 'variant',
+            'root': 'vendor',
+            'input': 'vendor',
+            'output': 'dist/copy'
+        },
+    }
+    config = tmp_path.joinpath('pdistx.json')
+    config.write_text(json.dumps({'stages': stages}), encoding='utf-8')
+
+    perform(config, [], 2, False)
+
+    # the output of the skipped vendor stage is read back
+    stages['copy']['filter'] = ['__init__.py']
+    config.write_text(json.dumps({'stages': stages}), encoding='utf-8')
+    shutil.rmtree(tmp_path.joinpath('dist', 'copy'))
+
+    capsys.readouterr()
+    perform(config, [], 2, False)
+    assert 'Skipping vendor' in capsys.readouterr().out
+
+    assert sorted(path.name for path in tmp_path.joinpath('dist', 'copy').iterdir()) == ['lib']
+    assert 'VALUE = 1' in tmp_path.joinpath('dist', 'copy', 'lib', '__init__.py').read_text(encoding='utf-8')
@@ -0,0 +1,44 @@
+import struct
+import sys
+
+import pytest
+
+from pdistx.utils.compile import compile_bytecode
+
+
+def _package(folder):
+    folder.joinpath('pkg').mkdir()
+    folder.joinpath('pkg', '__init__.py').write_text('VALUE = 1\n', encoding='utf-8')
+    return folder.joinpath('pkg')
+
+
+def _flags(path) -> int:
+    # flags of the pyc header, see PEP 552 (bit 0 marks hash based pycs, bit 1 checking the source hash)
+    return struct.unpack('<I', path.read_bytes()[4:8])[0]
+
+
+def test_bytecode_is_cached_next_to_sources(tmp_path):
+    package = _package(tmp_path)
+    compile_bytecode(package, [sys.executable], [0, 1], False, False)
+
+    names = sorted(path.name for path in package.joinpath('__pycache__').iterdir())
+    assert len(names) == 2 and names[0].endswith('.opt-1.pyc')
+    assert package.joinpath('__init__.py').is_file()
+
+
+def test_sourceless_bytecode_replaces_sources(tmp_path):
+    package = _package(tmp_path)
+    compile_bytecode(package, [sys.executable], [0], True, False)
+
+    assert sorted(path.name for path in package.iterdir()) == ['__init__.pyc']
+
+
+def test_bytecode_for_zip_files_checks_source_hashes(tmp_path):
+    package = _package(tmp_path)
+    compile_bytecode(package, [sys.executable], [0], False, True)
+
+    assert sorted(path.name for path in package.iterdir()) == ['__init__.py', '__init__.pyc']
+    assert _flags(package.joinpath('__init__.pyc')) == 0b11
+
+    with pytest.raises(AssertionError):
+        compile_bytecode(package, [sys.executable], [0, 1], False, True)
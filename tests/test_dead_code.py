@@ -0,0 +1,30 @@
+from pvariant.transform import variant_transform_code
+
+_DEFINITIONS = {'PRO': False, 'DEBUG': True}
+
+
+def _transform(code: str) -> str:
+    return variant_transform_code(code, _DEFINITIONS)
+
+
+def test_conditional_expressions_and_loops_are_reduced():
+    assert _transform('x = 1 if PRO else 2\n') == 'x = 2'
+    assert _transform('while PRO:\n    x = 1\nelse:\n    x = 2\n') == 'x = 2'
+
+    code = 'if a:\n    x = 1\nelif PRO:\n    x = 2\nelse:\n    x = 3\n'
+    assert _transform(code) == 'if a:\n    x = 1\nelse:\n    x = 3'
+
+
+def test_boolean_chains_are_cut_at_constants():
+    assert _transform('x = a and DEBUG and b\n') == 'x = a and b'
+    assert _transform('x = a or DEBUG or b\n') == 'x = a or True'
+    assert _transform('x = PRO and a\n') == 'x = False'
+
+
+def test_imports_unused_after_reduction_are_removed():
+    assert _transform('import pro\nif PRO:\n    pro.run()\n') == ''
+    assert _transform('import pro\nimport other\nother.run()\n') == 'import pro\nimport other\nother.run()'
+
+
+def test_empty_bodies_get_a_pass_statement():
+    assert _transform('def f():\n    if PRO:\n        return 1\n') == 'def f():\n    pass'
@@ -0,0 +1,56 @@
+import ast
+
+from pvariant.transform import variant_transform_code
+
+
+def _run(code: str, definitions: dict, layout: bool = False):
+    # results of the original and the transformed code
+    transformed = variant_transform_code(code, definitions, layout)
+    ast.parse(transformed)
+
+    original_scope, transformed_scope = {}, {}
+    exec(code, original_scope)  # pylint: disable=exec-used
+    exec(transformed, transformed_scope)  # pylint: disable=exec-used
+
+    return original_scope['result'], transformed_scope['result'], transformed
+
+
+def test_negative_numbers_keep_precedence():
+    code = 'def f(s):\n    return (-1) ** s\nresult = [f(0), f(1), (-1).real, -3j ** 2, (-1.5) ** 2, -(1 + 2) ** 2]\n'
+
+    for layout in [False, True]:
+        original, transformed, _ = _run(code, {'sys.platform': 'linux'}, layout)
+        assert [repr(value) for value in original] == [repr(value) for value in transformed]
+
+
+def test_folded_negative_numbers_as_power_base_and_attribute():
+    code = 'A = 1\nresult = [(A - 2) ** 2, (A - 2).real, (A - 2) ** A]\n'
+
+    for layout in [False, True]:
+        original, transformed, code = _run(code, {'A': 1}, layout)
+        assert original == transformed == [1, -1, -1]
+        assert '**' not in code
+
+
+def test_unhashable_set_elements_are_not_folded():
+    original, transformed, _ = _run('try:\n    result = len({[1]})\nexcept TypeError:\n    result = None\n', {})
+    assert original is None and transformed is None
+
+
+def test_huge_numbers_are_folded_without_overflow():
+    code = 'A = 1\nresult = [A, 1 << 1100, -(1 << 60) ** 20, 2 ** 64 * 2 ** 60, 1e308 * 10, 1 << 100000000]\n'
+
+    for layout in [False, True]:
+        original, transformed, code = _run(code, {'A': 2}, layout)
+        assert original[1:] == transformed[1:]
+        assert '1 << 100000000' in code
+
+
+def test_mutable_definitions_are_only_assigned():
+    code = 'A = None\nB = None\nA.append(1)\nB["b"] = 2\nresult = [A, B, len(A)]\n'
+
+    for layout in [False, True]:
+        transformed = variant_transform_code(code, {'A': [0], 'B': {'a': 1}}, layout)
+        scope = {}
+        exec(transformed, scope)  # pylint: disable=exec-used
+        assert scope['result'] == [[0, 1], {'a': 1, 'b': 2}, 2]
@@ -0,0 +1,72 @@
+import ast
+
+from pdistx.utils.fused import FusedRule, fused_transform
+
+
+class _Rename(FusedRule, ast.NodeTransformer):
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Name(self, node: ast.Name):
+        self.generic_visit(node)
+        return ast.Name(id='b', ctx=node.ctx) if node.id == 'a' else node
+
+
+class _Inline(FusedRule, ast.NodeTransformer):
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Name(self, node: ast.Name):
+        self.generic_visit(node)
+        return ast.Constant(value=1) if node.id == 'b' and isinstance(node.ctx, ast.Load) else node
+
+
+class _Split(FusedRule, ast.NodeTransformer):
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Expr(self, node: ast.Expr):
+        self.generic_visit(node)
+        if isinstance(node.value, ast.Tuple):
+            return [ast.Expr(value=value) for value in node.value.elts]
+        if isinstance(node.value, ast.Constant) and node.value.value is None:
+            return None
+        return node
+
+
+class _Count(FusedRule, ast.NodeVisitor):
+
+    def __init__(self):
+        self.names = []
+        super().__init__()
+
+    # pylint: disable=pylint(invalid-name)
+    def visit_Name(self, node: ast.Name):
+        self.generic_visit(node)
+        self.names.append(node.id)
+
+
+def _run(code: str, rules: list, fused: bool) -> str:
+    tree = ast.parse(code)
+    if fused:
+        tree = fused_transform(tree, rules)
+    else:
+        for rule in rules:
+            tree = rule.visit(tree)
+    return ast.unparse(ast.fix_missing_locations(tree))
+
+
+def test_fused_rules_match_separate_traversals():
+    code = 'a = a + c\nf(a, (b, c))\n(a, c)\nNone\n'
+
+    for rules in [[_Rename, _Inline, _Split], [_Inline, _Rename, _Split], [_Split, _Rename, _Inline]]:
+        separate = _run(code, [rule() for rule in rules], False)
+        fused = _run(code, [rule() for rule in rules], True)
+        assert fused == separate
+
+
+def test_visitors_see_nodes_once_and_after_preceding_transformers():
+    count, rules = _Count(), [_Rename(), _Count()]
+
+    _run('a = a + c\nf(a)\n', [count] + rules, True)
+
+    assert sorted(count.names) == ['a', 'a', 'a', 'c', 'f']
+    assert sorted(rules[1].names) == ['b', 'b', 'b', 'c', 'f']
+    assert not any(rule.fused for rule in [count] + rules)
@@ -0,0 +1,68 @@
+import hashlib
+import subprocess
+import sys
+from pathlib import Path, PurePosixPath
+
+import pytest
+
+from pdistx.utils.git import git_digests, git_files
+
+_ROOT = Path(__file__).parent.parent
+
+_FILES = {
+    '.gitignore': '*.log\n',
+    'src/a.py': 'A = 1\n',
+    'src/b.py': 'B = 1\n',
+    'src/gone.py': '',
+    'src/debug.log': '',
+}
+
+
+def _repository(folder: Path) -> Path:
+    subprocess.run(['git', 'init', '-q', str(folder)], check=True)
+
+    for name, data in _FILES.items():
+        folder.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+        folder.joinpath(name).write_text(data, encoding='utf-8')
+
+    subprocess.run(['git', '-C', str(folder), 'add', '.'], check=True)
+
+    folder.joinpath('src', 'b.py').write_text('B = 2\n', encoding='utf-8')
+    folder.joinpath('src', 'new.py').write_text('', encoding='utf-8')
+    folder.joinpath('src', 'gone.py').unlink()
+
+    return folder.joinpath('src')
+
+
+def test_files_are_listed_without_ignored_and_deleted_ones(tmp_path):
+    source = _repository(tmp_path)
+
+    assert git_files(source) == [PurePosixPath('a.py'), PurePosixPath('b.py'), PurePosixPath('new.py')]
+
+
+def test_digests_of_unchanged_files_are_taken_from_the_index(tmp_path):
+    source = _repository(tmp_path)
+    digests = git_digests(source)
+
+    # object ids of git hash the contents with a header (sha-1 for default repositories)
+    assert digests[PurePosixPath('a.py')] == hashlib.sha1(b'blob 6\0A = 1\n').hexdigest()
+    assert digests[PurePosixPath('b.py')] == hashlib.sha256(b'B = 2\n').hexdigest()
+    assert digests[PurePosixPath('new.py')] == hashlib.sha256(b'').hexdigest()
+    assert len(digests) == 3
+
+
+def test_folders_outside_of_work_trees_are_rejected(tmp_path):
+    with pytest.raises(RuntimeError, match='is expected to be within a git work tree'):
+        git_files(tmp_path)
+
+
+def test_ignored_files_are_skipped_by_the_tools(tmp_path):
+    source = _repository(tmp_path.joinpath('repository'))
+
+    for args, expected in [([], ['a.py', 'b.py', 'debug.log', 'new.py']), (['-g'], ['a.py', 'b.py', 'new.py'])]:
+        subprocess.run(
+            [sys.executable, '-m', 'pvariant', *args, str(source), 'out'],
+            cwd=tmp_path,
+            env={'PYTHONPATH': str(_ROOT)},
+            check=True)
+        assert sorted(path.name for path in tmp_path.joinpath('out').iterdir()) == expected
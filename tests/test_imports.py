@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+from pvendor.transform import import_transform_code
+
+
+def _transform(source: str) -> str:
+    return import_transform_code(source, 1, ['abc'])
+
+
+def test_imports_become_relative_imports():
+    assert _transform('import abc\n') == 'from .. import abc'
+    assert _transform('import abc.sub as xyz\n') == 'from ..abc import sub as xyz'
+    assert _transform('from abc.sub import x\n') == 'from ..abc.sub import x'
+    assert _transform('import os\n') == 'import os'
+
+
+def test_imports_of_nested_modules_use_constant_names():
+    assert _transform('import abc.sub\n') == "__import__('abc.sub', globals(), locals(), [], 2)\nfrom .. import abc"
+    assert _transform('x = __import__("abc.sub")\n') == "x = __import__('abc.sub', globals(), None, [], 2)"
+    assert _transform('x = import_module("abc.sub")\n') == "x = import_module('..abc.sub', __package__)"
+
+
+def test_imports_of_non_constant_names_are_kept():
+    assert _transform('x = __import__(name)\n') == 'x = __import__(name)'
+    assert _transform('x = import_module(name)\n') == 'x = import_module(name)'
+
+
+def test_transformed_imports_load_the_vendored_modules(tmp_path):
+    vendor = tmp_path.joinpath('host', 'vendor')
+    vendor.joinpath('abc').mkdir(parents=True)
+    vendor.joinpath('user').mkdir()
+    for folder in [tmp_path.joinpath('host'), vendor, vendor.joinpath('abc'), vendor.joinpath('user')]:
+        folder.joinpath('__init__.py').write_text('', encoding='utf-8')
+    vendor.joinpath('abc', 'sub.py').write_text('VALUE = 1\n', encoding='utf-8')
+
+    source = ('from importlib import import_module\n'
+              'import abc.sub\n'
+              'import abc.sub as xyz\n'
+              'VALUES = [abc.sub.VALUE, xyz.VALUE, import_module("abc.sub").VALUE]\n')
+    vendor.joinpath('user', 'mod.py').write_text(_transform(source), encoding='utf-8')
+
+    code = 'import host.vendor.user.mod as mod; print(mod.VALUES)'
+    output = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, check=True, capture_output=True, text=True)
+    assert output.stdout.strip() == '[1, 1, 1]'
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).parent.parent
+
+
+def _vendor(cwd: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, '-m', 'pvendor', '-s', 'lib', *args],
+                          cwd=cwd,
+                          env={'PYTHONPATH': str(_ROOT)},
+                          check=False,
+                          capture_output=True,
+                          text=True)
+
+
+def test_lazy_modules_are_executed_on_first_attribute_access(tmp_path):
+    tmp_path.joinpath('lib', 'heavy').mkdir(parents=True)
+    tmp_path.joinpath('lib', 'heavy', '__init__.py').write_text('print("heavy")\nVALUE = 1\n', encoding='utf-8')
+    tmp_path.joinpath('lib', 'user.py').write_text('import heavy\nprint("user")\n', encoding='utf-8')
+    tmp_path.joinpath('host').mkdir()
+    tmp_path.joinpath('host', '__init__.py').write_text('', encoding='utf-8')
+
+    code = 'from host.vendor import user; print(user.heavy.VALUE)'
+
+    for args, expected in [([], 'heavy user 1'), (['-L', 'heavy'], 'user heavy 1')]:
+        assert _vendor(tmp_path, *args, 'host/vendor').returncode == 0
+
+        result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, check=True, capture_output=True, text=True)
+        assert result.stdout.split() == expected.split()
+
+
+def test_lazy_modules_are_expected_to_be_vendored(tmp_path):
+    tmp_path.joinpath('lib').mkdir()
+    tmp_path.joinpath('lib', 'a.py').write_text('', encoding='utf-8')
+
+    result = _vendor(tmp_path, '-L', 'b', 'vendor')
+    assert result.returncode == 1
+    assert 'b is expected to be a vendored top-level module to be imported lazily' in result.stdout
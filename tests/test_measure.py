@@ -0,0 +1,47 @@
+import subprocess
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).parent.parent
+
+
+def _vendor(cwd: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, '-m', 'pvendor', '-s', 'lib', *args],
+                          cwd=cwd,
+                          env={'PYTHONPATH': str(_ROOT)},
+                          check=False,
+                          capture_output=True,
+                          text=True)
+
+
+def _library(folder: Path):
+    folder.joinpath('lib', 'slow').mkdir(parents=True)
+    folder.joinpath('lib', 'slow', '__init__.py').write_text('import time\ntime.sleep(0.2)\n', encoding='utf-8')
+    folder.joinpath('lib', 'fast.py').write_text('VALUE = 1\n', encoding='utf-8')
+    folder.joinpath('lib', 'broken.py').write_text('raise ImportError("broken")\n', encoding='utf-8')
+
+
+def _report(output: str):
+    # names of the report lines, slowest first
+    lines = output[output.index('Import time of vendored modules:'):].splitlines()[1:]
+    return [line.split()[0] for line in lines if line.startswith('  ')]
+
+
+def test_import_times_are_reported_slowest_first(tmp_path):
+    _library(tmp_path)
+
+    for args in [['vendor'], ['-z', 'vendor.zip', 'vendor']]:
+        result = _vendor(tmp_path, '-m', *args)
+
+        assert result.returncode == 0, result.stdout
+        assert 'Warning: vendor.broken could not be imported: ImportError: broken' in result.stdout
+        assert _report(result.stdout) == ['slow', 'fast']
+
+
+def test_exceeding_the_budget_fails(tmp_path):
+    _library(tmp_path)
+
+    result = _vendor(tmp_path, '-x', '100', 'vendor')
+
+    assert result.returncode == 1
+    assert 'import time budget of 100.0 ms exceeded by slow' in result.stdout
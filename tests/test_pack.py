@@ -0,0 +1,59 @@
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+from ppack.process import pack_code, write_pack
+
+_ROOT = Path(__file__).parent.parent
+
+_MODULES = {'': ('from . import a\nVALUE = a.VALUE\n', True), 'a': ('VALUE = 1\n', False), 'b.c': ('C = 2\n', False)}
+
+
+class _Handle:
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, text: str):
+        self.events.append(('write', text))
+
+
+def test_modules_are_read_while_writing_the_packed_file():
+    handle = _Handle()
+
+    def _read(name: str) -> str:
+        handle.events.append(('read', name))
+        return _MODULES[name][0]
+
+    write_pack(handle, {name: is_package for name, (_, is_package) in _MODULES.items()}, _read, 'pkg', False)
+    code = ''.join(text for event, text in handle.events if event == 'write')
+
+    # each module is read right before its entry is written, the bootstrap module again for the bootstrap code
+    reads = [i for i, (event, _) in enumerate(handle.events) if event == 'read']
+    assert [handle.events[i][1] for i in reads] == ['', 'a', 'b.c', '']
+    assert all(handle.events[i + 1][0] == 'write' for i in reads)
+
+    assert code == pack_code(_MODULES, 'pkg', False)
+    ast.parse(code)
+
+
+def test_packed_files_import_all_modules(tmp_path):
+    for name, (code, is_package) in _MODULES.items():
+        path = tmp_path.joinpath('pkg', *name.split('.')) if name else tmp_path.joinpath('pkg')
+        path = path.joinpath('__init__.py') if is_package else path.with_suffix('.py')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code, encoding='utf-8')
+
+    subprocess.run([sys.executable, '-m', 'ppack', 'pkg', 'out/pkg.py'],
+                   cwd=tmp_path,
+                   env={'PYTHONPATH': str(_ROOT)},
+                   check=True)
+
+    code = 'import pkg.b.c; print(pkg.VALUE, pkg.b.c.C)'
+    result = subprocess.run([sys.executable, '-c', code],
+                            cwd=tmp_path.joinpath('out'),
+                            check=True,
+                            capture_output=True,
+                            text=True)
+    assert result.stdout.split() == ['1', '2']
@@ -0,0 +1,51 @@
+import pytest
+
+from pdistx.utils import path as path_utils
+from pdistx.utils.path import rmpath_background, staging_folder, swap_paths
+
+
+def _output(folder, name, content):
+    folder.joinpath(name).mkdir(parents=True)
+    folder.joinpath(name, 'file.txt').write_text(content, encoding='utf-8')
+
+
+def test_outputs_are_swapped_into_place(tmp_path):
+    _output(tmp_path, 'out', 'old')
+    tmp_path.joinpath('out.zip').write_bytes(b'old')
+
+    staging = staging_folder(tmp_path)
+    _output(staging, 'out', 'new')
+    staging.joinpath('out.zip').write_bytes(b'new')
+
+    swap_paths(staging, [tmp_path.joinpath('out'), tmp_path.joinpath('out.zip')])
+
+    assert tmp_path.joinpath('out', 'file.txt').read_text(encoding='utf-8') == 'new'
+    assert tmp_path.joinpath('out.zip').read_bytes() == b'new'
+    assert staging.joinpath('.previous', 'out', 'file.txt').read_text(encoding='utf-8') == 'old'
+
+
+def test_previous_outputs_are_moved_back_on_failure(tmp_path, monkeypatch):
+    _output(tmp_path, 'out', 'old')
+
+    staging = staging_folder(tmp_path)
+    _output(staging, 'out', 'new')
+
+    def _replace(source, target):
+        raise OSError(f'cannot replace {target} by {source}')
+
+    monkeypatch.setattr(path_utils, 'replace', _replace)
+
+    with pytest.raises(OSError):
+        swap_paths(staging, [tmp_path.joinpath('out')])
+
+    assert tmp_path.joinpath('out', 'file.txt').read_text(encoding='utf-8') == 'old'
+
+
+def test_interrupted_removals_are_finished_by_the_next_run(tmp_path):
+    _output(tmp_path, '.pdistx-removed-leftover', 'old')
+
+    staging = staging_folder(tmp_path)
+    assert [path.name for path in tmp_path.iterdir()] == [staging.name]
+
+    rmpath_background(staging)
+    assert not staging.exists()
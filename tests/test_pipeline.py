@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from pdistx.utils.pipeline import Writer, prefetch
+
+
+def test_items_are_read_ahead_in_order_and_bounded():
+    reads = []
+
+    def _read(item):
+        reads.append(item)
+        return item * 2
+
+    results = []
+    for item, result in prefetch(range(100), _read, workers=4, pending=8):
+        # reads are done ahead, but not more than the pending ones
+        assert len(reads) <= item + 8 + 1
+        results.append((item, result))
+
+    assert results == [(item, item * 2) for item in range(100)]
+
+
+def test_pending_writes_are_bounded():
+    finished = []
+    pending = []
+
+    def _write(item):
+        time.sleep(0.001)
+        finished.append(item)
+
+    with Writer(workers=2, pending=3) as writer:
+        for item in range(50):
+            writer.submit(_write, item)
+            pending.append(item + 1 - len(finished))
+
+    assert sorted(finished) == list(range(50)) and max(pending) <= 3
+
+
+def test_first_error_of_writes_is_raised():
+
+    def _write(item):
+        if item == 3:
+            raise OSError('disk full')
+
+    with pytest.raises(OSError, match='disk full'):
+        with Writer(workers=1) as writer:
+            for item in range(10):
+                writer.submit(_write, item)
+
+
+def test_pending_writes_are_cancelled_on_errors():
+    written = []
+    started = threading.Event()
+
+    def _write(item):
+        started.set()
+        time.sleep(0.01)
+        written.append(item)
+
+    with pytest.raises(RuntimeError):
+        with Writer(workers=1, pending=64) as writer:
+            for item in range(20):
+                writer.submit(_write, item)
+            started.wait()
+            raise RuntimeError('transformation failed')
+
+    # running writes are finished, before leaving the context
+    count = len(written)
+    time.sleep(0.05)
+    assert 0 < count < 20 and len(written) == count
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from pdistx.utils.prefilter import has_identifier, identifier_pattern
+
+_ROOT = Path(__file__).parent.parent
+
+_UNTOUCHED = '# comment\nVALUE = 1  # PROFESSIONAL\n'
+
+
+def test_identifiers_are_matched_as_whole_words():
+    pattern = identifier_pattern(['PRO', 'a.b'])
+
+    assert has_identifier(pattern, b'if PRO:\n')
+    assert has_identifier(pattern, b'import a.b\n')
+    assert not has_identifier(pattern, b'PROFESSIONAL = aXb\n')
+    assert not has_identifier(identifier_pattern([]), b'PRO')
+
+
+def test_files_without_definitions_are_not_transformed(tmp_path):
+    tmp_path.joinpath('src').mkdir()
+    tmp_path.joinpath('src', 'a.py').write_text('if PRO:\n    VALUE = 1\n', encoding='utf-8')
+    tmp_path.joinpath('src', 'b.py').write_text(_UNTOUCHED, encoding='utf-8')
+
+    for args in [[], ['-n']]:
+        result = subprocess.run([sys.executable, '-m', 'pvariant', '-d', 'PRO:bool=False', *args, 'src', 'out'],
+                                cwd=tmp_path,
+                                env={'PYTHONPATH': str(_ROOT)},
+                                check=True,
+                                capture_output=True,
+                                text=True)
+
+        assert '1 of 2 modules need no transformation' in result.stdout
+        assert 'VALUE' not in tmp_path.joinpath('out', 'a.py').read_text(encoding='utf-8')
+        assert (tmp_path.joinpath('out', 'b.py').read_text(encoding='utf-8') == _UNTOUCHED) == bool(args)
@@ -0,0 +1,51 @@
+import ast
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from ppack.profile import read_profile
+
+_ROOT = Path(__file__).parent.parent
+
+
+def _modules(path: Path) -> list:
+    # modules of a packed file in the order of the file
+    for line in path.read_text(encoding='utf-8').splitlines():
+        if line.startswith('    pack_modules = OrderedDict('):
+            return ast.literal_eval(line[len('    pack_modules = OrderedDict('):-1])
+    raise AssertionError('modules not found')
+
+
+def _run(cwd: Path, *args: str, **env: str):
+    subprocess.run([sys.executable, *args], cwd=cwd, env={**os.environ, 'PYTHONPATH': str(_ROOT), **env}, check=True)
+
+
+def test_profiles_are_read_from_traces_and_importtime_output():
+    trace = 'pkg.b\nother\npkg\npkg.b\n'
+    importtime = ('import time: self [us] | cumulative | imported package\n'
+                  'import time:       520 |       1040 |   pkg.a.c\n'
+                  'import time:        20 |         20 | pkgs\n')
+
+    assert read_profile(trace, ['pkg']) == ['b', '']
+    assert read_profile(importtime, ['pkg', 'other']) == ['a.c']
+
+
+def test_startup_modules_are_stored_first_and_others_compressed(tmp_path):
+    tmp_path.joinpath('pkg').mkdir()
+    tmp_path.joinpath('pkg', '__init__.py').write_text('from . import hot\n', encoding='utf-8')
+    tmp_path.joinpath('pkg', 'cold.py').write_text('B = 2\n', encoding='utf-8')
+    tmp_path.joinpath('pkg', 'hot.py').write_text('A = 1\n', encoding='utf-8')
+
+    _run(tmp_path, '-m', 'ppack', 'pkg', 'out/pkg.py')
+    _run(tmp_path.joinpath('out'), '-c', 'import pkg', PPACK_TRACE=str(tmp_path.joinpath('trace.txt')))
+    _run(tmp_path, '-m', 'ppack', '-p', 'trace.txt', 'pkg', 'profiled/pkg.py')
+
+    assert [name for name, _ in _modules(tmp_path.joinpath('out', 'pkg.py'))] == ['', 'cold', 'hot']
+    assert tmp_path.joinpath('trace.txt').read_text(encoding='utf-8') == 'pkg.hot\n'
+
+    modules = _modules(tmp_path.joinpath('profiled', 'pkg.py'))
+    assert [name for name, _ in modules] == ['', 'hot', 'cold']
+    assert [isinstance(source, bytes) for _, (source, _) in modules] == [False, False, True]
+
+    _run(tmp_path.joinpath('profiled'), '-c', 'import pkg.cold; assert pkg.cold.B == 2')
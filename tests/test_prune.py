@@ -0,0 +1,37 @@
+from pathlib import PurePosixPath
+
+from pvariant.process import variant_tree
+
+
+def _prune(sources: dict, resources: list, definitions: dict):
+    # paths kept by pruning the sources and resources of the package
+    sources = {PurePosixPath(path): code.encode('utf-8') for path, code in sources.items()}
+    paths = list(sources) + [PurePosixPath(path) for path in resources]
+    kept, _ = variant_tree(paths, sources, 'pkg', definitions, True, [], False, False, log=lambda message: None)
+    return [path.as_posix() for path in kept]
+
+
+def test_resources_are_matched_by_whole_names():
+    sources = {'__init__.py': 'PRO = False\nif PRO:\n    ICON = "pro.png"\nBACKUP = "pro.png.old"\nNAME = "a.txt"\n'}
+    resources = ['pro.png', 'a.txt', 'unused.txt']
+
+    assert _prune(sources, resources, {'PRO': False}) == ['__init__.py', 'a.txt', 'unused.txt']
+    assert _prune(sources, resources, {'PRO': True}) == ['__init__.py'] + resources
+
+
+def test_resources_are_matched_by_path_components():
+    sources = {'__init__.py': 'PRO = False\nif PRO:\n    ICON = "images\\\\pro.png"\nLOGO = "logo.png"\n'}
+
+    assert _prune(sources, ['images/pro.png', 'images/logo.png'], {'PRO': False}) == ['__init__.py', 'images/logo.png']
+
+
+def test_modules_of_packages_with_dynamic_imports_are_kept():
+    sources = {
+        '__init__.py': 'from . import plugins\n',
+        'plugins/__init__.py': 'import importlib\nPLUGIN = importlib.import_module("." + NAME, __name__)\n',
+        'plugins/a.py': '',
+        'plugins/b/__init__.py': '',
+        'unused.py': '',
+    }
+
+    assert _prune(sources, [], {}) == ['__init__.py', 'plugins/__init__.py', 'plugins/a.py', 'plugins/b/__init__.py']
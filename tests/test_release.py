@@ -0,0 +1,32 @@
+import subprocess
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).parent.parent
+
+_CODE = '''
+import pkg
+before = pkg.__pack_payload_size__()
+import pkg.a
+print(before > pkg.__pack_payload_size__() > 0, pkg.a.__loader__.get_source('pkg.a') is None)
+'''
+
+
+def _run(cwd: Path, *args: str, **env: str) -> str:
+    env = {'PYTHONPATH': str(_ROOT), **env}
+    result = subprocess.run([sys.executable, *args], cwd=cwd, env=env, check=True, capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def test_sources_are_released_after_loading_modules(tmp_path):
+    tmp_path.joinpath('pkg').mkdir()
+    tmp_path.joinpath('pkg', '__init__.py').write_text('VALUE = 1\n', encoding='utf-8')
+    tmp_path.joinpath('pkg', 'a.py').write_text('A = 1\n', encoding='utf-8')
+    tmp_path.joinpath('pkg', 'b.py').write_text('B = 1\n', encoding='utf-8')
+
+    _run(tmp_path, '-m', 'ppack', 'pkg', 'out/pkg.py')
+    out = tmp_path.joinpath('out')
+
+    assert _run(out, '-c', _CODE) == 'True True'
+    assert _run(out, '-c', _CODE, PPACK_KEEP_SOURCES='1') == 'False False'
+    assert _run(out, '-c', _CODE.replace('before =', 'pkg.__pack_keep_sources__()\nbefore =')) == 'False False'
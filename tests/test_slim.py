@@ -0,0 +1,46 @@
+from pathlib import PurePosixPath
+
+from pvendor.slim import slim_members, slim_patterns
+
+
+class _Member:
+
+    def __init__(self, path: str, size: int = 1):
+        self.path = PurePosixPath(path)
+        self.size = size
+
+
+def _slim(paths, profile='default', *, drop=(), keep=(), platform=None, python=None):
+    members = [_Member(path) for path in paths]
+    kept = slim_members(members, slim_patterns(profile, list(drop)), list(keep), platform, python)
+    return [member.path.as_posix() for member in kept]
+
+
+def test_profiles_remove_non_runtime_paths(capsys):
+    paths = ['pkg/__init__.py', 'pkg/tests/test_a.py', 'pkg/__init__.pyi', 'pkg/py.typed', 'pkg/_s.c', 'tests.py']
+
+    assert _slim(paths, 'none') == paths
+    assert _slim(paths, 'default') == ['pkg/__init__.py', 'pkg/_s.c', 'tests.py']
+    assert _slim(paths, 'strict') == ['pkg/__init__.py', 'tests.py']
+    assert 'Slimming removed 4 files (4 bytes) from pkg' in capsys.readouterr().out
+
+
+def test_patterns_can_be_overridden():
+    paths = ['numpy/__init__.py', 'numpy/doc/a.py', 'numpy/tests/a.py', 'numpy/testing/tests/a.py']
+
+    assert _slim(paths, drop=['numpy/doc'], keep=['numpy/testing']) == ['numpy/__init__.py', 'numpy/testing/tests/a.py']
+
+
+def test_binaries_of_other_targets_are_removed():
+    paths = [
+        'pkg/_s.cpython-311-x86_64-linux-gnu.so',
+        'pkg/_s.cpython-310-x86_64-linux-gnu.so',
+        'pkg/_s.cp311-win_amd64.pyd',
+        'pkg/_s.cpython-311-darwin.so',
+        'pkg/_s.abi3.so',
+        'pkg/lib.dylib',
+    ]
+
+    linux = ['pkg/_s.cpython-311-x86_64-linux-gnu.so', 'pkg/_s.abi3.so']
+    assert _slim(paths, 'none', platform='linux', python='3.11') == linux
+    assert _slim(paths, 'none', platform='win32') == ['pkg/_s.cp311-win_amd64.pyd']
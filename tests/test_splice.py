@@ -0,0 +1,44 @@
+import ast
+import glob
+import sysconfig
+from os.path import join
+
+from ppack.transform import pack_transform_code
+from pvariant.target import target_definitions
+from pvariant.transform import variant_transform_code
+from pvendor.transform import import_transform_code
+
+# modules of the standard library, which are transformed in both modes
+_STDLIB = ['_pydecimal.py', 'argparse.py', 'os.py', 'subprocess.py', 'typing.py', 'zipfile.py']
+
+
+def test_type_comments_are_stripped_within_their_line():
+    code = 'import sys\nx = (1, 2)  # type: Tuple[int, ...]\nif sys.version_info[:2] == (3, 8):\n  x += (3,)\n'
+    definitions = target_definitions('3.11', None, None)
+
+    for transformed in [
+            pack_transform_code(code, 'x', True, True)[0],
+            variant_transform_code(code, definitions, True),
+            import_transform_code(code, 0, ['sys'], True),
+    ]:
+        ast.parse(transformed)
+        assert transformed.split('\n')[1] == 'x = (1, 2)'
+
+    # the check of the version is folded away
+    assert 'x += (3,)' not in variant_transform_code(code, definitions, True)
+
+
+def test_stdlib_round_trip():
+    # code spliced into the original layout is the same as the unparsed code
+    definitions = target_definitions('3.11', 'linux', None)
+    stdlib = sysconfig.get_paths()['stdlib']
+
+    for path in [join(stdlib, name) for name in _STDLIB] + sorted(glob.glob(join(stdlib, 'json', '*.py'))):
+        with open(path, encoding='utf-8') as file:
+            code = file.read()
+
+        unparsed = variant_transform_code(code, definitions, False)
+        spliced = variant_transform_code(code, definitions, True)
+
+        assert ast.dump(ast.parse(unparsed)) == ast.dump(ast.parse(spliced)), path
+        assert len(spliced.split('\n')) <= len(code.split('\n')) + 1, path
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from pvariant.target import target_definitions
+from pvariant.transform import variant_transform_code
+
+_ROOT = Path(__file__).parent.parent
+
+
+def _transform(code: str) -> str:
+    return variant_transform_code(code, target_definitions('3.10', 'win32', '4.1'))
+
+
+def test_checks_of_the_target_interpreter_are_folded():
+    assert _transform('if sys.version_info >= (3, 9):\n    a()\nelse:\n    b()\n') == 'a()'
+    assert _transform('x = sys.version_info[:2] == (3, 10)\n') == 'x = True'
+    assert _transform('x = sys.version_info.minor\n') == 'x = 10'
+    assert _transform('x = sys.platform.startswith("win")\n') == 'x = True'
+    assert _transform('x = os.name == "nt"\n') == 'x = True'
+    assert _transform('x = bpy.app.version >= (4, 0, 0)\n') == 'x = True'
+
+
+def test_unknown_version_components_are_not_folded():
+    for code in ['x = sys.version_info < (3, 10, 2)', 'x = sys.version_info[2]', 'x = sys.version_info']:
+        assert _transform(code + '\n') == code
+
+
+def test_invalid_targets_are_rejected():
+    for python, platform in [('3.x', None), ('3.10.1.2', None), (None, 'linux2')]:
+        with pytest.raises(ValueError):
+            target_definitions(python, platform, None)
+
+
+def test_packed_files_are_specialized(tmp_path):
+    tmp_path.joinpath('pkg').mkdir()
+    tmp_path.joinpath('pkg', '__init__.py').write_text(
+        'import sys\nif sys.platform == "win32":\n    import winreg\nVALUE = 1\n', encoding='utf-8')
+
+    subprocess.run([sys.executable, '-m', 'ppack', '-P', 'linux', 'pkg', 'out/pkg.py'],
+                   cwd=tmp_path,
+                   env={'PYTHONPATH': str(_ROOT)},
+                   check=True)
+
+    assert 'winreg' not in tmp_path.joinpath('out', 'pkg.py').read_text(encoding='utf-8')
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).parent.parent
+
+_LIBRARY = {
+    'a/__init__.py': 'from . import sub\n',
+    'a/sub.py': 'import importlib\nimportlib.import_module("b.core")\n',
+    'a/unused.py': '',
+    'a/data/table.txt': '',
+    'b/__init__.py': '',
+    'b/core.py': '',
+    'b/extra.py': '',
+    'c/__init__.py': '',
+    'c/tools/__init__.py': '',
+    'unused/__init__.py': '',
+    'unused/data.txt': '',
+}
+
+
+def _files(folder: Path):
+    return sorted(path.relative_to(folder).as_posix() for path in folder.rglob('*') if path.is_file())
+
+
+def test_modules_not_imported_by_the_host_are_removed(tmp_path):
+    for name, code in _LIBRARY.items():
+        tmp_path.joinpath('lib', name).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.joinpath('lib', name).write_text(code, encoding='utf-8')
+
+    tmp_path.joinpath('host').mkdir()
+    tmp_path.joinpath('host', 'app.py').write_text('from .vendor import a\n', encoding='utf-8')
+
+    subprocess.run([sys.executable, '-m', 'pvendor', '-s', 'lib', '-t', 'host', '-i', 'c.tools', 'host/vendor'],
+                   cwd=tmp_path,
+                   env={'PYTHONPATH': str(_ROOT)},
+                   check=True)
+
+    assert _files(tmp_path.joinpath('host', 'vendor')) == [
+        '__init__.py', 'a/__init__.py', 'a/data/table.txt', 'a/sub.py', 'b/__init__.py', 'b/core.py', 'c/__init__.py',
+        'c/tools/__init__.py'
+    ]
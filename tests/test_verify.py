@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+_ROOT = Path(__file__).parent.parent
+
+
+def _verify(cwd: Path, *args: str) -> subprocess.CompletedProcess:
+    # import times and memory usage of a single run are too noisy to be compared, so only sizes are checked
+    return subprocess.run([sys.executable, '-m', 'pverify', '-n', '1', '-t', '1000', '-r', '1000', *args],
+                          cwd=cwd,
+                          env={'PYTHONPATH': str(_ROOT)},
+                          check=False,
+                          capture_output=True,
+                          text=True)
+
+
+def test_size_regressions_exceed_the_baseline(tmp_path):
+    tmp_path.joinpath('pkg').mkdir()
+    tmp_path.joinpath('pkg', '__init__.py').write_text('VALUE = 1\n', encoding='utf-8')
+
+    result = _verify(tmp_path, '-b', 'baseline.json', 'pkg')
+    baseline = json.loads(tmp_path.joinpath('baseline.json').read_text(encoding='utf-8'))
+
+    assert result.returncode == 0, result.stdout
+    assert baseline['module'] == 'pkg' and baseline['size'] == 10
+    assert baseline['cold'] > 0 and baseline['warm'] > 0
+
+    tmp_path.joinpath('pkg', 'data.txt').write_text('x' * 1000, encoding='utf-8')
+    result = _verify(tmp_path, '-b', 'baseline.json', 'pkg')
+
+    assert result.returncode == 1
+    assert 'thresholds exceeded: size 1010.0 exceeds 11.0 (baseline 10.0)' in result.stdout
+
+    # updating the baseline accepts the regression
+    assert _verify(tmp_path, '-b', 'baseline.json', '-u', 'pkg').returncode == 0
+    assert _verify(tmp_path, '-b', 'baseline.json', 'pkg').returncode == 0
+
+
+def test_zip_files_need_a_module_if_ambiguous(tmp_path):
+    with zipfile.ZipFile(tmp_path.joinpath('out.zip'), 'w') as handle:
+        handle.writestr('a/__init__.py', '')
+        handle.writestr('b.py', 'import a\n')
+
+    result = _verify(tmp_path, 'out.zip')
+    assert result.returncode == 1
+    assert 'contains 2 top-level modules, specify the module to be imported' in result.stdout
+
+    result = _verify(tmp_path, '-m', 'b', 'out.zip')
+    assert result.returncode == 0, result.stdout
+    assert 'Import of b:' in result.stdout
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import zipfile
+from pathlib import Path, PurePosixPath
+
+from pvendor.wheel import list_wheels, wheel_members, wheel_modules
+
+_ROOT = Path(__file__).parent.parent
+
+
+def _wheel(path: Path) -> Path:
+    with zipfile.ZipFile(path, 'w') as wheel:
+        wheel.writestr('lib/__init__.py', 'from lib.core import VALUE\n')
+        wheel.writestr('lib/core.py', 'VALUE = 1\n')
+        wheel.writestr('lib/__pycache__/core.cpython-311.pyc', b'')
+        wheel.writestr('single.py', 'import lib\n')
+        wheel.writestr('README.txt', '')
+        wheel.writestr('lib-1.0.data/purelib/pure/__init__.py', '')
+        wheel.writestr('lib-1.0.data/platlib/_native.py', '')
+        wheel.writestr('lib-1.0.data/scripts/tool', '')
+        wheel.writestr('lib-1.0.dist-info/METADATA', '')
+    return path
+
+
+def _vendor(cwd: Path, *args: str):
+    subprocess.run([sys.executable, '-m', 'pvendor', *args], cwd=cwd, env={'PYTHONPATH': str(_ROOT)}, check=True)
+
+
+def test_members_of_wheels_include_purelib_and_platlib(tmp_path):
+    with zipfile.ZipFile(_wheel(tmp_path.joinpath('lib-1.0-py3-none-any.whl'))) as handle:
+        paths = [path.as_posix() for path, _ in wheel_members(handle)]
+        assert paths == ['lib/__init__.py', 'lib/core.py', 'single.py', 'pure/__init__.py', '_native.py']
+        assert wheel_modules(handle) == ['lib', 'single', 'pure', '_native']
+
+    assert list_wheels(tmp_path) == [tmp_path.joinpath('lib-1.0-py3-none-any.whl')]
+
+
+def test_wheels_are_vendored_into_folders_and_zip_files(tmp_path):
+    _wheel(tmp_path.joinpath('lib-1.0-py3-none-any.whl'))
+
+    _vendor(tmp_path, '-w', 'lib-1.0-py3-none-any.whl', 'vendor')
+    _vendor(tmp_path, '-w', '.', '-z', 'vendor.zip', 'vendor')
+
+    files = [path for path in tmp_path.joinpath('vendor').rglob('*') if path.is_file()]
+    folder = sorted(path.relative_to(tmp_path).as_posix() for path in files)
+    with zipfile.ZipFile(tmp_path.joinpath('vendor.zip')) as handle:
+        assert sorted(handle.namelist()) == folder
+        assert 'from ..lib.core import VALUE' in handle.read('vendor/lib/__init__.py').decode('utf-8')
+        assert 'from . import lib' in handle.read('vendor/single.py').decode('utf-8')
+
+    assert PurePosixPath('vendor/pure/__init__.py') in [PurePosixPath(path) for path in folder]
@@ -0,0 +1,58 @@
+import io
+from pathlib import Path
+from zipfile import ZIP_STORED, ZipFile
+
+from pdistx.utils.zip import write_members, zipit
+
+_MEMBERS = [('b.py', b'B = 1\n' * 100), ('a/__init__.py', b''), ('a/data.txt', b'data')]
+
+
+def _zip(members: list, previous: bytes = None):
+    buffer = io.BytesIO()
+
+    with ZipFile(buffer, 'w') as handle:
+        if previous is None:
+            reused = write_members(handle, members, None)
+        else:
+            with ZipFile(io.BytesIO(previous)) as previous_handle:
+                reused = write_members(handle, members, previous_handle)
+
+    return buffer.getvalue(), reused
+
+
+def test_unchanged_members_are_copied_from_previous_zip_files():
+    data, reused = _zip(_MEMBERS)
+    assert reused == 0
+    assert _zip(list(reversed(_MEMBERS)))[0] == data
+
+    changed = [('b.py', b'B = 2\n' * 100)] + _MEMBERS[1:]
+    updated, reused = _zip(changed, data)
+    assert reused == 2
+    assert updated == _zip(changed)[0]
+
+    with ZipFile(io.BytesIO(updated)) as handle:
+        assert handle.testzip() is None
+        assert [(info.filename, handle.read(info)) for info in handle.infolist()] == sorted(changed)
+
+
+def test_stored_members_of_previous_zip_files_are_recompressed():
+    buffer = io.BytesIO()
+    with ZipFile(buffer, 'w', ZIP_STORED) as handle:
+        for name, data in _MEMBERS:
+            handle.writestr(name, data)
+
+    updated, reused = _zip(_MEMBERS, buffer.getvalue())
+    assert reused == 0
+    assert updated == _zip(_MEMBERS)[0]
+
+
+def test_zipping_folders_is_deterministic(tmp_path):
+    for name, data in _MEMBERS:
+        tmp_path.joinpath('src', name).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.joinpath('src', name).write_bytes(data)
+
+    source, first, second = tmp_path.joinpath('src'), tmp_path.joinpath('first.zip'), tmp_path.joinpath('second.zip')
+
+    assert zipit(source, first, Path('base')) == 0
+    assert zipit(source, second, Path('base'), first) == 3
+    assert tmp_path.joinpath('first.zip').read_bytes() == tmp_path.joinpath('second.zip').read_bytes()